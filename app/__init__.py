@@ -11,15 +11,56 @@ def create_app(config_name="default"):
     # Initialize Extensions 
     db.init_app(app)
 
+    from app.profiling import profiler
+    profiler.init_app(app)
+
+    from app.assets import assets
+    assets.init_app(app)
+
+    from app.page_cache import page_cache
+    page_cache.init_app(app)
+
+    from app.rate_limit import request_guard
+    request_guard.init_app(app)
+
+    from app.tenancy import tenant_resolver
+    tenant_resolver.init_app(app)
+
+    from app.scheduler import scheduler
+    from app.jobs import register_jobs
+    scheduler.init_app(app)
+    register_jobs(scheduler, app.config)
+
     # Register Blueprints
     from app.routes.main import main as main_blueprint
     from app.routes.chat_routes import chat_bp
+    from app.routes.metrics_routes import metrics_bp
+    from app.routes.debug_routes import debug_bp
+    from app.routes.quotes_routes import quotes_bp
+    from app.routes.pomodoro_routes import pomodoro_bp
+    from app.routes.record_routes import record_bp
+    from app.routes.data_routes import data_bp
+    from app.routes.admin_routes import admin_bp
     # from app.routes.auth import auth as auth_blueprint
     # from app.routes.student import student as student_blueprint
 
     app.register_blueprint(main_blueprint)
     app.register_blueprint(chat_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(debug_bp)
+    app.register_blueprint(quotes_bp)
+    app.register_blueprint(pomodoro_bp)
+    app.register_blueprint(record_bp)
+    app.register_blueprint(data_bp)
+    app.register_blueprint(admin_bp)
     # app.register_blueprint(auth_blueprint, url_prefix="/auth")
     # app.register_blueprint(student_blueprint, url_prefix="/student")
 
+    # Create tables and seed reference data
+    with app.app_context():
+        from app.services.quote_service import quote_service
+
+        db.create_all()
+        quote_service.seed_if_empty()
+
     return app
\ No newline at end of file
@@ -0,0 +1,235 @@
+import os
+import re
+import gzip
+import json
+import hashlib
+import mimetypes
+import threading
+from typing import Dict, Optional
+import logging
+
+from flask import send_file, url_for, abort
+
+from app.page_cache import accepts_encoding
+
+try:
+    import brotli
+except ImportError:  # Brotli variants are optional; gzip is always produced
+    brotli = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html'}
+
+# Content-encoding preference and the file suffix of each precompressed variant
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+def minify_css(source: str) -> str:
+    """Strip comments and insignificant whitespace from a stylesheet"""
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    source = re.sub(r':\s+', ':', source)
+    return source.replace(';}', '}').strip()
+
+def _scan_js_line(line: str, stack: list, in_comment: bool) -> bool:
+    """
+    Follow template literals and block comments across one line of JavaScript
+
+    stack holds one entry per open context: '`' for template text, or the
+    number of open braces inside a ${...} expression. Returns whether a
+    block comment is still open at the end of the line.
+    """
+    i, quote = 0, None
+    while i < len(line):
+        char = line[i]
+        if in_comment:
+            if line.startswith('*/', i):
+                in_comment = False
+                i += 1
+        elif stack and stack[-1] == '`':
+            if char == '\\':
+                i += 1
+            elif char == '`':
+                stack.pop()
+            elif line.startswith('${', i):
+                stack.append(0)
+                i += 1
+        elif quote:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char == '`':
+            stack.append('`')
+        elif line.startswith('//', i):
+            break
+        elif line.startswith('/*', i):
+            in_comment = True
+            i += 1
+        elif stack and char == '{':
+            stack[-1] += 1
+        elif stack and char == '}':
+            if stack[-1] == 0:
+                stack.pop()
+            else:
+                stack[-1] -= 1
+        i += 1
+    return in_comment
+
+def minify_js(source: str) -> str:
+    """
+    Conservative JavaScript minification: trims indentation and drops blank and
+    whole-line comments but keeps line breaks, so automatic semicolon insertion
+    and strings behave as in the source. Lines inside multi-line template
+    literals are kept byte for byte, since their whitespace and any // are
+    part of the string.
+    """
+    lines, stack, in_comment = [], [], False
+    for line in source.splitlines():
+        in_template = bool(stack) and stack[-1] == '`'
+        stripped = line.strip()
+        if not in_template and (not stripped or (stripped.startswith('//') and not in_comment)):
+            continue
+
+        in_comment = _scan_js_line(line, stack, in_comment)
+        if in_template:
+            lines.append(line)
+        elif stack and stack[-1] == '`':
+            # A template literal opened on this line: its trailing whitespace is text
+            lines.append(line.lstrip())
+        else:
+            lines.append(stripped)
+    return '\n'.join(lines) + '\n'
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+class AssetPipeline:
+    """
+    Build-free asset pipeline for the app's static folder.
+
+    On startup every static file is (optionally) minified, written under a
+    content-hashed name such as css/style.3f2a9c1b0d.css, and precompressed to
+    gzip (and brotli when the package is installed). Hashed files are served
+    from /assets/ with immutable caching, so browsers never refetch them until
+    their content, and therefore their name, changes.
+    """
+
+    CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+    def __init__(self, app=None):
+        self.manifest: Dict[str, str] = {}
+        self._sources: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.static_folder = app.static_folder
+        self.build_dir = os.path.abspath(app.config.get('ASSETS_BUILD_DIR') or os.path.join(app.instance_path, 'assets'))
+        self.minify = app.config.get('ASSETS_MINIFY', True)
+        self.hash_length = app.config.get('ASSETS_HASH_LENGTH', 10)
+        self.auto_rebuild = app.debug
+
+        self.build()
+
+        app.add_url_rule('/assets/<path:filename>', 'assets', self.serve)
+        app.jinja_env.globals['asset_url'] = self.url_for
+        app.extensions['assets'] = self
+
+    def build(self) -> None:
+        """Process every file in the static folder and write the manifest"""
+        os.makedirs(self.build_dir, exist_ok=True)
+
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                path = os.path.join(root, name)
+                self._build_file(os.path.relpath(path, self.static_folder).replace(os.sep, '/'))
+
+        with open(os.path.join(self.build_dir, 'manifest.json'), 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+
+        logger.info(f"Built {len(self.manifest)} static assets into {self.build_dir}")
+
+    def _build_file(self, logical_name: str) -> str:
+        source_path = os.path.join(self.static_folder, logical_name)
+        extension = os.path.splitext(logical_name)[1].lower()
+
+        with open(source_path, 'rb') as f:
+            content = f.read()
+
+        minifier = MINIFIERS.get(extension) if self.minify else None
+        if minifier:
+            content = minifier(content.decode('utf-8')).encode('utf-8')
+
+        digest = hashlib.sha256(content).hexdigest()[:self.hash_length]
+        stem, _ = os.path.splitext(logical_name)
+        hashed_name = f"{stem}.{digest}{extension}"
+        output_path = os.path.join(self.build_dir, hashed_name)
+
+        if not os.path.exists(output_path):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, 'wb') as f:
+                f.write(content)
+
+            if extension in COMPRESSIBLE_EXTENSIONS:
+                with open(output_path + '.gz', 'wb') as f:
+                    # mtime=0 keeps the gzip bytes identical across rebuilds
+                    f.write(gzip.compress(content, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(output_path + '.br', 'wb') as f:
+                        f.write(brotli.compress(content, quality=11))
+
+        with self._lock:
+            self.manifest[logical_name] = hashed_name
+            self._sources[logical_name] = os.path.getmtime(source_path)
+
+        return hashed_name
+
+    def _resolve(self, filename: str) -> Optional[str]:
+        with self._lock:
+            hashed_name = self.manifest.get(filename)
+            built_mtime = self._sources.get(filename)
+
+        # In debug mode pick up edits without restarting the server
+        if self.auto_rebuild:
+            source_path = os.path.join(self.static_folder, filename)
+            if os.path.isfile(source_path) and os.path.getmtime(source_path) != built_mtime:
+                hashed_name = self._build_file(filename)
+
+        return hashed_name
+
+    def url_for(self, filename: str) -> str:
+        """Template helper: URL of the content-hashed build of a static file"""
+        hashed_name = self._resolve(filename)
+        if hashed_name is None:
+            return url_for('static', filename=filename)
+        return url_for('assets', filename=hashed_name)
+
+    def serve(self, filename: str):
+        """Serve a hashed asset, preferring a precompressed variant the client accepts"""
+        path = os.path.abspath(os.path.join(self.build_dir, filename))
+        if not path.startswith(self.build_dir + os.sep) or not os.path.isfile(path):
+            abort(404)
+
+        encoding = None
+        for candidate, suffix in ENCODINGS:
+            if accepts_encoding(candidate) and os.path.isfile(path + suffix):
+                encoding, path_to_send = candidate, path + suffix
+                break
+        else:
+            path_to_send = path
+
+        mimetype = mimetypes.guess_type(filename)[0]
+        response = send_file(path_to_send, mimetype=mimetype, conditional=True, etag=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = self.CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+assets = AssetPipeline()
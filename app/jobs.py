@@ -0,0 +1,47 @@
+import logging
+
+from app.scheduler import JobScheduler
+from app.services.tenants import tenant_registry
+from app.services.study_stats_service import study_stats_service
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Jobs work on the tenants this worker has already loaded rather than loading
+# every configured tenant's services into the one process that runs them
+
+def compact_indexes() -> None:
+    """Compact the history index and answer cache of each loaded tenant"""
+    for services in tenant_registry.loaded():
+        services.vector_service.history_index.compact()
+        services.answer_cache.compact()
+
+def backfill_history_indexes() -> None:
+    """Index conversations stored before each loaded tenant's history index existed"""
+    for services in tenant_registry.loaded():
+        services.vector_service.backfill_history_index()
+
+def prewarm_answer_cache() -> None:
+    """Pre-generate popular answers for each loaded tenant ahead of its peak hours"""
+    for services in tenant_registry.loaded():
+        generated = services.answer_cache.refresh_if_peak_ahead()
+        if generated:
+            logger.info(f"Pre-generated {generated} answers for tenant {services.tenant_id}")
+
+def rebuild_study_rollups(days: int = 7) -> None:
+    """Repair drifted Pomodoro rollups for the closed days and weeks of the last `days` days"""
+    study_stats_service.rebuild_rollups(days=days)
+
+def register_jobs(scheduler: JobScheduler, config) -> None:
+    """Register the maintenance and precompute jobs with their configured intervals"""
+    # The vector stores and answer caches are files on each host
+    scheduler.register('indexes.compact', compact_indexes,
+                       interval=config.get('JOB_COMPACT_INTERVAL', 86400), scope='host')
+    scheduler.register('history_index.backfill', backfill_history_indexes,
+                       interval=config.get('JOB_BACKFILL_INTERVAL', 3600), scope='host')
+    scheduler.register('answer_cache.prewarm', prewarm_answer_cache,
+                       interval=config.get('JOB_ANSWER_CACHE_INTERVAL', 300), scope='host')
+    # Rollups live in the shared database
+    scheduler.register('study_stats.rebuild_rollups', rebuild_study_rollups,
+                       interval=config.get('JOB_ROLLUP_INTERVAL', 86400))
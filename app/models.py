@@ -0,0 +1,203 @@
+from datetime import datetime
+from app import db
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+class Quote(db.Model):
+    """A motivational quote in the server-side catalog"""
+
+    __tablename__ = 'quotes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    text = db.Column(db.Text, nullable=False)
+    author = db.Column(db.String(200), nullable=False, default='Unknown')
+    category = db.Column(db.String(50), nullable=False)
+    # Dense 0..n-1 position within the category, so a random pick is one index lookup
+    category_position = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('category', 'category_position', name='uq_quotes_category_position'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'text': self.text,
+            'author': self.author,
+            'category': self.category
+        }
+
+class QuoteOfTheDay(db.Model):
+    """The quote picked for a given day, shared by every worker"""
+
+    __tablename__ = 'quote_of_the_day'
+
+    day = db.Column(db.Date, primary_key=True)
+    quote_id = db.Column(db.Integer, db.ForeignKey('quotes.id'), nullable=False)
+
+    quote = db.relationship('Quote')
+
+class FavoriteQuote(db.Model):
+    """A quote saved by a user"""
+
+    __tablename__ = 'favorite_quotes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(64), nullable=False, index=True)
+    quote_id = db.Column(db.Integer, db.ForeignKey('quotes.id'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    quote = db.relationship('Quote')
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'quote_id', name='uq_favorite_quotes_user_quote'),
+    )
+
+    def to_dict(self):
+        data = self.quote.to_dict()
+        data['saved_at'] = self.created_at.isoformat()
+        return data
+
+class PomodoroSession(db.Model):
+    """A completed focus or break interval; rows are only ever appended"""
+
+    __tablename__ = 'pomodoro_sessions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(64), nullable=False)
+    kind = db.Column(db.String(10), nullable=False)  # "focus" or "break"
+    duration_seconds = db.Column(db.Integer, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False)
+    ended_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_pomodoro_sessions_user_ended', 'user_id', 'ended_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'duration_seconds': self.duration_seconds,
+            'started_at': self.started_at.isoformat(),
+            'ended_at': self.ended_at.isoformat()
+        }
+
+class StudyRollup(db.Model):
+    """Per-user daily and weekly study totals, updated incrementally as sessions arrive"""
+
+    __tablename__ = 'study_rollups'
+
+    user_id = db.Column(db.String(64), primary_key=True)
+    period = db.Column(db.String(5), primary_key=True)  # "day" or "week"
+    period_start = db.Column(db.Date, primary_key=True)
+    focus_sessions = db.Column(db.Integer, nullable=False, default=0)
+    focus_seconds = db.Column(db.Integer, nullable=False, default=0)
+    break_sessions = db.Column(db.Integer, nullable=False, default=0)
+    break_seconds = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'period_start': self.period_start.isoformat(),
+            'focus_sessions': self.focus_sessions,
+            'focus_minutes': round(self.focus_seconds / 60),
+            'break_sessions': self.break_sessions,
+            'break_minutes': round(self.break_seconds / 60)
+        }
+
+class UserRecord(db.Model):
+    """A to-do or calendar event, stored as the JSON the page works with"""
+
+    __tablename__ = 'user_records'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(64), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # "todo" or "calendar_event"
+    # The page's own id for the record, or a hash of its content when it has none
+    record_key = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'kind', 'record_key', name='uq_user_records_key'),
+        db.Index('ix_user_records_user_kind', 'user_id', 'kind', 'id'),
+    )
+
+class ScheduledJob(db.Model):
+    """A background job's schedule and lease; the lease is how workers agree on who runs it"""
+
+    __tablename__ = 'scheduled_jobs'
+
+    # The job name, or "name@host" for jobs that run once per host
+    key = db.Column(db.String(200), primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    host = db.Column(db.String(100))
+    interval_seconds = db.Column(db.Integer)  # None for jobs that only run when queued
+    next_run_at = db.Column(db.DateTime)
+    lease_owner = db.Column(db.String(200))
+    lease_until = db.Column(db.DateTime)
+    last_started_at = db.Column(db.DateTime)
+    last_finished_at = db.Column(db.DateTime)
+    last_status = db.Column(db.String(10))  # "succeeded" or "failed"
+    last_error = db.Column(db.Text)
+    last_duration_seconds = db.Column(db.Float)
+    run_count = db.Column(db.Integer, nullable=False, default=0)
+    failure_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'key': self.key,
+            'name': self.name,
+            'host': self.host,
+            'interval_seconds': self.interval_seconds,
+            'next_run_at': _isoformat(self.next_run_at),
+            'running_on': self.lease_owner,
+            'lease_until': _isoformat(self.lease_until),
+            'last_started_at': _isoformat(self.last_started_at),
+            'last_finished_at': _isoformat(self.last_finished_at),
+            'last_status': self.last_status,
+            'last_error': self.last_error,
+            'last_duration_seconds': self.last_duration_seconds,
+            'run_count': self.run_count,
+            'failure_count': self.failure_count
+        }
+
+class JobRun(db.Model):
+    """One run of a background job; queued runs wait here until a worker picks them up"""
+
+    __tablename__ = 'job_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_key = db.Column(db.String(200), nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text)  # JSON keyword arguments for queued runs
+    status = db.Column(db.String(10), nullable=False)  # "queued", "running", "succeeded" or "failed"
+    owner = db.Column(db.String(200))
+    queued_at = db.Column(db.DateTime)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    error = db.Column(db.Text)
+
+    __table_args__ = (
+        db.Index('ix_job_runs_status_id', 'status', 'id'),
+        db.Index('ix_job_runs_job_key_id', 'job_key', 'id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job': self.name,
+            'key': self.job_key,
+            'status': self.status,
+            'owner': self.owner,
+            'queued_at': _isoformat(self.queued_at),
+            'started_at': _isoformat(self.started_at),
+            'finished_at': _isoformat(self.finished_at),
+            'duration_seconds': (self.finished_at - self.started_at).total_seconds()
+                if self.started_at and self.finished_at else None,
+            'error': self.error
+        }
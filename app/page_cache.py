@@ -0,0 +1,123 @@
+import os
+import gzip
+import time
+import hashlib
+import threading
+from functools import wraps
+from typing import Dict, Optional
+import logging
+
+from flask import request, make_response
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def accepts_encoding(encoding: str) -> bool:
+    """True if the request's Accept-Encoding allows a content coding, honouring q=0 and *"""
+    return request.accept_encodings.quality(encoding) > 0
+
+class PageCache:
+    """
+    Response cache for pages whose HTML is the same for every visitor.
+
+    The first request renders the view; the body, a strong ETag and a gzip copy
+    are kept per endpoint. Later requests are answered from memory, with 304 Not
+    Modified when the browser already holds the current ETag. In debug mode
+    entries are invalidated when any file under the template or static folders
+    changes; otherwise templates only change with a deploy, which restarts the
+    app, so nothing is watched.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked_at = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get('PAGE_CACHE_ENABLED', True)
+        self.compress = app.config.get('PAGE_CACHE_COMPRESS', True)
+        self.check_interval = app.config.get('PAGE_CACHE_CHECK_INTERVAL', 2.0)
+        self.watch = app.debug
+        self.watched = [
+            os.path.join(app.root_path, app.template_folder),
+            app.static_folder
+        ]
+        self._entries.clear()
+        self._signature = None
+
+    def _current_signature(self) -> Optional[float]:
+        """Latest modification time across the watched folders, re-read at most every check_interval"""
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked_at < self.check_interval:
+            return self._signature
+
+        latest = 0.0
+        for folder in self.watched:
+            for root, _, files in os.walk(folder):
+                for name in files:
+                    latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+
+        with self._lock:
+            if self._signature is not None and latest != self._signature:
+                logger.info("Templates or static files changed, clearing page cache")
+                self._entries.clear()
+            self._signature = latest
+            self._checked_at = now
+        return latest
+
+    def _render(self, endpoint: str, view, args, kwargs) -> Optional[Dict]:
+        body = view(*args, **kwargs)
+        if not isinstance(body, str):
+            return None
+
+        data = body.encode('utf-8')
+        entry = {
+            'body': data,
+            'etag': hashlib.sha1(data).hexdigest(),
+            'gzip': gzip.compress(data, compresslevel=6, mtime=0) if self.compress else None
+        }
+        with self._lock:
+            self._entries[endpoint] = entry
+        return entry
+
+    def cached(self, view):
+        """Decorator for views that return the same HTML string for every request"""
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled or request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            if self.watch:
+                self._current_signature()
+            # Query strings are ignored: these pages never read them
+            key = request.path
+            entry = self._entries.get(key) or self._render(key, view, args, kwargs)
+            if entry is None:
+                return view(*args, **kwargs)
+
+            # Each encoding is a distinct representation, so it gets its own strong ETag
+            use_gzip = entry['gzip'] is not None and accepts_encoding('gzip')
+            etag = entry['etag'] + '-gz' if use_gzip else entry['etag']
+
+            if etag in request.if_none_match:
+                response = make_response('', 304)
+            elif use_gzip:
+                response = make_response(entry['gzip'])
+                response.headers['Content-Encoding'] = 'gzip'
+            else:
+                response = make_response(entry['body'])
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'public, no-cache'
+            response.vary.add('Accept-Encoding')
+            return response
+
+        return wrapper
+
+page_cache = PageCache()
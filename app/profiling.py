@@ -0,0 +1,178 @@
+import os
+import re
+import sys
+import hmac
+import time
+import random
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+from flask import g, request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class StackSampler:
+    """
+    Samples one thread's Python stack at a fixed interval from a helper thread
+    and aggregates the samples as folded stacks (the flamegraph.pl input format)
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class RequestProfiler:
+    """
+    Opt-in per-request profiling for the Flask app.
+
+    A request is profiled when PROFILING_ENABLED is set and it wins the
+    PROFILING_SAMPLE_RATE draw, or when it carries the PROFILING_HEADER with the
+    configured PROFILING_TOKEN. Folded stacks are written per endpoint under
+    PROFILING_DIR, keeping at most PROFILING_MAX_FILES files per endpoint
+    (0 for no limit).
+    """
+
+    def __init__(self, app=None):
+        self.directory = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get('PROFILING_ENABLED', False)
+        self.sample_rate = app.config.get('PROFILING_SAMPLE_RATE', 0.01)
+        self.header = app.config.get('PROFILING_HEADER', 'X-Profile')
+        self.token = app.config.get('PROFILING_TOKEN')
+        self.interval = app.config.get('PROFILING_INTERVAL', 0.005)
+        self.max_files = app.config.get('PROFILING_MAX_FILES', 50)
+        self.directory = os.path.abspath(app.config.get('PROFILING_DIR', 'profiles'))
+
+        if not (self.enabled or self.token):
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        app.extensions['request_profiler'] = self
+        logger.info(f"Request profiling active (sample rate {self.sample_rate}), writing to {self.directory}")
+
+    def is_authorized(self) -> bool:
+        """Whether the current request carries the profiling token"""
+        sent = request.headers.get(self.header, '')
+        return bool(self.token) and hmac.compare_digest(sent.encode(), self.token.encode())
+
+    def _should_profile(self) -> bool:
+        if self.is_authorized():
+            return True
+        return self.enabled and random.random() < self.sample_rate
+
+    def _before_request(self) -> None:
+        if request.path.startswith('/debug/profiles') or not self._should_profile():
+            return
+
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        g._profile_sampler = sampler
+        g._profile_started = time.perf_counter()
+        sampler.start()
+
+    def _teardown_request(self, exc=None) -> None:
+        sampler = g.pop('_profile_sampler', None)
+        if sampler is None:
+            return
+
+        sampler.stop()
+        duration_ms = (time.perf_counter() - g.pop('_profile_started')) * 1000.0
+
+        try:
+            self._write(request.endpoint or 'unknown', duration_ms, sampler.folded())
+        except Exception as e:
+            logger.error(f"Failed to write request profile: {e}")
+
+    def _endpoint_dir(self, endpoint: str) -> str:
+        return os.path.join(self.directory, re.sub(r'[^A-Za-z0-9_.-]', '_', endpoint))
+
+    def _write(self, endpoint: str, duration_ms: float, folded: str) -> None:
+        if not folded:
+            return
+
+        directory = self._endpoint_dir(endpoint)
+        os.makedirs(directory, exist_ok=True)
+
+        filename = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{int(duration_ms)}ms.folded"
+        with open(os.path.join(directory, filename), 'w') as f:
+            f.write(folded)
+
+        # Rotate: drop the oldest profiles beyond the per-endpoint limit (0 keeps them all)
+        if self.max_files <= 0:
+            return
+        files = sorted(name for name in os.listdir(directory) if name.endswith('.folded'))
+        for name in files[:len(files) - self.max_files]:
+            os.remove(os.path.join(directory, name))
+
+    def list_profiles(self) -> Dict[str, List[Dict]]:
+        """List stored profiles per endpoint, newest first"""
+        profiles = {}
+        if not self.directory or not os.path.isdir(self.directory):
+            return profiles
+
+        for endpoint in sorted(os.listdir(self.directory)):
+            directory = os.path.join(self.directory, endpoint)
+            if not os.path.isdir(directory):
+                continue
+
+            entries = []
+            for name in sorted(os.listdir(directory), reverse=True):
+                if not name.endswith('.folded'):
+                    continue
+                match = re.search(r'-(\d+)ms\.folded$', name)
+                entries.append({
+                    'file': name,
+                    'duration_ms': int(match.group(1)) if match else None,
+                    'size_bytes': os.path.getsize(os.path.join(directory, name))
+                })
+            profiles[endpoint] = entries
+
+        return profiles
+
+    def profile_path(self, endpoint: str, filename: str) -> Optional[str]:
+        """Resolve a stored profile file, refusing anything outside the profile directory"""
+        if not self.directory:
+            return None
+
+        # An endpoint of ".." (or a symlink) must not lead out of the directory
+        path = os.path.realpath(os.path.join(self._endpoint_dir(endpoint), os.path.basename(filename)))
+        if os.path.dirname(os.path.dirname(path)) != os.path.realpath(self.directory):
+            return None
+        return path if path.endswith('.folded') and os.path.isfile(path) else None
+
+profiler = RequestProfiler()
@@ -0,0 +1,255 @@
+import os
+import math
+import time
+import sqlite3
+import hashlib
+import threading
+from functools import wraps
+from typing import Callable, Dict, Tuple
+import logging
+
+from flask import Response, g, request, session, jsonify, make_response
+
+from app.services.metrics import REQUEST_GUARD
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def consume(tokens: float, updated_at: float, now: float, capacity: float,
+            refill_per_second: float, cost: float) -> Tuple[bool, float, float]:
+    """
+    Token bucket step: refill for the elapsed time, then try to take cost tokens
+
+    Returns:
+        (allowed, tokens left, seconds until cost tokens are available)
+    """
+    tokens = min(capacity, tokens + max(0.0, now - updated_at) * refill_per_second)
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    return False, tokens, (cost - tokens) / refill_per_second
+
+class MemoryRateLimitBackend:
+    """Token buckets held in this process; each worker enforces its own limit"""
+
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.time()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            allowed, tokens, retry_after = consume(tokens, updated_at, now, capacity, refill_per_second, cost)
+            self._buckets[key] = (tokens, now)
+
+            if len(self._buckets) > self.MAX_KEYS:
+                self._prune(now, capacity, refill_per_second)
+
+        return allowed, retry_after
+
+    def _prune(self, now: float, capacity: float, refill_per_second: float) -> None:
+        # A bucket that has refilled completely is the same as no bucket
+        full_after = capacity / refill_per_second
+        for key, (_, updated_at) in list(self._buckets.items()):
+            if now - updated_at >= full_after:
+                del self._buckets[key]
+
+class SQLiteRateLimitBackend:
+    """Token buckets in a SQLite file, shared by every worker process on the host"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def take(self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0) -> Tuple[bool, float]:
+        conn = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front so the read-modify-write is atomic across processes
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated_at FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tokens, updated_at = row if row else (capacity, now)
+
+            allowed, tokens, retry_after = consume(tokens, updated_at, now, capacity, refill_per_second, cost)
+            conn.execute(
+                "INSERT INTO rate_limits (key, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (key, tokens, now)
+            )
+            conn.execute("COMMIT")
+            return allowed, retry_after
+
+        except Exception:
+            # BEGIN itself fails when the lock wait times out; there is nothing to roll back then
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        finally:
+            conn.close()
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the same key share its result"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable) -> Tuple[object, bool]:
+        """
+        Run fn, or wait for the identical call already in flight
+
+        Returns:
+            (result, shared) where shared is True for callers that waited on another's call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+class RequestGuard:
+    """
+    Per-user protection for expensive endpoints.
+
+    limit() applies a token bucket per user (RATE_LIMIT_CAPACITY requests of
+    burst, refilled at RATE_LIMIT_PER_MINUTE) and answers 429 with Retry-After
+    once it is empty. A tenant's own RATE_LIMIT_* settings, put on
+    g.rate_limit by the tenant resolver, replace those two. coalesce() makes
+    identical requests from the same user that arrive while one is still
+    running wait for and reuse its response, so a double-clicked send costs
+    one upstream call.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.coalescing = False
+        self.backend = None
+        self._flight = SingleFlight()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.coalescing = app.config.get('COALESCE_REQUESTS', True)
+        self.capacity = float(app.config.get('RATE_LIMIT_CAPACITY', 10))
+        self.refill_per_second = float(app.config.get('RATE_LIMIT_PER_MINUTE', 30)) / 60.0
+
+        if app.config.get('RATE_LIMIT_BACKEND', 'memory') == 'sqlite':
+            path = app.config.get('RATE_LIMIT_SQLITE_PATH') or os.path.join(app.instance_path, 'rate_limits.sqlite3')
+            self.backend = SQLiteRateLimitBackend(path)
+        else:
+            self.backend = MemoryRateLimitBackend()
+
+        app.extensions['request_guard'] = self
+
+    def _limits(self) -> Tuple[float, float]:
+        """(capacity, refill per second) for the current request"""
+        overrides = g.get('rate_limit') or {}
+        capacity = float(overrides.get('RATE_LIMIT_CAPACITY', self.capacity))
+        refill_per_second = float(overrides.get('RATE_LIMIT_PER_MINUTE', self.refill_per_second * 60)) / 60.0
+        return capacity, refill_per_second
+
+    def limit(self, key: Callable[[], str]):
+        """Decorator: rate limit a view per value of key() (e.g. the user id)"""
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+
+                try:
+                    allowed, retry_after = self.backend.take(f"{request.endpoint}:{key()}", *self._limits())
+                except Exception as e:
+                    # Never turn a limiter failure into an outage
+                    logger.error(f"Rate limiter unavailable: {e}")
+                    allowed, retry_after = True, 0.0
+
+                if not allowed:
+                    REQUEST_GUARD.labels(endpoint=request.endpoint, action='limited').inc()
+                    seconds = max(1, math.ceil(retry_after))
+                    response = jsonify({
+                        'error': 'Too many requests. Please slow down and try again shortly.',
+                        'retry_after': seconds
+                    })
+                    response.status_code = 429
+                    response.headers['Retry-After'] = str(seconds)
+                    return response
+
+                return view(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def coalesce(self, key: Callable[[], str]):
+        """Decorator: share one response among identical concurrent requests for the same key()"""
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.coalescing:
+                    return view(*args, **kwargs)
+
+                body_hash = hashlib.sha1(request.get_data()).hexdigest()
+                flight_key = f"{request.endpoint}:{key()}:{body_hash}"
+
+                def run():
+                    response = make_response(view(*args, **kwargs))
+                    # What the view saved in the session (e.g. the chat history),
+                    # so the requests sharing the response keep it too
+                    saved = dict(session) if session.modified else None
+                    return response.get_data(), response.status_code, list(response.headers.items()), saved
+
+                (body, status, headers, saved), shared = self._flight.do(flight_key, run)
+                if shared:
+                    REQUEST_GUARD.labels(endpoint=request.endpoint, action='coalesced').inc()
+                    if saved is not None:
+                        session.update(saved)
+                return Response(body, status=status, headers=headers)
+
+            return wrapper
+
+        return decorator
+
+request_guard = RequestGuard()
@@ -0,0 +1,36 @@
+import hmac
+
+from flask import Blueprint, jsonify, request, current_app, abort
+from app.scheduler import scheduler
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.before_request
+def require_admin():
+    """Hide the admin endpoints (404) unless in debug mode or the request carries ADMIN_TOKEN"""
+    token = current_app.config.get('ADMIN_TOKEN')
+    sent = request.headers.get('X-Admin-Token', '')
+    if not (current_app.debug or (token and hmac.compare_digest(sent.encode(), token.encode()))):
+        abort(404)
+
+@admin_bp.route('/admin/jobs')
+def list_jobs():
+    """Background jobs with their schedule, lease, last outcome and the latest runs"""
+    return jsonify(scheduler.status(recent=min(request.args.get('recent', 50, type=int), 500)))
+
+@admin_bp.route('/admin/jobs/<name>/run', methods=['POST'])
+def run_job(name):
+    """Queue a run of a job now; the body's JSON object is passed to it as keyword arguments"""
+    if name not in scheduler.jobs:
+        return jsonify({'error': f"Unknown job: {name}"}), 404
+
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Body must be a JSON object'}), 400
+
+    try:
+        run_id = scheduler.enqueue(name, **payload)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({'run_id': run_id, 'status': 'queued'}), 202
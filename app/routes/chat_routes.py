@@ -1,7 +1,13 @@
 from flask import Blueprint, request, jsonify, session, render_template
-from app.services.gemini_service import gemini_service
-from app.services.vector_service import vector_service
+from app.services.tenants import get_services, scoped_user_id
+from app.services.extractive_answerer import extractive_answerer
+from app.services.knowledge_index import split_tags
+from app.services.metrics import ERRORS, CHAT_ANSWERS, chat_turn, chat_stage
+from app.rate_limit import request_guard
+from app.page_cache import accepts_encoding
 import uuid
+import gzip
+import hashlib
 import logging
 from datetime import datetime
 
@@ -12,10 +18,10 @@ logger = logging.getLogger(__name__)
 chat_bp = Blueprint('chat', __name__)
 
 def get_or_create_user_id():
-    """Get or create a unique user ID for the session"""
+    """Get or create a unique user ID for the session, scoped to the request's tenant"""
     if 'user_id' not in session:
         session['user_id'] = str(uuid.uuid4())
-    return session['user_id']
+    return scoped_user_id(session['user_id'])
 
 def get_conversation_history():
     """Get conversation history from session"""
@@ -38,18 +44,66 @@ def add_to_conversation_history(role, content):
 
     session['conversation_history'] = conversation_history
 
+def format_knowledge_item(item):
+    """Format a knowledge item for the frontend"""
+    formatted = {
+        'title': item['metadata'].get('title', 'Untitled'),
+        'content': item['content'],
+        'category': item['metadata'].get('category', 'general'),
+        'tags': split_tags(item['metadata'].get('tags'))
+    }
+    if 'similarity' in item:
+        formatted['similarity'] = round(item['similarity'], 3)
+    return formatted
+
+def format_conversation(conversation):
+    """Format a stored conversation for the frontend"""
+    user_message = conversation['user_message']
+    return {
+        'id': conversation['id'],
+        'user_message': user_message,
+        'bot_response': conversation['bot_response'],
+        'timestamp': conversation['timestamp'],
+        'type': conversation['type'],
+        'preview': user_message[:50] + '...' if len(user_message) > 50 else user_message
+    }
+
+def history_key(vector_service, user_id):
+    """Short key that changes with the user, and whenever their history is cleared"""
+    cleared_at = vector_service.history_index.cleared_at(user_id) or ''
+    return hashlib.sha256(f"{user_id}:{cleared_at}".encode('utf-8')).hexdigest()[:16]
+
+def compressed_json(data):
+    """JSON response, gzip-compressed when the client accepts it and the body is worth compressing"""
+    response = jsonify(data)
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) >= 512 and accepts_encoding('gzip'):
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
 @chat_bp.route('/chat')
 def chat_page():
     """Render the chat page"""
     return render_template('chat.html')
 
 @chat_bp.route('/api/chat', methods=['POST'])
+@request_guard.coalesce(key=get_or_create_user_id)
+@request_guard.limit(key=get_or_create_user_id)
 def chat_api():
     """
     Main chat API endpoint
     Handles user messages and returns AI responses
     """
     try:
+        # Services of the school (tenant) this request was resolved to
+        services = get_services()
+        vector_service = services.vector_service
+        gemini_service = services.gemini_service
+        user_profile_service = services.user_profile_service
+        answer_cache = services.answer_cache
+
         data = request.get_json()
         if not data or 'message' not in data:
             return jsonify({'error': 'Message is required'}), 400
@@ -58,49 +112,91 @@ def chat_api():
         if not user_message:
             return jsonify({'error': 'Message cannot be empty'}), 400
 
-        # Get user ID and conversation history
-        user_id = get_or_create_user_id()
-        conversation_history = get_conversation_history()
-
-        # Add user message to conversation history
-        add_to_conversation_history('user', user_message)
-
-        # Get relevant past conversations for context
-        relevant_conversations = vector_service.get_relevant_conversations(
-            user_id=user_id,
-            query=user_message,
-            limit=3
-        )
-
-        # Generate AI response using GEMINI
-        if gemini_service.is_configured():
-            ai_response = gemini_service.generate_response(
-                user_message=user_message,
-                conversation_context=conversation_history
+        with chat_turn():
+            # Get user ID and conversation history
+            with chat_stage('session_load'):
+                user_id = get_or_create_user_id()
+                conversation_history = get_conversation_history()
+                previous_turns = list(conversation_history)
+
+            # Add user message to conversation history
+            add_to_conversation_history('user', user_message)
+
+            # Precomputed profile of the student's past conversations
+            with chat_stage('profile_load'):
+                user_profile = user_profile_service.prompt_block(user_id)
+
+            # Questions the knowledge base answers closely are served locally
+            ai_response = None
+            source = 'knowledge_base'
+            local_answer = extractive_answerer.answer(
+                user_message, min_similarity=extractive_answerer.fast_path_threshold
             )
-        else:
-            ai_response = "I'm sorry, but I'm not properly configured right now. Please make sure the GEMINI API key is set up correctly."
-
-        # Add AI response to conversation history
-        add_to_conversation_history('assistant', ai_response)
-
-        # Store conversation in vector database for future context
-        vector_service.store_conversation(
-            user_id=user_id,
-            user_message=user_message,
-            bot_response=ai_response,
-            conversation_context={'session_id': session.get('_id', 'unknown')}
-        )
+            if local_answer:
+                ai_response = local_answer['response']
+
+            # During peak hours, common questions get answers generated ahead of time
+            else:
+                cached_answer = answer_cache.lookup(user_message, previous_turns)
+                if cached_answer:
+                    ai_response = cached_answer['response']
+                    source = 'answer_cache'
+
+            # Otherwise generate AI response using GEMINI
+            if ai_response is None and gemini_service.is_configured():
+                try:
+                    ai_response = gemini_service.generate_response(
+                        user_message=user_message,
+                        conversation_context=conversation_history,
+                        user_profile=user_profile,
+                        raise_errors=True
+                    )
+                    source = 'gemini'
+                except Exception as e:
+                    logger.error(f"Gemini unavailable, falling back to the knowledge base: {str(e)}")
+
+            # Without Gemini, answer from the knowledge base as best we can
+            if ai_response is None:
+                local_answer = extractive_answerer.answer(user_message)
+                if local_answer:
+                    ai_response = local_answer['response']
+                elif gemini_service.is_configured():
+                    source = 'unavailable'
+                    ai_response = "I'm experiencing some technical difficulties. Please try again in a moment."
+                else:
+                    source = 'unavailable'
+                    ai_response = "I'm sorry, but I'm not properly configured right now. Please make sure the GEMINI API key is set up correctly."
+
+            CHAT_ANSWERS.labels(source=source).inc()
+
+            # Add AI response to conversation history
+            add_to_conversation_history('assistant', ai_response)
+
+            # Store conversation in vector database for future context
+            with chat_stage('store'):
+                vector_service.store_conversation(
+                    user_id=user_id,
+                    user_message=user_message,
+                    bot_response=ai_response,
+                    conversation_context={
+                        'session_id': session.get('_id', 'unknown'),
+                        'answer_source': source,
+                        'follow_up': bool(previous_turns)
+                    }
+                )
+            user_profile_service.mark_dirty(user_id)
 
         # Return response
         return jsonify({
             'response': ai_response,
             'timestamp': datetime.now().isoformat(),
+            'source': source,
             'conversation_id': len(conversation_history) // 2  # Rough conversation turn count
         })
 
     except Exception as e:
         logger.error(f"Error in chat API: {str(e)}")
+        ERRORS.labels(component='chat_api').inc()
         return jsonify({
             'error': 'An error occurred while processing your message. Please try again.',
             'timestamp': datetime.now().isoformat()
@@ -108,40 +204,98 @@ def chat_api():
 
 @chat_bp.route('/api/chat/history', methods=['GET'])
 def get_chat_history():
-    """Get conversation history for the current session"""
+    """
+    Get the current user's stored conversations, newest first
+    Query: ?limit=20 and ?cursor= (the next_cursor of the previous page)
+    """
     try:
-        conversation_history = get_conversation_history()
-
-        # Format history for frontend
-        formatted_history = []
-        for i in range(0, len(conversation_history), 2):
-            if i + 1 < len(conversation_history):
-                user_msg = conversation_history[i]
-                bot_msg = conversation_history[i + 1]
-
-                formatted_history.append({
-                    'id': i // 2,
-                    'user_message': user_msg['content'],
-                    'bot_response': bot_msg['content'],
-                    'timestamp': user_msg['timestamp'],
-                    'preview': user_msg['content'][:50] + '...' if len(user_msg['content']) > 50 else user_msg['content']
-                })
+        services = get_services()
+        vector_service = services.vector_service
+
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)  # Max 100 per page
+
+        page = vector_service.get_conversation_history(
+            user_id=get_or_create_user_id(),
+            cursor=request.args.get('cursor'),
+            limit=limit
+        )
 
         return jsonify({
-            'history': formatted_history[-10:],  # Last 10 conversations
-            'total_conversations': len(formatted_history)
+            'history': [format_conversation(conversation) for conversation in page['conversations']],
+            'next_cursor': page['next_cursor'],
+            'total_conversations': page['total']
         })
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     except Exception as e:
         logger.error(f"Error getting chat history: {str(e)}")
         return jsonify({'error': 'Failed to retrieve chat history'}), 500
 
+@chat_bp.route('/api/chat/sync', methods=['GET'])
+def sync_chat():
+    """
+    Chat status plus the conversations stored since the client's last sync
+    Query: ?since= (the version returned by the previous sync; omit on first sync) and ?limit=100
+    """
+    try:
+        services = get_services()
+        vector_service = services.vector_service
+        gemini_service = services.gemini_service
+
+        session_active = 'user_id' in session
+        user_id = get_or_create_user_id()
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 500)  # Max 500 per sync
+
+        delta = vector_service.sync_conversations(
+            user_id=user_id,
+            since=request.args.get('since'),
+            limit=limit
+        )
+
+        data = {
+            'status': {
+                'gemini_configured': gemini_service.is_configured(),
+                'vector_db_available': vector_service.is_available(),
+                'session_active': session_active,
+                'conversation_count': delta['total']
+            },
+            # Lets the client tell when its local store belongs to another
+            # session, or holds history that has since been cleared
+            'user_key': history_key(vector_service, user_id),
+            'conversations': [format_conversation(conversation) for conversation in delta['conversations']],
+            'version': delta['version'],
+            'has_more': delta['has_more'],
+            'total_conversations': delta['total']
+        }
+        if 'history_cursor' in delta:
+            data['history_cursor'] = delta['history_cursor']
+
+        response = compressed_json(data)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        logger.error(f"Error syncing chat: {str(e)}")
+        return jsonify({'error': 'Failed to sync chat'}), 500
+
 @chat_bp.route('/api/chat/quick-response', methods=['POST'])
+@request_guard.coalesce(key=get_or_create_user_id)
+@request_guard.limit(key=get_or_create_user_id)
 def quick_response():
     """
     Handle quick response buttons/suggestions
     """
     try:
+        services = get_services()
+        vector_service = services.vector_service
+        gemini_service = services.gemini_service
+        user_profile_service = services.user_profile_service
+
         data = request.get_json()
         if not data or 'type' not in data:
             return jsonify({'error': 'Response type is required'}), 400
@@ -176,6 +330,7 @@ def quick_response():
             bot_response=response,
             conversation_context={'type': 'quick_response', 'response_type': response_type}
         )
+        user_profile_service.mark_dirty(user_id)
 
         return jsonify({
             'response': response,
@@ -185,6 +340,7 @@ def quick_response():
 
     except Exception as e:
         logger.error(f"Error in quick response: {str(e)}")
+        ERRORS.labels(component='quick_response').inc()
         return jsonify({'error': 'Failed to generate quick response'}), 500
 
 @chat_bp.route('/api/chat/search-knowledge', methods=['POST'])
@@ -193,31 +349,30 @@ def search_knowledge():
     Search stored knowledge base for relevant information
     """
     try:
+        services = get_services()
+        vector_service = services.vector_service
+
         data = request.get_json()
         if not data or 'query' not in data:
             return jsonify({'error': 'Search query is required'}), 400
 
         query = data['query'].strip()
         category = data.get('category')
+        tags = data.get('tags') or []
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            return jsonify({'error': 'tags must be a list of strings'}), 400
         limit = min(data.get('limit', 5), 10)  # Max 10 results
 
         # Search knowledge base
         knowledge_items = vector_service.search_study_knowledge(
             query=query,
             category=category,
-            limit=limit
+            limit=limit,
+            tags=tags
         )
 
         # Format results
-        formatted_results = []
-        for item in knowledge_items:
-            formatted_results.append({
-                'title': item['metadata'].get('title', 'Untitled'),
-                'content': item['content'],
-                'category': item['metadata'].get('category', 'general'),
-                'similarity': round(item['similarity'], 3),
-                'tags': item['metadata'].get('tags', '').split(',') if item['metadata'].get('tags') else []
-            })
+        formatted_results = [format_knowledge_item(item) for item in knowledge_items]
 
         return jsonify({
             'results': formatted_results,
@@ -229,12 +384,66 @@ def search_knowledge():
         logger.error(f"Error searching knowledge: {str(e)}")
         return jsonify({'error': 'Failed to search knowledge base'}), 500
 
+@chat_bp.route('/api/chat/knowledge/facets', methods=['GET'])
+def knowledge_facets():
+    """Get knowledge item counts per category and per tag"""
+    try:
+        services = get_services()
+        vector_service = services.vector_service
+
+        return jsonify(vector_service.get_knowledge_facets())
+
+    except Exception as e:
+        logger.error(f"Error getting knowledge facets: {str(e)}")
+        return jsonify({'error': 'Failed to get knowledge facets'}), 500
+
+@chat_bp.route('/api/chat/knowledge/browse', methods=['GET'])
+def browse_knowledge():
+    """
+    List knowledge items by category and/or tag
+    Tags are passed as repeated ?tag= parameters and must all match
+    """
+    try:
+        services = get_services()
+        vector_service = services.vector_service
+
+        category = request.args.get('category')
+        tags = request.args.getlist('tag')
+        limit = min(request.args.get('limit', 20, type=int), 50)  # Max 50 items
+        offset = max(request.args.get('offset', 0, type=int), 0)
+
+        page = vector_service.browse_study_knowledge(
+            category=category,
+            tags=tags,
+            limit=limit,
+            offset=offset
+        )
+
+        return jsonify({
+            'items': [format_knowledge_item(item) for item in page['items']],
+            'total': page['total'],
+            'limit': limit,
+            'offset': offset
+        })
+
+    except Exception as e:
+        logger.error(f"Error browsing knowledge: {str(e)}")
+        return jsonify({'error': 'Failed to browse knowledge base'}), 500
+
 @chat_bp.route('/api/chat/clear-history', methods=['POST'])
 def clear_chat_history():
-    """Clear conversation history for the current session"""
+    """Delete the current user's stored conversations and profile, and the session history"""
     try:
+        services = get_services()
         session['conversation_history'] = []
-        return jsonify({'message': 'Chat history cleared successfully'})
+
+        cleared = 0
+        if 'user_id' in session:
+            user_id = scoped_user_id(session['user_id'])
+            cleared = services.vector_service.clear_conversations(user_id)
+            services.user_profile_service.reset(user_id)
+
+        return jsonify({'message': 'Chat history cleared successfully', 'conversations_deleted': cleared})
 
     except Exception as e:
         logger.error(f"Error clearing chat history: {str(e)}")
@@ -244,11 +453,16 @@ def clear_chat_history():
 def chat_status():
     """Get the status of chat services"""
     try:
+        services = get_services()
+        vector_service = services.vector_service
+        gemini_service = services.gemini_service
+
+        session_active = 'user_id' in session
         status = {
             'gemini_configured': gemini_service.is_configured(),
-            'vector_db_available': hasattr(vector_service, 'client'),
-            'session_active': 'user_id' in session,
-            'conversation_count': len(get_conversation_history()) // 2
+            'vector_db_available': vector_service.is_available(),
+            'session_active': session_active,
+            'conversation_count': vector_service.history_index.count(scoped_user_id(session['user_id'])) if session_active else 0
         }
 
         return jsonify(status)
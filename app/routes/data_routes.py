@@ -0,0 +1,40 @@
+from datetime import date
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from app.services.data_transfer_service import data_transfer_service
+from app.routes.chat_routes import get_or_create_user_id
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+data_bp = Blueprint('data', __name__)
+
+@data_bp.route('/api/data/export', methods=['GET'])
+def export_data():
+    """Stream everything stored for the current user as NDJSON"""
+    user_id = get_or_create_user_id()
+    filename = f"study-buddy-export-{date.today().isoformat()}.ndjson"
+
+    return Response(
+        stream_with_context(data_transfer_service.export_user_data(user_id)),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@data_bp.route('/api/data/import', methods=['POST'])
+def import_data():
+    """
+    Import an NDJSON export for the current user
+    Body: the export file, one JSON record per line (read as a stream)
+    """
+    try:
+        result = data_transfer_service.import_user_data(get_or_create_user_id(), request.stream)
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        logger.error(f"Error importing user data: {str(e)}")
+        return jsonify({'error': 'Failed to import data'}), 500
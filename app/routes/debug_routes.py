@@ -0,0 +1,30 @@
+from flask import Blueprint, jsonify, send_file, current_app, abort
+
+debug_bp = Blueprint('debug', __name__)
+
+def get_profiler():
+    """Return the active request profiler, or 404 when profiling is off or access is not allowed"""
+    profiler = current_app.extensions.get('request_profiler')
+    if profiler is None:
+        abort(404)
+    if not (current_app.debug or profiler.is_authorized()):
+        abort(404)
+    return profiler
+
+@debug_bp.route('/debug/profiles')
+def list_profiles():
+    """List stored request profiles per endpoint"""
+    profiler = get_profiler()
+    return jsonify({
+        'directory': profiler.directory,
+        'sample_rate': profiler.sample_rate,
+        'profiles': profiler.list_profiles()
+    })
+
+@debug_bp.route('/debug/profiles/<endpoint>/<filename>')
+def get_profile(endpoint, filename):
+    """Download one profile as folded stacks (feed it to flamegraph.pl or speedscope)"""
+    path = get_profiler().profile_path(endpoint, filename)
+    if path is None:
+        abort(404)
+    return send_file(path, mimetype='text/plain')
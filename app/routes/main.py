@@ -1,31 +1,39 @@
 from flask import Blueprint, render_template
+from app.page_cache import page_cache
 
 main = Blueprint("main", __name__)
 
 @main.route("/")
+@page_cache.cached
 def index():
     return render_template("index.html")
 
 @main.route("/about")
+@page_cache.cached
 def about():
     return render_template("about.html")
 
 @main.route("/deadlines")
+@page_cache.cached
 def deadlines():
     return render_template("deadlines.html")
 
 @main.route("/pomodoro")
+@page_cache.cached
 def pomodoro():
     return render_template("pomodoro.html")
 
 @main.route("/quotes")
+@page_cache.cached
 def quotes():
     return render_template("quotes.html")
 
 @main.route("/todo")
+@page_cache.cached
 def todo():
     return render_template("todo.html")
 
 @main.route("/calendar")
+@page_cache.cached
 def calendar():
     return render_template("calendar.html")
\ No newline at end of file
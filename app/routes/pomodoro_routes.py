@@ -0,0 +1,59 @@
+from flask import Blueprint, request, jsonify
+from app.services.study_stats_service import study_stats_service, SESSION_KINDS
+from app.routes.chat_routes import get_or_create_user_id
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+pomodoro_bp = Blueprint('pomodoro', __name__)
+
+MAX_SESSION_SECONDS = 4 * 60 * 60
+
+@pomodoro_bp.route('/api/pomodoro/sessions', methods=['POST'])
+def record_session():
+    """
+    Record a completed Pomodoro interval
+    Body: {"kind": "focus" | "break", "duration_seconds": 1500}
+    """
+    try:
+        data = request.get_json()
+        if not data or data.get('kind') not in SESSION_KINDS:
+            return jsonify({'error': 'kind must be "focus" or "break"'}), 400
+
+        duration = data.get('duration_seconds')
+        # JSON true/false arrive as bool, which is an int subclass
+        if not isinstance(duration, int) or isinstance(duration, bool) or not 0 < duration <= MAX_SESSION_SECONDS:
+            return jsonify({'error': 'duration_seconds must be between 1 and 14400'}), 400
+
+        session = study_stats_service.record_session(
+            user_id=get_or_create_user_id(),
+            kind=data['kind'],
+            duration_seconds=duration
+        )
+        return jsonify(session), 201
+
+    except Exception as e:
+        logger.error(f"Error recording pomodoro session: {str(e)}")
+        return jsonify({'error': 'Failed to record session'}), 500
+
+@pomodoro_bp.route('/api/pomodoro/sessions', methods=['GET'])
+def list_sessions():
+    """Today's sessions for the current student"""
+    try:
+        return jsonify({'sessions': study_stats_service.get_sessions(get_or_create_user_id())})
+
+    except Exception as e:
+        logger.error(f"Error listing pomodoro sessions: {str(e)}")
+        return jsonify({'error': 'Failed to list sessions'}), 500
+
+@pomodoro_bp.route('/api/pomodoro/stats', methods=['GET'])
+def get_stats():
+    """Precomputed study totals for today and this week"""
+    try:
+        return jsonify(study_stats_service.get_stats(get_or_create_user_id()))
+
+    except Exception as e:
+        logger.error(f"Error getting study stats: {str(e)}")
+        return jsonify({'error': 'Failed to get study stats'}), 500
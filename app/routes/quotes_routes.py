@@ -0,0 +1,99 @@
+from flask import Blueprint, request, jsonify
+from app.services.quote_service import quote_service
+from app.routes.chat_routes import get_or_create_user_id
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+quotes_bp = Blueprint('quotes', __name__)
+
+@quotes_bp.route('/api/quotes', methods=['GET'])
+def list_quotes():
+    """Paginated quote catalog, optionally filtered by ?category="""
+    try:
+        category = request.args.get('category')
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)  # Max 100 per page
+
+        return jsonify(quote_service.list_quotes(category=category, page=page, per_page=per_page))
+
+    except Exception as e:
+        logger.error(f"Error listing quotes: {str(e)}")
+        return jsonify({'error': 'Failed to list quotes'}), 500
+
+@quotes_bp.route('/api/quotes/categories', methods=['GET'])
+def quote_categories():
+    """Quote counts per category"""
+    try:
+        return jsonify({'categories': quote_service.category_counts()})
+
+    except Exception as e:
+        logger.error(f"Error getting quote categories: {str(e)}")
+        return jsonify({'error': 'Failed to get quote categories'}), 500
+
+@quotes_bp.route('/api/quotes/random', methods=['GET'])
+def random_quote():
+    """A random quote, optionally from ?category="""
+    try:
+        quote = quote_service.random_quote(request.args.get('category'))
+        if quote is None:
+            return jsonify({'error': 'No quotes found'}), 404
+        return jsonify(quote)
+
+    except Exception as e:
+        logger.error(f"Error getting random quote: {str(e)}")
+        return jsonify({'error': 'Failed to get a quote'}), 500
+
+@quotes_bp.route('/api/quotes/today', methods=['GET'])
+def quote_of_the_day():
+    """The quote of the day, the same for every student"""
+    try:
+        quote = quote_service.quote_of_the_day()
+        if quote is None:
+            return jsonify({'error': 'No quotes found'}), 404
+        return jsonify(quote)
+
+    except Exception as e:
+        logger.error(f"Error getting quote of the day: {str(e)}")
+        return jsonify({'error': 'Failed to get the quote of the day'}), 500
+
+@quotes_bp.route('/api/quotes/favorites', methods=['GET'])
+def get_favorites():
+    """The current student's saved quotes"""
+    try:
+        return jsonify({'favorites': quote_service.get_favorites(get_or_create_user_id())})
+
+    except Exception as e:
+        logger.error(f"Error getting favorite quotes: {str(e)}")
+        return jsonify({'error': 'Failed to get favorite quotes'}), 500
+
+@quotes_bp.route('/api/quotes/favorites', methods=['POST'])
+def add_favorite():
+    """Save a quote to the current student's favorites"""
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('quote_id'), int):
+            return jsonify({'error': 'quote_id is required'}), 400
+
+        added = quote_service.add_favorite(get_or_create_user_id(), data['quote_id'])
+        return jsonify({'added': added}), 201 if added else 200
+
+    except LookupError:
+        return jsonify({'error': 'Quote not found'}), 404
+    except Exception as e:
+        logger.error(f"Error saving favorite quote: {str(e)}")
+        return jsonify({'error': 'Failed to save favorite quote'}), 500
+
+@quotes_bp.route('/api/quotes/favorites/<int:quote_id>', methods=['DELETE'])
+def remove_favorite(quote_id):
+    """Remove a quote from the current student's favorites"""
+    try:
+        if not quote_service.remove_favorite(get_or_create_user_id(), quote_id):
+            return jsonify({'error': 'Quote is not in favorites'}), 404
+        return jsonify({'removed': True})
+
+    except Exception as e:
+        logger.error(f"Error removing favorite quote: {str(e)}")
+        return jsonify({'error': 'Failed to remove favorite quote'}), 500
@@ -0,0 +1,94 @@
+from flask import Blueprint, request, jsonify
+from app.services.record_service import record_service, RECORD_KINDS, MAX_KEY_LENGTH
+from app.routes.chat_routes import get_or_create_user_id
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+record_bp = Blueprint('records', __name__)
+
+def _check_kind(kind: str):
+    if kind not in RECORD_KINDS:
+        return jsonify({'error': f'kind must be one of: {", ".join(RECORD_KINDS)}'}), 404
+    return None
+
+@record_bp.route('/api/records/<kind>', methods=['GET'])
+def list_records(kind):
+    """The current student's to-dos or calendar events"""
+    error = _check_kind(kind)
+    if error:
+        return error
+
+    try:
+        return jsonify({'records': record_service.list_records(get_or_create_user_id(), kind)})
+
+    except Exception as e:
+        logger.error(f"Error listing {kind} records: {str(e)}")
+        return jsonify({'error': 'Failed to list records'}), 500
+
+@record_bp.route('/api/records/<kind>/<record_id>', methods=['PUT'])
+def save_record(kind, record_id):
+    """
+    Create or replace one record
+    Body: the record as the page keeps it, e.g. {"id": 1718000000000, "text": "Revise", ...}
+    """
+    error = _check_kind(kind)
+    if error:
+        return error
+    if len(record_id) > MAX_KEY_LENGTH:
+        return jsonify({'error': f'record id must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+    try:
+        data = request.get_json(silent=True)
+        message = record_service.validate(data)
+        if message:
+            return jsonify({'error': message}), 400
+
+        record = record_service.save_record(get_or_create_user_id(), kind, record_id, data)
+        return jsonify(record)
+
+    except Exception as e:
+        logger.error(f"Error saving {kind} record: {str(e)}")
+        return jsonify({'error': 'Failed to save record'}), 500
+
+@record_bp.route('/api/records/<kind>/<record_id>', methods=['DELETE'])
+def delete_record(kind, record_id):
+    """Delete one record"""
+    error = _check_kind(kind)
+    if error:
+        return error
+
+    try:
+        deleted = record_service.delete_records(get_or_create_user_id(), kind, [record_id])
+        if not deleted:
+            return jsonify({'error': 'Record not found'}), 404
+        return jsonify({'status': 'deleted'})
+
+    except Exception as e:
+        logger.error(f"Error deleting {kind} record: {str(e)}")
+        return jsonify({'error': 'Failed to delete record'}), 500
+
+@record_bp.route('/api/records/<kind>/delete', methods=['POST'])
+def delete_records(kind):
+    """
+    Delete several records at once
+    Body: {"ids": [1718000000000, ...]}
+    """
+    error = _check_kind(kind)
+    if error:
+        return error
+
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        if not isinstance(ids, list) or not all(isinstance(i, (str, int)) for i in ids):
+            return jsonify({'error': 'ids must be a list of record ids'}), 400
+
+        deleted = record_service.delete_records(get_or_create_user_id(), kind, [str(i) for i in ids])
+        return jsonify({'deleted': deleted})
+
+    except Exception as e:
+        logger.error(f"Error deleting {kind} records: {str(e)}")
+        return jsonify({'error': 'Failed to delete records'}), 500
@@ -0,0 +1,420 @@
+import os
+import json
+import time
+import socket
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+import logging
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import ScheduledJob, JobRun
+from app.services.metrics import ERRORS, JOB_RUNS, JOB_SECONDS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCOPES = ('global', 'host')
+
+class Job:
+    """A registered job: what to call and how often"""
+
+    def __init__(self, name: str, func: Callable, interval: Optional[float], scope: str, timeout: Optional[float]):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.scope = scope
+        self.timeout = timeout
+
+class JobScheduler:
+    """
+    Runs periodic and queued background jobs inside the app's worker processes.
+
+    Every worker polls the scheduled_jobs table and runs due jobs on a small
+    thread pool. Before running a job a worker takes its lease with a single
+    conditional UPDATE, so exactly one worker runs each job at a time: one in
+    the whole deployment for "global" jobs (they share the database), one per
+    host for "host" jobs, which work on host-local files such as the vector
+    store. The poll loop renews the leases of the jobs running in its
+    process, so a lease only expires, and the job is only picked up again,
+    when its worker stopped renewing it for the job's timeout. Every run is
+    recorded in job_runs, and enqueue() adds runs there for workers to pick up.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.jobs: Dict[str, Job] = {}
+        self.app = None
+        self.host = socket.gethostname()
+        self.owner: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._stop = threading.Event()
+        self._running = 0
+        self._active: Dict[str, int] = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.enabled = app.config.get('SCHEDULER_ENABLED', True)
+        self.workers = int(app.config.get('SCHEDULER_WORKERS', 2))
+        self.poll_interval = float(app.config.get('SCHEDULER_POLL_INTERVAL', 5))
+        self.default_timeout = float(app.config.get('SCHEDULER_JOB_TIMEOUT', 1800))
+        self.retention = timedelta(days=float(app.config.get('SCHEDULER_RUN_RETENTION_DAYS', 7)))
+
+        self.register('scheduler.prune_runs', self.prune_runs, interval=86400)
+
+        # Started by the first request, so it runs in each worker after a fork
+        app.before_request(self._ensure_started)
+        app.extensions['scheduler'] = self
+
+    def register(self, name: str, func: Callable, interval: Optional[float] = None,
+                 scope: str = 'global', timeout: Optional[float] = None) -> Job:
+        """
+        Register a job
+
+        Args:
+            name: Unique job name
+            func: Called inside an app context, with the queued keyword arguments if any
+            interval: Seconds between runs, or None for a job that only runs when queued
+            scope: "global" to run on one worker in the deployment, "host" for one per host
+            timeout: Seconds without a lease renewal before another worker may
+                take the job over (defaults to SCHEDULER_JOB_TIMEOUT)
+        """
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown job scope: {scope}")
+        job = Job(name, func, int(interval) if interval else None, scope, timeout)
+        self.jobs[name] = job
+        return job
+
+    def job(self, name: str, **options):
+        """Decorator form of register()"""
+        def decorator(func):
+            self.register(name, func, **options)
+            return func
+        return decorator
+
+    def job_key(self, job: Job) -> str:
+        return f"{job.name}@{self.host}" if job.scope == 'host' else job.name
+
+    def enqueue(self, name: str, **payload) -> int:
+        """
+        Queue a run of a job; for host jobs it runs on this host
+
+        Returns:
+            Id of the queued run
+
+        Raises:
+            KeyError: if no job has that name
+            ValueError: if the job does not take these keyword arguments
+        """
+        job = self.jobs[name]
+        self.check_payload(job, payload)
+        run = JobRun(
+            job_key=self.job_key(job),
+            name=name,
+            payload=json.dumps(payload),
+            status='queued',
+            queued_at=datetime.utcnow()
+        )
+        db.session.add(run)
+        db.session.commit()
+        return run.id
+
+    def check_payload(self, job: Job, payload: Dict) -> None:
+        """
+        Check queued keyword arguments against the job function's signature
+
+        Raises:
+            ValueError: for an argument the job does not take, or a value that
+                does not match a bool, int, float or str annotation
+        """
+        signature = inspect.signature(job.func)
+        try:
+            bound = signature.bind(**payload)
+        except TypeError as e:
+            raise ValueError(f"Invalid arguments for {job.name}: {e}")
+
+        for name, value in bound.arguments.items():
+            annotation = signature.parameters[name].annotation
+            if annotation not in (bool, int, float, str):
+                continue
+            # JSON numbers: a bool is not an int, an int is a valid float
+            valid = (isinstance(value, (int, float)) and not isinstance(value, bool) if annotation is float
+                     else type(value) is annotation)
+            if not valid:
+                raise ValueError(f"Invalid arguments for {job.name}: {name} must be {annotation.__name__}")
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+
+            # A new process after a fork gets its own identity and pool
+            self.owner = f"{self.host}:{os.getpid()}"
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scheduler-worker')
+            self._running = 0
+            self._active = {}
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._poll_loop, name="scheduler", daemon=True)
+            self._thread.start()
+            logger.info(f"Scheduler started on {self.owner} with {len(self.jobs)} jobs")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _ensure_started(self) -> None:
+        if self.enabled and not (self._thread and self._thread.is_alive()):
+            self.start()
+
+    def _poll_loop(self) -> None:
+        with self.app.app_context():
+            try:
+                self.sync_jobs()
+            except Exception as e:
+                logger.error(f"Failed to register jobs: {e}")
+                ERRORS.labels(component='scheduler').inc()
+                db.session.rollback()
+
+            while not self._stop.is_set():
+                try:
+                    self.poll()
+                except Exception as e:
+                    logger.error(f"Scheduler poll failed: {e}")
+                    ERRORS.labels(component='scheduler').inc()
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+                self._stop.wait(self.poll_interval)
+
+    def sync_jobs(self) -> None:
+        """Create the table rows of newly registered jobs and apply changed intervals"""
+        now = datetime.utcnow()
+        for job in self.jobs.values():
+            key = self.job_key(job)
+            row = db.session.get(ScheduledJob, key)
+            if row is None:
+                db.session.add(ScheduledJob(
+                    key=key,
+                    name=job.name,
+                    host=self.host if job.scope == 'host' else None,
+                    interval_seconds=job.interval,
+                    next_run_at=now if job.interval else None,
+                    run_count=0,
+                    failure_count=0
+                ))
+            elif row.interval_seconds != job.interval:
+                row.interval_seconds = job.interval
+                row.next_run_at = now if job.interval else None
+
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Another worker registered it first
+                db.session.rollback()
+
+    def poll(self) -> int:
+        """Start due and queued jobs on free pool threads; returns how many were started"""
+        started = 0
+        keys = {self.job_key(job): job for job in self.jobs.values()}
+        self.renew_leases()
+
+        for key, job in keys.items():
+            if self._free_workers() == 0:
+                return started
+            if job.interval and self._take_lease(job, key, due_only=True):
+                run = self._record_run(job, key)
+                self._submit(job, key, run.id, {}, periodic=True)
+                started += 1
+
+        free = self._free_workers()
+        if free == 0:
+            return started
+
+        queued = JobRun.query.filter(
+            JobRun.status == 'queued', JobRun.job_key.in_(list(keys))
+        ).order_by(JobRun.id).limit(free).all()
+        for run in queued:
+            job = keys[run.job_key]
+            if not self._take_lease(job, run.job_key, due_only=False):
+                continue
+            claimed = JobRun.query.filter_by(id=run.id, status='queued').update({
+                JobRun.status: 'running',
+                JobRun.owner: self.owner,
+                JobRun.started_at: datetime.utcnow()
+            }, synchronize_session=False)
+            db.session.commit()
+            if not claimed:
+                self._release_lease(run.job_key)
+                continue
+            self._submit(job, run.job_key, run.id, json.loads(run.payload or '{}'), periodic=False)
+            started += 1
+
+        return started
+
+    def renew_leases(self) -> int:
+        """Extend the leases of the jobs running in this process; returns how many were renewed"""
+        with self._lock:
+            active = set(self._active)
+        jobs = {self.job_key(job): job for job in self.jobs.values()}
+
+        now = datetime.utcnow()
+        renewed = 0
+        for key in active:
+            job = jobs[key]
+            renewed += ScheduledJob.query.filter_by(key=key, lease_owner=self.owner).update({
+                ScheduledJob.lease_until: now + timedelta(seconds=job.timeout or self.default_timeout)
+            }, synchronize_session=False)
+        db.session.commit()
+        return renewed
+
+    def _free_workers(self) -> int:
+        with self._lock:
+            return self.workers - self._running
+
+    def _take_lease(self, job: Job, key: str, due_only: bool) -> bool:
+        """Atomically become the job's runner if nobody holds an unexpired lease"""
+        now = datetime.utcnow()
+        conditions = [
+            ScheduledJob.key == key,
+            or_(ScheduledJob.lease_until.is_(None), ScheduledJob.lease_until < now)
+        ]
+        if due_only:
+            conditions.append(ScheduledJob.next_run_at <= now)
+
+        taken = ScheduledJob.query.filter(*conditions).update({
+            ScheduledJob.lease_owner: self.owner,
+            ScheduledJob.lease_until: now + timedelta(seconds=job.timeout or self.default_timeout),
+            ScheduledJob.last_started_at: now
+        }, synchronize_session=False)
+
+        if taken:
+            # Runs still marked running lost their worker: it stopped renewing the lease
+            JobRun.query.filter_by(job_key=key, status='running').update({
+                JobRun.status: 'failed',
+                JobRun.finished_at: now,
+                JobRun.error: 'Worker stopped before the run finished'
+            }, synchronize_session=False)
+        db.session.commit()
+        return bool(taken)
+
+    def _release_lease(self, key: str) -> None:
+        ScheduledJob.query.filter_by(key=key, lease_owner=self.owner).update({
+            ScheduledJob.lease_owner: None,
+            ScheduledJob.lease_until: None
+        }, synchronize_session=False)
+        db.session.commit()
+
+    def _record_run(self, job: Job, key: str) -> JobRun:
+        now = datetime.utcnow()
+        run = JobRun(job_key=key, name=job.name, status='running', owner=self.owner,
+                     queued_at=now, started_at=now)
+        db.session.add(run)
+        db.session.commit()
+        return run
+
+    def _submit(self, job: Job, key: str, run_id: int, payload: Dict, periodic: bool) -> None:
+        with self._lock:
+            self._running += 1
+            self._active[key] = self._active.get(key, 0) + 1
+        self._pool.submit(self._execute, job, key, run_id, payload, periodic)
+
+    def _execute(self, job: Job, key: str, run_id: int, payload: Dict, periodic: bool) -> None:
+        started = time.monotonic()
+        error = None
+        try:
+            with self.app.app_context():
+                try:
+                    job.func(**payload)
+                except Exception as e:
+                    logger.error(f"Job {job.name} failed: {e}")
+                    ERRORS.labels(component='scheduler').inc()
+                    db.session.rollback()
+                    error = str(e) or e.__class__.__name__
+
+                duration = time.monotonic() - started
+                status = 'failed' if error else 'succeeded'
+                JOB_RUNS.labels(job=job.name, outcome=status).inc()
+                JOB_SECONDS.labels(job=job.name).observe(duration)
+
+                try:
+                    self._finish(job, key, run_id, status, error, duration, periodic)
+                except Exception as e:
+                    logger.error(f"Failed to record the end of job {job.name}: {e}")
+                    ERRORS.labels(component='scheduler').inc()
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._active[key] -= 1
+                if not self._active[key]:
+                    del self._active[key]
+
+    def _finish(self, job: Job, key: str, run_id: int, status: str, error: Optional[str],
+                duration: float, periodic: bool) -> None:
+        now = datetime.utcnow()
+        JobRun.query.filter_by(id=run_id).update({
+            JobRun.status: status,
+            JobRun.finished_at: now,
+            JobRun.error: error
+        }, synchronize_session=False)
+
+        values = {
+            ScheduledJob.lease_owner: None,
+            ScheduledJob.lease_until: None,
+            ScheduledJob.last_finished_at: now,
+            ScheduledJob.last_status: status,
+            ScheduledJob.last_error: error,
+            ScheduledJob.last_duration_seconds: round(duration, 3),
+            ScheduledJob.run_count: ScheduledJob.run_count + 1,
+            ScheduledJob.failure_count: ScheduledJob.failure_count + (1 if error else 0)
+        }
+        if periodic:
+            values[ScheduledJob.next_run_at] = now + timedelta(seconds=job.interval)
+
+        ScheduledJob.query.filter_by(key=key, lease_owner=self.owner).update(values, synchronize_session=False)
+        db.session.commit()
+
+    def prune_runs(self) -> int:
+        """Delete finished runs older than SCHEDULER_RUN_RETENTION_DAYS; returns how many"""
+        removed = JobRun.query.filter(
+            JobRun.status.in_(('succeeded', 'failed')),
+            JobRun.finished_at < datetime.utcnow() - self.retention
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return removed
+
+    def status(self, recent: int = 50) -> Dict:
+        """Registered jobs with their schedule and lease, queued runs and the latest runs"""
+        rows = {row.key: row for row in ScheduledJob.query.all()}
+        jobs: List[Dict] = []
+        for job in self.jobs.values():
+            row = rows.pop(self.job_key(job), None)
+            entry = row.to_dict() if row else {'key': self.job_key(job), 'name': job.name}
+            entry.update({'scope': job.scope, 'registered': True})
+            jobs.append(entry)
+        # Jobs registered on other hosts, or by other versions of the app
+        jobs.extend(dict(row.to_dict(), registered=False) for row in rows.values())
+
+        return {
+            'enabled': self.enabled,
+            'worker': self.owner,
+            'running_here': self._running,
+            'jobs': jobs,
+            'queued': JobRun.query.filter_by(status='queued').count(),
+            'recent_runs': [run.to_dict() for run in JobRun.query.order_by(JobRun.id.desc()).limit(recent)]
+        }
+
+# Global instance
+scheduler = JobScheduler()
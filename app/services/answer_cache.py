@@ -0,0 +1,397 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from app.services.vector_service import (
+    VectorService,
+    vector_service as default_vector_service,
+    split_conversation_document
+)
+from app.services.gemini_service import GeminiService, gemini_service as default_gemini_service
+from app.services.metrics import CACHE_REQUESTS, ERRORS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+# How long one process may hold the refresh before another can take it over
+REFRESH_LEASE_SECONDS = 1800
+
+def parse_windows(value: str) -> List[Tuple[int, int]]:
+    """
+    Parse "16:00-23:00,06:30-08:00" into (start, end) minutes since midnight
+
+    A window whose end is before its start runs past midnight.
+    """
+    windows = []
+    for part in filter(None, (part.strip() for part in value.split(','))):
+        start, _, end = part.partition('-')
+        minutes = []
+        for clock in (start, end):
+            hours, _, mins = clock.strip().partition(':')
+            minutes.append(int(hours) * 60 + int(mins or 0))
+        windows.append((minutes[0], minutes[1]))
+    return windows
+
+def normalize_question(text: str) -> str:
+    return re.sub(r'\s+', ' ', text.lower()).strip(' ?!.')
+
+class AnswerCache:
+    """
+    Answers to the questions students ask most, generated before peak hours.
+
+    A refresh mines the recent user messages in the conversations collection,
+    groups them into clusters of near-identical questions by embedding
+    similarity, and has Gemini answer the most frequent clusters. Answers are
+    kept in a SQLite file shared by every worker. During the configured peak
+    windows, a chat message close enough to a cached question gets the cached
+    answer without waiting for Gemini.
+
+    Cached answers know nothing of the conversation around a question, so only
+    messages that open a conversation are mined or answered from the cache;
+    follow-ups always go to Gemini with their history.
+    """
+
+    def __init__(self, vector_service: Optional[VectorService] = None,
+                 gemini_service: Optional[GeminiService] = None):
+        """
+        Args:
+            vector_service: A tenant's vector store; its cache file is kept in
+                the store's directory (defaults to the global store and
+                ANSWER_CACHE_PATH)
+            gemini_service: Gemini service that generates the answers
+        """
+        self.vector_service = vector_service or default_vector_service
+        self.gemini_service = gemini_service or default_gemini_service
+        self.enabled = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+        self.path = os.path.join(self.vector_service.persist_directory, 'answer_cache.sqlite3')
+        if vector_service is None:
+            self.path = os.getenv('ANSWER_CACHE_PATH', self.path)
+
+        # When cached answers are served, and how far ahead of a peak they are generated
+        self.peak_windows = parse_windows(os.getenv('ANSWER_CACHE_PEAK_HOURS', '16:00-23:00'))
+        days = [day.strip().lower()[:3] for day in os.getenv('ANSWER_CACHE_PEAK_DAYS', '').split(',') if day.strip()]
+        self.peak_days = {WEEKDAYS.index(day) for day in days} if days else set(range(7))
+        self.prewarm = timedelta(minutes=float(os.getenv('ANSWER_CACHE_PREWARM_MINUTES', '60')))
+        self.refresh_interval = float(os.getenv('ANSWER_CACHE_REFRESH_INTERVAL', '21600'))
+
+        # Mining and matching
+        self.max_clusters = int(os.getenv('ANSWER_CACHE_CLUSTERS', '50'))
+        self.min_cluster_size = int(os.getenv('ANSWER_CACHE_MIN_CLUSTER_SIZE', '3'))
+        self.min_cluster_users = int(os.getenv('ANSWER_CACHE_MIN_USERS', '2'))
+        self.cluster_similarity = float(os.getenv('ANSWER_CACHE_CLUSTER_SIMILARITY', '0.85'))
+        self.match_similarity = float(os.getenv('ANSWER_CACHE_MATCH_SIMILARITY', '0.85'))
+        self.sample_size = int(os.getenv('ANSWER_CACHE_SAMPLE_SIZE', '5000'))
+        self.mining_days = int(os.getenv('ANSWER_CACHE_MINING_DAYS', '30'))
+
+        self._lock = threading.Lock()
+        self._entries: List[Dict] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cached_answers ("
+            "question TEXT PRIMARY KEY, answer TEXT NOT NULL, embedding BLOB NOT NULL, "
+            "embedding_model TEXT NOT NULL, cluster_size INTEGER NOT NULL, generated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        return conn
+
+    def in_peak(self, at: Optional[datetime] = None) -> bool:
+        """True if at (default: now) falls inside a peak window"""
+        at = at or datetime.now()
+        if at.weekday() not in self.peak_days:
+            return False
+
+        minute = at.hour * 60 + at.minute
+        for start, end in self.peak_windows:
+            if start <= end and start <= minute < end:
+                return True
+            if start > end and (minute >= start or minute < end):
+                return True
+        return False
+
+    def lookup(self, query: str, conversation_history: Optional[List[Dict]] = None) -> Optional[Dict]:
+        """
+        Return a pre-generated answer for a chat message during peak hours
+
+        Args:
+            query: The student's message
+            conversation_history: The session's turns before this message
+
+        Returns:
+            Dictionary with 'response', 'question' and 'similarity', or None
+            outside peak windows, for follow-up messages, or when no cached
+            question is close enough
+        """
+        if not self.enabled or not self.vector_service.encoder:
+            return None
+
+        # A follow-up ("and the second one?") means something only in its conversation
+        if conversation_history:
+            return None
+
+        if not self.in_peak():
+            return None
+
+        try:
+            entries, matrix = self._current()
+            if not entries:
+                CACHE_REQUESTS.labels(cache='answer', result='miss').inc()
+                return None
+
+            query_embedding = np.asarray(self.vector_service.encode_query(query), dtype=np.float32)
+            query_embedding /= np.linalg.norm(query_embedding) or 1.0
+            scores = matrix @ query_embedding
+            best = int(np.argmax(scores))
+
+            if scores[best] < self.match_similarity:
+                CACHE_REQUESTS.labels(cache='answer', result='miss').inc()
+                return None
+
+            CACHE_REQUESTS.labels(cache='answer', result='hit').inc()
+            return {
+                'response': entries[best]['answer'],
+                'question': entries[best]['question'],
+                'similarity': float(scores[best])
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to look up cached answer: {e}")
+            ERRORS.labels(component='answer_cache').inc()
+            return None
+
+    def _current(self) -> Tuple[List[Dict], Optional[np.ndarray]]:
+        """Cached answers for the serving embedding model, reloaded when a refresh replaced them"""
+        with self._lock:
+            if time.monotonic() - self._checked_at < 30 and self._version is not None:
+                return self._entries, self._matrix
+            self._checked_at = time.monotonic()
+
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT value FROM cache_state WHERE key = 'version'").fetchone()
+                version = f"{row[0] if row else ''}:{self.vector_service.read_model}"
+                if version != self._version:
+                    rows = conn.execute(
+                        "SELECT question, answer, embedding FROM cached_answers WHERE embedding_model = ? "
+                        "ORDER BY cluster_size DESC",
+                        (self.vector_service.read_model,)
+                    ).fetchall()
+                    self._entries = [{'question': question, 'answer': answer} for question, answer, _ in rows]
+                    self._matrix = np.vstack([
+                        np.frombuffer(embedding, dtype=np.float32) for _, _, embedding in rows
+                    ]) if rows else None
+                    self._version = version
+            finally:
+                conn.close()
+
+            return self._entries, self._matrix
+
+    def mine_clusters(self) -> List[Dict]:
+        """
+        Group recent student questions into clusters of near-identical ones
+
+        Returns:
+            The largest clusters, each a dict with the most common 'question',
+            its normalized 'embedding', total 'size' and number of 'users'
+        """
+        collection = self.vector_service.conversations_collection
+        cutoff = (datetime.now() - timedelta(days=self.mining_days)).isoformat()
+        weights, users = Counter(), defaultdict(set)
+
+        # The history index knows the newest rows; a merged duplicate is re-indexed
+        # under its latest timestamp, so the most repeated questions stay in the sample
+        ids = self.vector_service.history_index.recent(cutoff, self.sample_size)
+        for start in range(0, len(ids), 500):
+            page = collection.get(ids=ids[start:start + 500], include=["documents", "metadatas"])
+            for document, metadata in zip(page['documents'], page['metadatas']):
+                metadata = metadata or {}
+                if metadata.get('type') == 'quick_response' or metadata.get('follow_up') \
+                        or metadata.get('timestamp', '') < cutoff:
+                    continue
+                user_message, _ = split_conversation_document(document, metadata.get('user_message_length'))
+                question = normalize_question(user_message)
+                if len(question.split()) < 3 or len(question) > 300:
+                    continue
+                # A merged duplicate stands for every time it was asked
+                weights[question] += 1 + int(metadata.get('duplicate_count', 0))
+                users[question].add(metadata.get('user_id'))
+
+        if not weights:
+            return []
+
+        # Leader clustering, most frequent question first: a question joins the
+        # first cluster whose leader it is similar enough to
+        questions = [question for question, _ in weights.most_common()]
+        embeddings = np.asarray(self.vector_service.encoder.encode(questions), dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.where(norms == 0, 1.0, norms)
+
+        clusters, leaders = [], []
+        for question, embedding in zip(questions, embeddings):
+            if leaders:
+                scores = np.vstack(leaders) @ embedding
+                best = int(np.argmax(scores))
+                if scores[best] >= self.cluster_similarity:
+                    clusters[best]['size'] += weights[question]
+                    clusters[best]['users'] |= users[question]
+                    continue
+            leaders.append(embedding)
+            clusters.append({
+                'question': question,
+                'embedding': embedding,
+                'size': weights[question],
+                'users': set(users[question])
+            })
+
+        popular = [
+            dict(cluster, users=len(cluster['users'])) for cluster in clusters
+            if cluster['size'] >= self.min_cluster_size and len(cluster['users']) >= self.min_cluster_users
+        ]
+        popular.sort(key=lambda cluster: -cluster['size'])
+        return popular[:self.max_clusters]
+
+    def _claim_refresh(self, force: bool) -> bool:
+        """Take the refresh lease if a refresh is due and no other process holds it"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            state = dict(conn.execute("SELECT key, value FROM cache_state").fetchall())
+            now = time.time()
+            due = force or now - float(state.get('refreshed_at', 0)) >= self.refresh_interval
+            claimed = due and now >= float(state.get('lease_until', 0))
+            if claimed:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_state (key, value) VALUES ('lease_until', ?)",
+                    (str(now + REFRESH_LEASE_SECONDS),)
+                )
+            conn.execute("COMMIT")
+            return claimed
+        except Exception:
+            # BEGIN itself fails when another process holds the database too long
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Mine question clusters and generate answers for new ones
+
+        Answers younger than ANSWER_CACHE_REFRESH_INTERVAL are kept; questions
+        that are no longer popular are dropped.
+
+        Args:
+            force: Refresh even if the last refresh is recent
+
+        Returns:
+            Number of answers generated
+        """
+        if not self.gemini_service.is_configured() or not self.vector_service.encoder:
+            return 0
+        if not self._claim_refresh(force):
+            return 0
+
+        generated = 0
+        conn = self._connect()
+        try:
+            clusters = self.mine_clusters()
+            existing = dict(conn.execute(
+                "SELECT question, generated_at FROM cached_answers WHERE embedding_model = ?",
+                (self.vector_service.read_model,)
+            ).fetchall())
+
+            rows = []
+            for cluster in clusters:
+                question = cluster['question']
+                if time.time() - existing.get(question, 0) < self.refresh_interval:
+                    conn.execute(
+                        "UPDATE cached_answers SET cluster_size = ? WHERE question = ?",
+                        (cluster['size'], question)
+                    )
+                    continue
+                try:
+                    answer = self.gemini_service.generate_response(question, raise_errors=True)
+                except Exception as e:
+                    logger.error(f"Failed to pre-generate an answer for '{question}': {e}")
+                    continue
+                rows.append((
+                    question, answer, cluster['embedding'].astype(np.float32).tobytes(),
+                    self.vector_service.read_model, cluster['size'], time.time()
+                ))
+                generated += 1
+
+            keep = [cluster['question'] for cluster in clusters]
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"DELETE FROM cached_answers WHERE question NOT IN ({','.join('?' * len(keep))})", keep
+            )
+            conn.executemany("INSERT OR REPLACE INTO cached_answers VALUES (?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany("INSERT OR REPLACE INTO cache_state (key, value) VALUES (?, ?)", [
+                ('version', str(time.time())),
+                ('refreshed_at', str(time.time())),
+                ('lease_until', '0')
+            ])
+            conn.execute("COMMIT")
+
+            logger.info(f"Answer cache refreshed: {len(clusters)} question clusters, {generated} new answers")
+            return generated
+
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            conn.execute("INSERT OR REPLACE INTO cache_state (key, value) VALUES ('lease_until', '0')")
+            raise
+        finally:
+            conn.close()
+
+    def refresh_if_peak_ahead(self) -> int:
+        """
+        Refresh when a peak window starts within ANSWER_CACHE_PREWARM_MINUTES
+
+        Never during a peak: mining and generating compete with the students'
+        own requests for the encoder and the Gemini quota.
+        """
+        if not self.enabled:
+            return 0
+        if self.in_peak() or not self.in_peak(datetime.now() + self.prewarm):
+            return 0
+        return self.refresh()
+
+    def compact(self) -> None:
+        """
+        Reclaim the space of replaced answers and fold the write-ahead log back
+        into the cache file; run off the request path
+        """
+        conn = self._connect()
+        try:
+            free, total = (conn.execute(f"PRAGMA {pragma}").fetchone()[0] for pragma in ('freelist_count', 'page_count'))
+            if total and free / total > 0.25:
+                conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("PRAGMA optimize")
+        finally:
+            conn.close()
+
+# Global instance
+answer_cache = AnswerCache()
@@ -0,0 +1,224 @@
+import os
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List
+import logging
+
+from app import db
+from app.models import UserRecord, FavoriteQuote, PomodoroSession, Quote
+from app.services.record_service import record_service, RECORD_KINDS
+from app.services.study_stats_service import study_stats_service, SESSION_KINDS
+from app.services.tenants import get_vector_service
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMAT_VERSION = 1
+
+# Every line type the export produces, in the order it produces them
+LINE_TYPES = RECORD_KINDS + ('favorite_quote', 'pomodoro_session', 'conversation')
+
+MAX_REPORTED_ERRORS = 50
+
+class DataTransferService:
+    """
+    Streaming NDJSON export and import of everything stored for one user.
+
+    An export is a header line followed by one JSON object per record, each
+    tagged with its "type". Rows are produced from server-side cursors and
+    Chroma pages, and imports are written in fixed-size chunks, so neither
+    direction holds a whole history in memory. Imports skip records the user
+    already has, so importing the same file twice changes nothing.
+    """
+
+    def __init__(self):
+        self.page_size = int(os.getenv('EXPORT_PAGE_SIZE', '200'))
+        self.chunk_size = int(os.getenv('IMPORT_CHUNK_SIZE', '500'))
+
+    def export_user_data(self, user_id: str) -> Iterator[str]:
+        """
+        Yield a user's data as NDJSON lines
+
+        Args:
+            user_id: Unique identifier for the user
+
+        Yields:
+            One newline-terminated JSON document per record
+        """
+        yield self._line({
+            'type': 'export',
+            'version': EXPORT_FORMAT_VERSION,
+            'user_id': user_id,
+            'exported_at': datetime.now().isoformat()
+        })
+
+        records = UserRecord.query.filter(
+            UserRecord.user_id == user_id
+        ).order_by(UserRecord.kind, UserRecord.id).yield_per(self.page_size)
+        for record in records:
+            yield self._line({'type': record.kind, 'data': json.loads(record.payload)})
+
+        favorites = FavoriteQuote.query.filter_by(
+            user_id=user_id
+        ).order_by(FavoriteQuote.id).yield_per(self.page_size)
+        for favorite in favorites:
+            yield self._line({
+                'type': 'favorite_quote',
+                'data': {'quote_id': favorite.quote_id, 'saved_at': favorite.created_at.isoformat()}
+            })
+
+        sessions = PomodoroSession.query.filter_by(
+            user_id=user_id
+        ).order_by(PomodoroSession.ended_at).yield_per(self.page_size)
+        for session in sessions:
+            data = session.to_dict()
+            data.pop('id')
+            yield self._line({'type': 'pomodoro_session', 'data': data})
+
+        for conversation in get_vector_service().iter_conversations(user_id, page_size=self.page_size):
+            conversation.pop('id')
+            yield self._line({'type': 'conversation', 'data': conversation})
+
+    def _line(self, document: Dict) -> str:
+        return json.dumps(document, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+    def import_user_data(self, user_id: str, lines: Iterable) -> Dict:
+        """
+        Import NDJSON lines for a user, writing in chunks of IMPORT_CHUNK_SIZE
+
+        Args:
+            user_id: Unique identifier for the user the data is imported into
+            lines: Iterable of NDJSON lines (bytes or str), e.g. a request stream
+
+        Returns:
+            Dictionary with per-type 'imported' counts, 'skipped' and a sample of 'errors'
+        """
+        result = {'imported': {line_type: 0 for line_type in LINE_TYPES}, 'skipped': 0, 'errors': []}
+        pending: Dict[str, List[Dict]] = {line_type: [] for line_type in LINE_TYPES}
+        favorite_ids = {
+            quote_id for (quote_id,) in
+            db.session.query(FavoriteQuote.quote_id).filter_by(user_id=user_id)
+        }
+
+        def reject(line_number: int, message: str) -> None:
+            result['skipped'] += 1
+            if len(result['errors']) < MAX_REPORTED_ERRORS:
+                result['errors'].append({'line': line_number, 'error': message})
+
+        for line_number, raw in enumerate(lines, start=1):
+            if isinstance(raw, bytes):
+                raw = raw.decode('utf-8')
+            if not raw.strip():
+                continue
+
+            try:
+                document = json.loads(raw)
+            except ValueError:
+                reject(line_number, 'invalid JSON')
+                continue
+
+            line_type = document.get('type') if isinstance(document, dict) else None
+            if line_type == 'export':
+                if document.get('version', EXPORT_FORMAT_VERSION) > EXPORT_FORMAT_VERSION:
+                    raise ValueError(f"Unsupported export version: {document.get('version')}")
+                continue
+            if line_type not in pending or not isinstance(document.get('data'), dict):
+                reject(line_number, f"unknown record type: {line_type}")
+                continue
+
+            error = self._validate(line_type, document['data'])
+            if error:
+                reject(line_number, error)
+                continue
+
+            if line_type == 'favorite_quote':
+                quote_id = document['data']['quote_id']
+                if quote_id in favorite_ids:
+                    continue
+                favorite_ids.add(quote_id)
+
+            pending[line_type].append(document['data'])
+            if len(pending[line_type]) >= self.chunk_size:
+                result['imported'][line_type] += self._write_chunk(user_id, line_type, pending[line_type])
+                pending[line_type] = []
+
+        for line_type, chunk in pending.items():
+            if chunk:
+                result['imported'][line_type] += self._write_chunk(user_id, line_type, chunk)
+
+        logger.info(f"Imported data for user {user_id}: {result['imported']} ({result['skipped']} skipped)")
+        return result
+
+    def _validate(self, line_type: str, data: Dict):
+        """Return an error message for an unusable record, or None"""
+        if line_type == 'favorite_quote':
+            if not isinstance(data.get('quote_id'), int) or isinstance(data['quote_id'], bool):
+                return 'favorite_quote needs an integer quote_id'
+
+        elif line_type == 'pomodoro_session':
+            if data.get('kind') not in SESSION_KINDS:
+                return 'pomodoro_session kind must be "focus" or "break"'
+            duration = data.get('duration_seconds')
+            if not isinstance(duration, int) or isinstance(duration, bool) or duration <= 0:
+                return 'pomodoro_session needs a positive duration_seconds'
+            try:
+                datetime.fromisoformat(data.get('ended_at') or '')
+            except (TypeError, ValueError):
+                return 'pomodoro_session needs an ISO ended_at'
+
+        elif line_type in RECORD_KINDS:
+            return record_service.validate(data)
+
+        elif line_type == 'conversation':
+            if not isinstance(data.get('user_message'), str) or not isinstance(data.get('bot_response'), str):
+                return 'conversation needs user_message and bot_response strings'
+
+        return None
+
+    def _write_chunk(self, user_id: str, line_type: str, chunk: List[Dict]) -> int:
+        """Write one chunk of validated records of a single type"""
+        if line_type == 'conversation':
+            return get_vector_service().store_conversations_batch(user_id, chunk)
+
+        try:
+            if line_type in RECORD_KINDS:
+                written = record_service.add_missing(user_id, line_type, chunk)
+
+            elif line_type == 'favorite_quote':
+                existing = {
+                    quote_id for (quote_id,) in
+                    db.session.query(Quote.id).filter(Quote.id.in_([data['quote_id'] for data in chunk]))
+                }
+                favorites = [
+                    FavoriteQuote(user_id=user_id, quote_id=data['quote_id'])
+                    for data in chunk if data['quote_id'] in existing
+                ]
+                db.session.add_all(favorites)
+                written = len(favorites)
+
+            else:
+                sessions = {
+                    (data['kind'], datetime.fromisoformat(data['ended_at']), data['duration_seconds'])
+                    for data in chunk
+                }
+                existing = set(db.session.query(
+                    PomodoroSession.kind, PomodoroSession.ended_at, PomodoroSession.duration_seconds
+                ).filter(
+                    PomodoroSession.user_id == user_id,
+                    PomodoroSession.ended_at.in_([ended_at for _, ended_at, _ in sessions])
+                ))
+                new_sessions = sorted(sessions - existing, key=lambda session: session[1])
+                for kind, ended_at, duration_seconds in new_sessions:
+                    study_stats_service.add_session(user_id, kind, duration_seconds, ended_at)
+                written = len(new_sessions)
+
+            db.session.commit()
+            return written
+
+        except Exception:
+            db.session.rollback()
+            raise
+
+# Global instance
+data_transfer_service = DataTransferService()
@@ -0,0 +1,142 @@
+import re
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional
+import logging
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(r"[a-z0-9']+")
+
+def simhash(text: str, bits: int = 64) -> int:
+    """
+    SimHash fingerprint of a text over its words and word pairs
+
+    Texts that differ by a few words get fingerprints a few bits apart.
+    """
+    tokens = TOKEN.findall(text.lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not features:
+        return 0
+
+    weights = [0] * bits
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=bits // 8).digest(), 'big')
+        for bit in range(bits):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+class RecentConversations:
+    """
+    Per-user window of the most recently stored exchanges, used to spot
+    near-duplicates at ingest without querying the vector store.
+
+    An exchange duplicates a recent one when its user message SimHash is
+    within max_distance bits AND its embedding has cosine similarity of at
+    least cosine_threshold. Requiring both keeps a repeated question with a
+    genuinely different answer, and a different question that happens to
+    embed close by, as separate rows.
+
+    Checking and storing one user's exchange happens under user_lock(user_id),
+    one of a fixed set of locks picked by hashing the user id, so exchanges of
+    different users are deduplicated and written in parallel.
+
+    Windows live in one process and are not told about deletes made by
+    other workers, so callers check that a duplicate still exists before
+    merging into it.
+    """
+
+    LOCK_STRIPES = 64
+
+    def __init__(self, window: int = 20, cosine_threshold: float = 0.9,
+                 max_distance: int = 3, max_users: int = 10000):
+        self.window = window
+        self.cosine_threshold = cosine_threshold
+        self.max_distance = max_distance
+        self.max_users = max_users
+        # user_id -> deque of {'id', 'fingerprint', 'vector', 'metadata'}
+        self._users: OrderedDict = OrderedDict()
+        # Guards _users only; never held while loading from the store
+        self._lock = threading.Lock()
+        self._user_locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+
+    def user_lock(self, user_id: str) -> threading.Lock:
+        """The lock serializing dedup checks and writes for a user"""
+        digest = hashlib.blake2b(user_id.encode('utf-8'), digest_size=4).digest()
+        return self._user_locks[int.from_bytes(digest, 'big') % self.LOCK_STRIPES]
+
+    def _entries(self, user_id: str, load: Callable[[], List[Dict]]) -> deque:
+        with self._lock:
+            entries = self._users.get(user_id)
+            if entries is not None:
+                self._users.move_to_end(user_id)
+                return entries
+
+        entries = deque(maxlen=self.window)
+        try:
+            for item in load():
+                entries.append(self._entry(item['id'], item['user_message'], item['embedding'], item['metadata']))
+        except Exception as e:
+            logger.error(f"Failed to load recent conversations for dedup: {e}")
+
+        with self._lock:
+            self._users[user_id] = entries
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return entries
+
+    def _entry(self, conversation_id: str, user_message: str, embedding, metadata: Dict) -> Dict:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return {
+            'id': conversation_id,
+            'fingerprint': simhash(user_message),
+            'vector': vector / norm if norm else vector,
+            'metadata': dict(metadata)
+        }
+
+    def find_duplicate(self, user_id: str, user_message: str, embedding,
+                       load: Callable[[], List[Dict]]) -> Optional[Dict]:
+        """
+        Return the recent entry this exchange duplicates, or None
+
+        Call with user_lock(user_id) held. load() supplies the user's latest
+        stored exchanges (oldest first) the first time the user is seen.
+        """
+        candidate = self._entry('', user_message, embedding, {})
+        for entry in reversed(self._entries(user_id, load)):
+            if hamming_distance(entry['fingerprint'], candidate['fingerprint']) > self.max_distance:
+                continue
+            if float(entry['vector'] @ candidate['vector']) >= self.cosine_threshold:
+                return entry
+        return None
+
+    def forget(self, user_id: str) -> None:
+        """Drop a user's window, e.g. after their history was cleared"""
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def reset(self) -> None:
+        """Drop every window, e.g. once embeddings come from another model"""
+        with self._lock:
+            self._users.clear()
+
+    def add(self, user_id: str, conversation_id: str, user_message: str, embedding, metadata: Dict) -> None:
+        """Remember a newly stored exchange (call with user_lock(user_id) held)"""
+        with self._lock:
+            entries = self._users.get(user_id)
+        if entries is not None:
+            entries.append(self._entry(conversation_id, user_message, embedding, metadata))
+
+    def replace(self, user_id: str, entry: Dict, user_message: str, embedding, metadata: Dict) -> None:
+        """Refresh an entry a newer exchange was merged into (call with user_lock(user_id) held)"""
+        entry.update(self._entry(entry['id'], user_message, embedding, metadata))
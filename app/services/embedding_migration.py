@@ -0,0 +1,213 @@
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows; only run one migrating process there
+    fcntl = None
+
+from app.services.vector_service import VectorService, vector_service as default_vector_service
+from app.services.metrics import EMBEDDINGS_MIGRATED, ERRORS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Collections holding model-specific vectors; user_context only stores placeholders
+MIGRATED_COLLECTIONS = ('study_knowledge', 'conversations')
+
+# Full passes over a collection before giving up on matching its row count
+MAX_PASSES = 3
+
+class EmbeddingMigration:
+    """
+    Re-embeds the stored collections with EMBEDDING_MODEL in the background.
+
+    Rows are copied from the serving model's collections a batch at a time,
+    skipping ids the new collection already has (live writes are dual-written
+    by VectorService), at no more than EMBEDDING_MIGRATION_RATE rows a second.
+    Progress is saved in the embedding state file after every batch, so a
+    restarted migration resumes where it stopped. When every collection is
+    done, reads switch to the new model in every process.
+    """
+
+    def __init__(self, vector_service: Optional[VectorService] = None):
+        self.vector_service = vector_service or default_vector_service
+        self.batch_size = int(os.getenv('EMBEDDING_MIGRATION_BATCH_SIZE', '64'))
+        self.rate = float(os.getenv('EMBEDDING_MIGRATION_RATE', '50'))
+        self.retry_interval = float(os.getenv('EMBEDDING_MIGRATION_RETRY_INTERVAL', '60'))
+
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def status(self) -> Dict:
+        """Serving and target models plus the saved progress of the current migration"""
+        return {
+            'read_model': self.vector_service.read_model,
+            'embedding_model': self.vector_service.embedding_model,
+            'migrating': self.vector_service.migrating,
+            'migration': self.vector_service.embedding_state.load().get('migration')
+        }
+
+    def run(self, stop: Optional[threading.Event] = None) -> bool:
+        """
+        Migrate every collection to EMBEDDING_MODEL, resuming from saved progress
+
+        Args:
+            stop: Event that ends the run after the current batch
+
+        Returns:
+            True once reads use EMBEDDING_MODEL, False if stopped early or
+            another process is already migrating
+        """
+        if not self.vector_service.migrating:
+            return True
+
+        if self.vector_service.migration_encoder is None:
+            raise RuntimeError(f"Encoder for {self.vector_service.embedding_model} is not available")
+
+        lock_path = self.vector_service.embedding_state.path + '.lock'
+        with open(lock_path, 'w') as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    logger.info("Embedding migration is already running in another process")
+                    return False
+
+            return self._migrate(stop or self._stop)
+
+    def _migrate(self, stop: threading.Event) -> bool:
+        source_model, target_model = self.vector_service.read_model, self.vector_service.embedding_model
+        state = self.vector_service.embedding_state.load()
+
+        migration = state.get('migration') or {}
+        if (migration.get('source'), migration.get('target')) != (source_model, target_model) \
+                or migration.get('completed_at'):
+            migration = {
+                'source': source_model,
+                'target': target_model,
+                'started_at': datetime.now().isoformat(),
+                'collections': {
+                    base: {'offset': 0, 'migrated': 0, 'total': None, 'passes': 0, 'done': False}
+                    for base in MIGRATED_COLLECTIONS
+                }
+            }
+            logger.info(f"Starting embedding migration from {source_model} to {target_model}")
+        else:
+            logger.info(f"Resuming embedding migration from {source_model} to {target_model}")
+
+        state['migration'] = migration
+        self.vector_service.embedding_state.save(state)
+
+        for base in MIGRATED_COLLECTIONS:
+            progress = migration['collections'][base]
+            if not progress['done'] and not self._migrate_collection(base, progress, state, stop):
+                return False
+
+        migration['completed_at'] = datetime.now().isoformat()
+        state['active_model'] = target_model
+        state['previous_model'] = source_model
+        self.vector_service.embedding_state.save(state)
+        self.vector_service.switch_read_model(target_model)
+
+        logger.info(
+            f"Embedding migration to {target_model} complete; the {source_model} collections "
+            f"are no longer read and can be deleted"
+        )
+        return True
+
+    def _migrate_collection(self, base: str, progress: Dict, state: Dict, stop: threading.Event) -> bool:
+        """Copy one collection batch by batch; returns False if stopped before the end"""
+        source = self.vector_service.model_collection(base, self.vector_service.read_model)
+        target = self.vector_service.model_collection(base, self.vector_service.embedding_model)
+
+        while not stop.is_set():
+            started = time.monotonic()
+            ids = source.get(limit=self.batch_size, offset=progress['offset'], include=[])['ids']
+
+            if not ids:
+                progress['passes'] += 1
+                progress['total'] = source.count()
+                # Offsets shift if rows are removed mid-pass; another pass only
+                # copies what the previous ones missed
+                if target.count() < progress['total'] and progress['passes'] < MAX_PASSES:
+                    progress['offset'] = 0
+                else:
+                    progress['done'] = True
+                self.vector_service.embedding_state.save(state)
+                if progress['done']:
+                    logger.info(f"Migrated {progress['migrated']} {base} rows")
+                    return True
+                continue
+
+            present = set(target.get(ids=ids, include=[])['ids'])
+            missing = [row_id for row_id in ids if row_id not in present]
+            if missing:
+                rows = source.get(ids=missing, include=["documents", "metadatas"])
+                embeddings = self.vector_service.migration_encoder.encode(rows['documents']).tolist()
+                with self.vector_service.write_lock:
+                    target.upsert(
+                        ids=rows['ids'],
+                        embeddings=embeddings,
+                        documents=rows['documents'],
+                        metadatas=[
+                            dict(metadata or {}, embedding_model=self.vector_service.embedding_model)
+                            for metadata in rows['metadatas']
+                        ]
+                    )
+                EMBEDDINGS_MIGRATED.labels(collection=base).inc(len(rows['ids']))
+
+            progress['offset'] += len(ids)
+            progress['migrated'] += len(missing)
+            self.vector_service.embedding_state.save(state)
+
+            # Throttle to EMBEDDING_MIGRATION_RATE re-embedded rows per second
+            if self.rate > 0:
+                remaining = len(missing) / self.rate - (time.monotonic() - started)
+                if remaining > 0:
+                    stop.wait(remaining)
+
+        return False
+
+    def start(self) -> None:
+        """Run the migration in a background thread until reads use EMBEDDING_MODEL"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run_loop, name="embedding-migration", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run_loop(self) -> None:
+        # Retry while another process holds the migration, so it carries on if that process exits
+        while not self._stop.is_set():
+            try:
+                if self.run():
+                    return
+            except Exception as e:
+                logger.error(f"Embedding migration failed: {e}")
+                ERRORS.labels(component='embedding_migration').inc()
+            self._stop.wait(self.retry_interval)
+
+# Global instance
+embedding_migration = EmbeddingMigration()
+
+_migrations: Dict[int, EmbeddingMigration] = {}
+_migrations_lock = threading.Lock()
+
+def migration_for(vector_service: VectorService) -> EmbeddingMigration:
+    """The migration of a vector store: the global one, or one per tenant store"""
+    if vector_service is default_vector_service:
+        return embedding_migration
+    with _migrations_lock:
+        if id(vector_service) not in _migrations:
+            _migrations[id(vector_service)] = EmbeddingMigration(vector_service)
+        return _migrations[id(vector_service)]
@@ -0,0 +1,67 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+from typing import Dict
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# The model every vector was encoded with before vectors were stamped with one
+DEFAULT_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+def collection_name(base: str, model: str) -> str:
+    """
+    Chroma collection holding the base collection's vectors for an embedding model
+
+    The default model keeps the original, unsuffixed names so existing stores
+    need no changes.
+    """
+    if model == DEFAULT_EMBEDDING_MODEL:
+        return base
+
+    slug = re.sub(r'[^a-z0-9]+', '-', model.lower().rsplit('/', 1)[-1]).strip('-')
+    name = f"{base}-{slug}"
+    if len(name) > 63:  # Chroma's limit on collection names
+        name = f"{base}-{hashlib.sha1(model.encode('utf-8')).hexdigest()[:12]}"
+    return name
+
+class EmbeddingState:
+    """
+    Small JSON file recording which embedding model reads are served from and
+    the progress of any migration to another model.
+
+    It is shared by every process using the persist directory, so a migration
+    finished by one worker is picked up by the others.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            logger.error(f"Ignoring unreadable embedding state {self.path}: {e}")
+            return {}
+
+    def save(self, state: Dict) -> None:
+        """Replace the state file atomically"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, partial = tempfile.mkstemp(dir=directory, suffix='.partial')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(partial, self.path)
+
+    def mtime(self) -> float:
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return 0.0
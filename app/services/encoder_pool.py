@@ -0,0 +1,48 @@
+import queue
+from typing import Callable
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def set_torch_threads(threads: int) -> None:
+    """Cap the intra-op threads torch uses per encode call (no-op without torch)"""
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+class EncoderPool:
+    """
+    A fixed set of encoder instances shared by request threads.
+
+    Each encode call checks out one instance for its duration, so no model is
+    ever used by two threads at once. With size 1 calls are serialized on a
+    single model; larger pools let that many encodes run in parallel at the
+    cost of one model copy each.
+    """
+
+    def __init__(self, factory: Callable, size: int = 1):
+        self.size = max(1, size)
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+
+        first = factory()
+        self._dimension = first.get_sentence_embedding_dimension()
+        self._idle.put(first)
+        for _ in range(self.size - 1):
+            self._idle.put(factory())
+
+        logger.info(f"Encoder pool ready with {self.size} instance(s)")
+
+    def encode(self, sentences, **kwargs):
+        """Encode with the next free instance, waiting for one if all are busy"""
+        encoder = self._idle.get()
+        try:
+            return encoder.encode(sentences, **kwargs)
+        finally:
+            self._idle.put(encoder)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dimension
@@ -0,0 +1,137 @@
+import os
+import re
+import hashlib
+from typing import Dict, Optional
+import logging
+
+import numpy as np
+
+from app.services.tenants import get_vector_service
+from app.services.lru_cache import LRUCache
+from app.services.metrics import ERRORS, chat_stage
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n+')
+WORD = re.compile(r"[a-z0-9']+")
+
+class ExtractiveAnswerer:
+    """
+    Builds answers from the study knowledge base without any network call.
+
+    The top passages from search_study_knowledge are split into sentences,
+    each sentence is scored by cosine similarity to the query embedding (plus a
+    small bonus for shared words), and the best ones are returned in their
+    original order. Passages are scored against the knowledge embeddings held
+    in memory, so trying the knowledge base first on every chat turn costs no
+    Chroma query. The output only depends on the query and the knowledge
+    base, so the same question always gets the same answer.
+    """
+
+    def __init__(self):
+        self.passages = int(os.getenv('EXTRACTIVE_PASSAGES', '3'))
+        self.max_sentences = int(os.getenv('EXTRACTIVE_MAX_SENTENCES', '3'))
+        self.min_sentence_score = float(os.getenv('EXTRACTIVE_MIN_SENTENCE_SCORE', '0.2'))
+        # search_study_knowledge similarity is 1 - squared L2 distance, i.e.
+        # 2 * cosine - 1 for normalized embeddings: 0.6 means cosine 0.8
+        self.fast_path_threshold = float(os.getenv('EXTRACTIVE_FAST_PATH_THRESHOLD', '0.6'))
+        # Without Gemini the bar is lower, but a passage below cosine 0.65 is
+        # usually about something else and is worse than no answer
+        self.min_passage_similarity = float(os.getenv('EXTRACTIVE_MIN_SIMILARITY', '0.3'))
+        # Knowledge passages rarely change, so their sentence embeddings are kept
+        self._sentence_embeddings = LRUCache('knowledge_sentences', 1024)
+
+    def answer(self, query: str, min_similarity: Optional[float] = None) -> Optional[Dict]:
+        """
+        Answer a question from the knowledge base
+
+        Args:
+            query: The student's question
+            min_similarity: Give up unless the best passage is at least this similar
+                (defaults to EXTRACTIVE_MIN_SIMILARITY)
+
+        Returns:
+            Dictionary with 'response', 'similarity' and 'sources', or None when
+            the knowledge base has nothing close enough
+        """
+        # The current request's tenant's knowledge base
+        vector_service = get_vector_service()
+        if not vector_service.encoder:
+            return None
+
+        threshold = self.min_passage_similarity if min_similarity is None else min_similarity
+
+        try:
+            passages = vector_service.search_study_knowledge(query, limit=self.passages, in_memory=True)
+            if not passages or passages[0]['similarity'] < threshold:
+                return None
+
+            with chat_stage('extractive'):
+                query_embedding = np.asarray(vector_service.encode_query(query), dtype=np.float32)
+                query_embedding /= np.linalg.norm(query_embedding) or 1.0
+                query_words = set(WORD.findall(query.lower()))
+
+                candidates = []
+                for rank, passage in enumerate(passages):
+                    title = passage['metadata'].get('title', '')
+                    sentences, embeddings = self._sentences(vector_service, passage['content'], title)
+                    if not sentences:
+                        continue
+
+                    scores = embeddings @ query_embedding
+                    for position, (sentence, score) in enumerate(zip(sentences, scores)):
+                        words = set(WORD.findall(sentence.lower()))
+                        overlap = len(query_words & words) / len(query_words) if query_words else 0.0
+                        candidates.append((float(score) + 0.1 * overlap, rank, position, sentence, title))
+
+                best = sorted(
+                    (candidate for candidate in candidates if candidate[0] >= self.min_sentence_score),
+                    key=lambda candidate: (-candidate[0], candidate[1], candidate[2])
+                )[:self.max_sentences]
+
+            if not best:
+                return None
+
+            # Read the chosen sentences in passage order, not score order
+            best.sort(key=lambda candidate: (candidate[1], candidate[2]))
+            sources = list(dict.fromkeys(candidate[4] for candidate in best if candidate[4]))
+
+            lead = f"Here's what our study guide says about {sources[0]}:" if sources else "Here's what our study guide says:"
+            response = lead + "\n\n" + " ".join(candidate[3] for candidate in best)
+
+            return {
+                'response': response,
+                'similarity': passages[0]['similarity'],
+                'sources': sources
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to build extractive answer: {e}")
+            ERRORS.labels(component='extractive_answerer').inc()
+            return None
+
+    def _sentences(self, vector_service, content: str, title: str):
+        """Split a passage into sentences and return them with normalized embeddings"""
+        key = (vector_service.read_model, hashlib.sha1(content.encode('utf-8')).hexdigest())
+        cached = self._sentence_embeddings.get(key)
+        if cached is not None:
+            return cached
+
+        sentences = [
+            sentence.strip() for sentence in SENTENCE_BOUNDARY.split(content)
+            if sentence.strip() and sentence.strip() != title
+        ]
+        if sentences:
+            embeddings = np.asarray(vector_service.encoder.encode(sentences), dtype=np.float32)
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.where(norms == 0, 1.0, norms)
+        else:
+            embeddings = np.zeros((0, 0), dtype=np.float32)
+
+        self._sentence_embeddings.put(key, (sentences, embeddings))
+        return sentences, embeddings
+
+# Global instance
+extractive_answerer = ExtractiveAnswerer()
@@ -4,22 +4,38 @@ from typing import List, Dict, Optional
 import json
 import logging
 from datetime import datetime
+from app.services.metrics import ERRORS, GEMINI_TOKENS, chat_stage
+from app.services.model_router import ModelRouter, generative_client
+from config import Config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class GeminiService:
-    def __init__(self):
-        self.api_key = os.getenv('GEMINI_API_KEY')
-        self.model_name = os.getenv('GEMINI_MODEL', 'gemini-pro')
+    def __init__(self, api_key: Optional[str] = None, config=Config):
+        """
+        Args:
+            api_key: A tenant's API key, used through a client of its own
+                (defaults to GEMINI_API_KEY, configured process-wide)
+            config: Config class with the GEMINI_* model and pool settings
+        """
+        self.api_key = api_key or os.getenv('GEMINI_API_KEY')
+        self.model_name = config.GEMINI_MODEL
 
         if not self.api_key:
             logger.warning("GEMINI_API_KEY not found in environment variables")
             return
 
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel(self.model_name)
+        if api_key:
+            client = generative_client(api_key)
+        else:
+            genai.configure(api_key=self.api_key)
+            client = None
+
+        # Per-request-type model tiers; the strong tier is the original chat model
+        self.router = ModelRouter.from_config(config, client)
+        self.model = self.router.tiers['strong'].model
 
         # Initialize conversation history
         self.conversation_history = []
@@ -49,13 +65,20 @@ class GeminiService:
         """Check if the service is properly configured"""
         return bool(self.api_key and hasattr(self, 'model'))
 
-    def generate_response(self, user_message: str, conversation_context: Optional[List[Dict]] = None) -> str:
+    def generate_response(self, user_message: str, conversation_context: Optional[List[Dict]] = None,
+                          request_type: str = 'chat', raise_errors: bool = False,
+                          user_profile: Optional[str] = None) -> str:
         """
         Generate a response using GEMINI API
 
         Args:
             user_message: The user's input message
             conversation_context: Previous conversation history for context
+            request_type: "chat" for free chat or "quick" for canned quick responses;
+                selects the model tier
+            raise_errors: Raise on API failures and empty responses instead of
+                returning an apology, so the caller can fall back
+            user_profile: Compact summary of the student's past conversations
 
         Returns:
             Generated response string
@@ -65,35 +88,54 @@ class GeminiService:
 
         try:
             # Build conversation context
-            prompt_parts = [self.system_prompt]
+            with chat_stage('prompt_build'):
+                prompt_parts = [self.system_prompt]
+                if user_profile:
+                    prompt_parts.append(user_profile)
 
-            # Add conversation history for context (last 5 exchanges)
-            if conversation_context:
-                recent_context = conversation_context[-10:]  # Last 10 messages (5 exchanges)
-                for msg in recent_context:
-                    if msg.get('role') == 'user':
-                        prompt_parts.append(f"Student: {msg.get('content', '')}")
-                    elif msg.get('role') == 'assistant':
-                        prompt_parts.append(f"StudyBot: {msg.get('content', '')}")
+                # Add conversation history for context (last 5 exchanges)
+                if conversation_context:
+                    recent_context = conversation_context[-10:]  # Last 10 messages (5 exchanges)
+                    for msg in recent_context:
+                        if msg.get('role') == 'user':
+                            prompt_parts.append(f"Student: {msg.get('content', '')}")
+                        elif msg.get('role') == 'assistant':
+                            prompt_parts.append(f"StudyBot: {msg.get('content', '')}")
 
-            # Add current user message
-            prompt_parts.append(f"Student: {user_message}")
-            prompt_parts.append("StudyBot:")
+                # Add current user message
+                prompt_parts.append(f"Student: {user_message}")
+                prompt_parts.append("StudyBot:")
 
-            full_prompt = "\n\n".join(prompt_parts)
+                full_prompt = "\n\n".join(prompt_parts)
 
-            # Generate response
-            response = self.model.generate_content(full_prompt)
+            # Generate response on the tier routed for this request type
+            response, _ = self.router.generate(request_type, full_prompt)
+
+            self._record_usage(response)
 
             if response and response.text:
                 return response.text.strip()
+            elif raise_errors:
+                raise ValueError("Empty response from Gemini")
             else:
                 return "I'm having trouble generating a response right now. Could you try rephrasing your question?"
 
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
+            ERRORS.labels(component='gemini').inc()
+            if raise_errors:
+                raise
             return "I'm experiencing some technical difficulties. Please try again in a moment."
 
+    def _record_usage(self, response) -> None:
+        """Add the response's token counts to the usage counters"""
+        usage = getattr(response, 'usage_metadata', None)
+        if not usage:
+            return
+
+        GEMINI_TOKENS.labels(kind='prompt').inc(getattr(usage, 'prompt_token_count', 0) or 0)
+        GEMINI_TOKENS.labels(kind='completion').inc(getattr(usage, 'candidates_token_count', 0) or 0)
+
     def get_study_tips(self, subject: Optional[str] = None) -> str:
         """Get general study tips or subject-specific tips"""
         if subject:
@@ -101,7 +143,7 @@ class GeminiService:
         else:
             prompt = "Provide 4-5 general study tips that would help any high school student improve their learning."
 
-        return self.generate_response(prompt)
+        return self.generate_response(prompt, request_type='quick')
 
     def get_motivation_message(self, context: Optional[str] = None) -> str:
         """Generate a motivational message"""
@@ -110,7 +152,7 @@ class GeminiService:
         else:
             prompt = "Provide an encouraging and motivational message for high school students about the importance of perseverance in their studies."
 
-        return self.generate_response(prompt)
+        return self.generate_response(prompt, request_type='quick')
 
     def help_with_time_management(self, specific_challenge: Optional[str] = None) -> str:
         """Provide time management advice"""
@@ -119,12 +161,12 @@ class GeminiService:
         else:
             prompt = "Provide practical time management tips specifically for high school students balancing multiple subjects and activities."
 
-        return self.generate_response(prompt)
+        return self.generate_response(prompt, request_type='quick')
 
     def explain_study_technique(self, technique: str) -> str:
         """Explain a specific study technique"""
         prompt = f"Explain the {technique} study method to a high school student. Include how to use it effectively and what subjects it works best for."
-        return self.generate_response(prompt)
+        return self.generate_response(prompt, request_type='quick')
 
 # Global instance
 gemini_service = GeminiService()
\ No newline at end of file
@@ -0,0 +1,308 @@
+import os
+import json
+import base64
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, Tuple
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def encode_cursor(timestamp: str, conversation_id: str) -> str:
+    """Opaque cursor pointing just past a (timestamp, conversation_id) position"""
+    raw = json.dumps([timestamp, conversation_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Inverse of encode_cursor
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, conversation_id = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(timestamp, str) or not isinstance(conversation_id, str):
+        raise ValueError("Invalid cursor")
+    return timestamp, conversation_id
+
+def decode_version(version: str) -> int:
+    """
+    The sequence number in a sync version (see ConversationHistoryIndex.after)
+
+    Raises:
+        ValueError: if the version is malformed
+    """
+    if not version.isdigit():
+        raise ValueError("Invalid version")
+    return int(version)
+
+class ConversationHistoryIndex:
+    """
+    Time-ordered index of stored conversations kept in a local SQLite file.
+
+    Chroma can filter by user but cannot sort or count without fetching rows,
+    so every conversation id is also written here keyed by (user_id, timestamp,
+    conversation_id). History pages are then a keyset range scan on the
+    primary key, and per-user totals are counted from the index alone.
+
+    Each row also gets a sequence number when it is written, increasing in
+    commit order across processes. Syncs and profile refreshes follow the
+    sequence rather than timestamps, so exchanges stored with an older
+    timestamp (imports, the backfill) are not skipped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._backfill_lock = threading.Lock()
+        self._backfilled = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS conversation_index ("
+                "user_id TEXT NOT NULL, timestamp TEXT NOT NULL, conversation_id TEXT NOT NULL, "
+                "PRIMARY KEY (user_id, timestamp, conversation_id)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS index_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            # Every user's latest entries, for mining popular questions
+            conn.execute("CREATE INDEX IF NOT EXISTS conversation_index_timestamp ON conversation_index (timestamp)")
+
+        self._add_sequence()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @contextmanager
+    def _writing(self):
+        """
+        A write transaction; BEGIN IMMEDIATE makes writers in every process
+        take turns, so sequence numbers are handed out in commit order
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def _add_sequence(self) -> None:
+        """Add the seq column to an index created before it existed, numbering old rows by timestamp"""
+        with self._writing() as conn:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(conversation_index)")]
+            if 'seq' not in columns:
+                conn.execute("ALTER TABLE conversation_index ADD COLUMN seq INTEGER")
+            conn.execute("CREATE INDEX IF NOT EXISTS conversation_index_seq ON conversation_index (user_id, seq)")
+
+            unnumbered = conn.execute(
+                "SELECT user_id, timestamp, conversation_id FROM conversation_index WHERE seq IS NULL "
+                "ORDER BY timestamp, conversation_id"
+            ).fetchall()
+            if unnumbered:
+                self._insert(conn, unnumbered, replace=True)
+                logger.info(f"Numbered {len(unnumbered)} conversation history index entries")
+
+    def _insert(self, conn: sqlite3.Connection, rows: List[Tuple[str, str, str]], replace: bool = False) -> None:
+        """Write rows with the next sequence numbers; call inside _writing"""
+        row = conn.execute("SELECT value FROM index_state WHERE key = 'seq'").fetchone()
+        seq = int(row[0]) if row else 0
+        numbered = [(user_id, timestamp, conversation_id, seq + i + 1)
+                    for i, (user_id, timestamp, conversation_id) in enumerate(rows)]
+        conn.executemany(
+            f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO conversation_index "
+            "(user_id, timestamp, conversation_id, seq) VALUES (?, ?, ?, ?)",
+            numbered
+        )
+        conn.execute("INSERT OR REPLACE INTO index_state (key, value) VALUES ('seq', ?)", (str(seq + len(rows)),))
+
+    def add_many(self, rows: List[Tuple[str, str, str]]) -> None:
+        """Index (user_id, timestamp, conversation_id) rows; already indexed rows are ignored"""
+        if rows:
+            with self._writing() as conn:
+                self._insert(conn, rows)
+
+    def add(self, user_id: str, timestamp: str, conversation_id: str) -> None:
+        self.add_many([(user_id, timestamp, conversation_id)])
+
+    def move(self, user_id: str, conversation_id: str, timestamp: str) -> None:
+        """
+        Re-index a conversation under a new timestamp, e.g. after a newer
+        exchange was merged into it; it gets a new sequence number, so syncs
+        deliver the changed row again
+        """
+        with self._writing() as conn:
+            conn.execute(
+                "DELETE FROM conversation_index WHERE user_id = ? AND conversation_id = ?",
+                (user_id, conversation_id)
+            )
+            self._insert(conn, [(user_id, timestamp, conversation_id)])
+
+    def page(self, user_id: str, before: Optional[Tuple[str, str]] = None, limit: int = 20) -> List[Tuple[str, str]]:
+        """
+        Newest-first (timestamp, conversation_id) pairs for a user
+
+        Args:
+            user_id: Unique identifier for the user
+            before: Only return entries strictly older than this position
+            limit: Maximum number of entries
+        """
+        with self._connect() as conn:
+            if before is None:
+                return conn.execute(
+                    "SELECT timestamp, conversation_id FROM conversation_index WHERE user_id = ? "
+                    "ORDER BY timestamp DESC, conversation_id DESC LIMIT ?",
+                    (user_id, limit)
+                ).fetchall()
+
+            return conn.execute(
+                "SELECT timestamp, conversation_id FROM conversation_index "
+                "WHERE user_id = ? AND (timestamp, conversation_id) < (?, ?) "
+                "ORDER BY timestamp DESC, conversation_id DESC LIMIT ?",
+                (user_id, before[0], before[1], limit)
+            ).fetchall()
+
+    def after(self, user_id: str, seq: int = 0, limit: int = 100) -> List[Tuple[int, str, str]]:
+        """
+        (seq, timestamp, conversation_id) of a user's entries written after
+        sequence number seq (0: from the start), in the order they were written
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT seq, timestamp, conversation_id FROM conversation_index "
+                "WHERE user_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (user_id, seq, limit)
+            ).fetchall()
+
+    def last_seq(self, user_id: str) -> int:
+        """Sequence number of the user's latest written entry (0 if there is none)"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM conversation_index WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+
+    def seq_at(self, user_id: str, position: Tuple[str, str]) -> int:
+        """
+        Sequence number covering everything up to a (timestamp, conversation_id)
+        position, for positions recorded before entries were numbered
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM conversation_index "
+                "WHERE user_id = ? AND (timestamp, conversation_id) <= (?, ?)",
+                (user_id, position[0], position[1])
+            ).fetchone()[0]
+
+    def recent(self, since: str, limit: int) -> List[str]:
+        """Ids of the newest conversations of all users at or after timestamp since, newest first"""
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT conversation_id FROM conversation_index WHERE timestamp >= ? "
+                "ORDER BY timestamp DESC LIMIT ?",
+                (since, limit)
+            )]
+
+    def count(self, user_id: str) -> int:
+        """Number of indexed conversations for a user, answered from the primary key"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM conversation_index WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+
+    def delete_user(self, user_id: str) -> int:
+        """
+        Drop a user's entries and record when their history was cleared
+
+        Returns:
+            Number of entries removed
+        """
+        with self._writing() as conn:
+            removed = conn.execute("DELETE FROM conversation_index WHERE user_id = ?", (user_id,)).rowcount
+            conn.execute(
+                "INSERT OR REPLACE INTO index_state (key, value) VALUES (?, ?)",
+                (f'cleared:{user_id}', datetime.now().isoformat())
+            )
+        return removed
+
+    def cleared_at(self, user_id: str) -> Optional[str]:
+        """When the user's history was last cleared, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM index_state WHERE key = ?", (f'cleared:{user_id}',)).fetchone()
+        return row[0] if row else None
+
+    def is_backfilled(self) -> bool:
+        return self._backfilled
+
+    def compact(self) -> None:
+        """
+        Defragment the index when much of it is free pages, fold the write-ahead
+        log back into the file and refresh the query planner's statistics
+        """
+        conn = self._connect()
+        try:
+            free, total = (conn.execute(f"PRAGMA {pragma}").fetchone()[0] for pragma in ('freelist_count', 'page_count'))
+            if total and free / total > 0.25:
+                conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("PRAGMA optimize")
+        finally:
+            conn.close()
+
+    def ensure_backfilled(self, collection, page_size: int = 500) -> None:
+        """
+        Index conversations stored before the index existed, once per database
+
+        Reads only ids and metadata from the collection, a page at a time. Run
+        by the history_index.backfill job rather than on requests; until it has
+        finished, history pages only show conversations stored since the index
+        was created.
+        """
+        if self._backfilled:
+            return
+
+        with self._backfill_lock:
+            if self._backfilled:
+                return
+
+            with self._connect() as conn:
+                done = conn.execute("SELECT value FROM index_state WHERE key = 'backfilled'").fetchone()
+
+            if not done:
+                indexed = 0
+                offset = 0
+                while True:
+                    batch = collection.get(limit=page_size, offset=offset, include=["metadatas"])
+                    ids = batch.get('ids') or []
+                    rows = [
+                        (metadata['user_id'], metadata.get('timestamp', ''), conversation_id)
+                        for conversation_id, metadata in zip(ids, batch['metadatas'])
+                        if metadata and metadata.get('user_id')
+                    ]
+                    self.add_many(rows)
+                    indexed += len(rows)
+                    if len(ids) < page_size:
+                        break
+                    offset += page_size
+
+                with self._writing() as conn:
+                    conn.execute("INSERT OR REPLACE INTO index_state (key, value) VALUES ('backfilled', '1')")
+                logger.info(f"Backfilled conversation history index with {indexed} conversations")
+
+            self._backfilled = True
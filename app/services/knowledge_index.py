@@ -0,0 +1,163 @@
+import threading
+from collections import defaultdict
+from typing import List, Dict, Optional, Set, Iterable
+import logging
+
+import numpy as np
+
+from app.services.metrics import CACHE_REQUESTS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def split_tags(value: Optional[str]) -> List[str]:
+    """Split the comma-joined tag string stored in Chroma metadata"""
+    if not value:
+        return []
+    return [tag.strip() for tag in value.split(',') if tag.strip()]
+
+class KnowledgeTagIndex:
+    """
+    In-memory inverted index over the knowledge collection's tags and categories.
+
+    Chroma metadata can only hold scalars, so tags are stored as a comma-joined
+    string and cannot be filtered on at query time. This index maps every tag and
+    category to the set of knowledge ids carrying it, so filtered searches can
+    intersect candidate sets first and only score the vectors that survive.
+    """
+
+    PAGE_SIZE = 500
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._items: Dict[str, Dict] = {}
+        self._by_tag: Dict[str, Set[str]] = defaultdict(set)
+        self._by_category: Dict[str, Set[str]] = defaultdict(set)
+        self._embeddings: Dict[str, np.ndarray] = {}
+        self.loaded = False
+
+    def load(self, collection) -> None:
+        """Build the index from the knowledge collection, one page at a time"""
+        with self._lock:
+            if self.loaded:
+                return
+
+            offset = 0
+            while True:
+                page = collection.get(
+                    limit=self.PAGE_SIZE,
+                    offset=offset,
+                    include=["documents", "metadatas"]
+                )
+                ids = page.get('ids') or []
+                if not ids:
+                    break
+
+                for i, item_id in enumerate(ids):
+                    document = page['documents'][i] if page.get('documents') else ''
+                    metadata = page['metadatas'][i] if page.get('metadatas') else {}
+                    self.add(item_id, document, metadata or {})
+
+                offset += len(ids)
+                if len(ids) < self.PAGE_SIZE:
+                    break
+
+            self.loaded = True
+            logger.info(f"Knowledge tag index built with {len(self._items)} items")
+
+    def add(self, item_id: str, document: str, metadata: Dict,
+            embedding: Optional[Iterable[float]] = None) -> None:
+        """Index a single knowledge item"""
+        with self._lock:
+            self._items[item_id] = {'content': document, 'metadata': metadata}
+            self._by_category[metadata.get('category', 'general')].add(item_id)
+            for tag in split_tags(metadata.get('tags')):
+                self._by_tag[tag].add(item_id)
+            if embedding is not None:
+                self._embeddings[item_id] = np.asarray(embedding, dtype=np.float32)
+
+    def candidates(self, category: Optional[str] = None,
+                   tags: Optional[List[str]] = None) -> Optional[Set[str]]:
+        """
+        Intersect the posting sets for a category and a list of tags
+
+        Args:
+            category: Optional category the items must belong to
+            tags: Optional list of tags the items must all carry
+
+        Returns:
+            Set of matching ids, or None when no filter was given
+        """
+        with self._lock:
+            postings = []
+            if category:
+                postings.append(self._by_category.get(category, set()))
+            for tag in tags or []:
+                postings.append(self._by_tag.get(tag, set()))
+
+            if not postings:
+                return None
+
+            # Intersect smallest-first so the working set only ever shrinks
+            postings.sort(key=len)
+            result = set(postings[0])
+            for posting in postings[1:]:
+                result &= posting
+                if not result:
+                    break
+            return result
+
+    def all_ids(self) -> Set[str]:
+        with self._lock:
+            return set(self._items)
+
+    def embeddings_for(self, ids: Set[str], collection) -> Dict[str, np.ndarray]:
+        """Return embeddings for the given ids, fetching only the ones not cached yet"""
+        with self._lock:
+            missing = [item_id for item_id in ids if item_id not in self._embeddings]
+
+        CACHE_REQUESTS.labels(cache='knowledge_embeddings', result='hit').inc(len(ids) - len(missing))
+        CACHE_REQUESTS.labels(cache='knowledge_embeddings', result='miss').inc(len(missing))
+
+        if missing:
+            fetched = collection.get(ids=missing, include=["embeddings"])
+            fetched_ids = fetched.get('ids') or []
+            fetched_embeddings = fetched.get('embeddings')
+            if fetched_embeddings is not None:
+                with self._lock:
+                    for i, item_id in enumerate(fetched_ids):
+                        self._embeddings[item_id] = np.asarray(fetched_embeddings[i], dtype=np.float32)
+
+        with self._lock:
+            return {item_id: self._embeddings[item_id] for item_id in ids if item_id in self._embeddings}
+
+    def item(self, item_id: str) -> Optional[Dict]:
+        """Return the indexed document and metadata for an id"""
+        with self._lock:
+            return self._items.get(item_id)
+
+    def facets(self) -> Dict[str, Dict[str, int]]:
+        """Return item counts per category and per tag"""
+        with self._lock:
+            return {
+                'categories': {name: len(ids) for name, ids in sorted(self._by_category.items()) if ids},
+                'tags': {name: len(ids) for name, ids in sorted(self._by_tag.items()) if ids}
+            }
+
+    def browse(self, category: Optional[str] = None, tags: Optional[List[str]] = None,
+               limit: int = 20, offset: int = 0) -> Dict:
+        """
+        List knowledge items by category and/or tags without any embedding work
+
+        Returns:
+            Dictionary with the page of items and the total number of matches
+        """
+        with self._lock:
+            ids = self.candidates(category=category, tags=tags)
+            if ids is None:
+                ids = set(self._items.keys())
+
+            ordered = sorted(ids, key=lambda item_id: self._items[item_id]['metadata'].get('title', ''))
+            page = [dict(self._items[item_id], id=item_id) for item_id in ordered[offset:offset + limit]]
+            return {'items': page, 'total': len(ordered)}
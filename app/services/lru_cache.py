@@ -0,0 +1,36 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from app.services.metrics import CACHE_REQUESTS
+
+class LRUCache:
+    """Small thread-safe least-recently-used cache that reports hits and misses under a cache name"""
+
+    def __init__(self, name: str, maxsize: int = 256):
+        self.name = name
+        self.maxsize = maxsize
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[object]:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                CACHE_REQUESTS.labels(cache=self.name, result='hit').inc()
+                return self._items[key]
+        CACHE_REQUESTS.labels(cache=self.name, result='miss').inc()
+        return None
+
+    def put(self, key: Hashable, value: object) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
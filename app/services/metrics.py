@@ -0,0 +1,438 @@
+import os
+import glob
+import json
+import time
+import uuid
+import atexit
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Sequence, Optional
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from sub-millisecond CPU work up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.extend(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + '}'
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        with self._lock:
+            return self.value
+
+    def merge(self, value) -> None:
+        self.inc(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.value = 0.0
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return {'counts': list(self.counts), 'sum': self.sum}
+
+    def merge(self, value) -> None:
+        with self._lock:
+            for index, count in enumerate(value['counts'][:len(self.counts)]):
+                self.counts[index] += count
+            self.sum += value['sum']
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.sum = 0.0
+
+    @contextmanager
+    def time(self):
+        """Observe the wall-clock duration of the wrapped block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        """Return the child metric for a set of label values"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def snapshot(self) -> List:
+        """[label values, value] for every child, to be merged by another process"""
+        with self._lock:
+            children = list(self._children.items())
+        return [[list(key), child.snapshot()] for key, child in children]
+
+    def _empty(self) -> '_Metric':
+        raise NotImplementedError
+
+    def merged(self, snapshots: List[List]) -> '_Metric':
+        """A copy of this metric holding the sum of several processes' snapshots"""
+        total = self._empty()
+        for snapshot in snapshots:
+            for key, value in snapshot:
+                total.labels(**dict(zip(self.labelnames, key))).merge(value)
+        return total
+
+    def reset(self) -> None:
+        with self._lock:
+            children = list(self._children.values())
+        for child in children:
+            child.reset()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def _empty(self) -> 'Counter':
+        return Counter(self.name, self.documentation, self.labelnames)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            children = list(self._children.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in children
+        ]
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _empty(self) -> 'Histogram':
+        return Histogram(self.name, self.documentation, self.labelnames, self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            children = list(self._children.items())
+
+        lines = []
+        for key, child in children:
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, {'le': _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """
+    Holds every metric and renders them in Prometheus text exposition format.
+
+    Every process counts in its own memory. With a multiprocess_dir (one per
+    server, shared by its gunicorn workers) each process also writes its
+    values to a file of its own there every write_interval seconds, and
+    render() adds up all the files, so /metrics reports the whole server
+    whichever worker answers. Files of exited workers are kept, so counters
+    never go backwards; the directory is emptied when the server starts.
+    """
+
+    def __init__(self, multiprocess_dir: Optional[str] = None, write_interval: float = 5.0):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self.multiprocess_dir = multiprocess_dir
+        self.write_interval = write_interval
+        self._snapshot_path: Optional[str] = None
+        self._writer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _all(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def clear_multiprocess_dir(self) -> None:
+        """Remove the files of a previous server run (call once, before workers start)"""
+        if not self.multiprocess_dir:
+            return
+        os.makedirs(self.multiprocess_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(self.multiprocess_dir, 'metrics-*.json')):
+            os.remove(path)
+
+    def start_process(self) -> None:
+        """
+        Start writing this process's values to the multiprocess directory
+
+        Call in each worker after a fork: values inherited from the parent
+        are dropped, since the parent reports them itself.
+        """
+        if not self.multiprocess_dir:
+            return
+        for metric in self._all():
+            metric.reset()
+
+        os.makedirs(self.multiprocess_dir, exist_ok=True)
+        # Unique per process lifetime, so a reused pid never overwrites an exited worker's totals
+        self._snapshot_path = os.path.join(self.multiprocess_dir, f"metrics-{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+        self._stop.clear()
+        self._writer = threading.Thread(target=self._write_loop, name="metrics-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.write_snapshot)
+
+    def write_snapshot(self) -> None:
+        """Write this process's current values to its file in the multiprocess directory"""
+        if not self.multiprocess_dir:
+            return
+        if self._snapshot_path is None:
+            self._snapshot_path = os.path.join(self.multiprocess_dir, f"metrics-{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+
+        snapshot = {metric.name: metric.snapshot() for metric in self._all()}
+        temporary = f"{self._snapshot_path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(temporary, self._snapshot_path)
+
+    def _write_loop(self) -> None:
+        while not self._stop.wait(self.write_interval):
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                logger.error(f"Failed to write metrics snapshot: {e}")
+
+    def _merged(self) -> List[_Metric]:
+        """Every metric summed over the snapshot files of all processes"""
+        self.write_snapshot()
+
+        snapshots: Dict[str, List] = {}
+        for path in glob.glob(os.path.join(self.multiprocess_dir, 'metrics-*.json')):
+            try:
+                with open(path) as f:
+                    for name, samples in json.load(f).items():
+                        snapshots.setdefault(name, []).append(samples)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable metrics snapshot {path}: {e}")
+
+        return [metric.merged(snapshots.get(metric.name, [])) for metric in self._all()]
+
+    def render(self) -> str:
+        metrics = self._merged() if self.multiprocess_dir else self._all()
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Global registry and the metrics shared across services
+metrics = MetricsRegistry(
+    multiprocess_dir=os.getenv('METRICS_MULTIPROC_DIR') or None,
+    write_interval=float(os.getenv('METRICS_WRITE_INTERVAL', '5'))
+)
+
+CHAT_STAGE_SECONDS = metrics.histogram(
+    'studyhub_chat_stage_seconds',
+    'Time spent in each stage of a chat turn in seconds, excluding nested stages',
+    labelnames=('stage',)
+)
+
+_chat_turn = threading.local()
+
+@contextmanager
+def chat_turn():
+    """Time a whole chat turn as the 'total' stage; chat_stage() only records inside one"""
+    if getattr(_chat_turn, 'stages', None) is not None:
+        yield
+        return
+
+    _chat_turn.stages = []
+    try:
+        with CHAT_STAGE_SECONDS.labels(stage='total').time():
+            yield
+    finally:
+        _chat_turn.stages = None
+
+@contextmanager
+def chat_stage(stage: str):
+    """
+    Time one stage of the current chat turn
+
+    A stage records its own time only: a stage entered inside another (the
+    embed inside store, say) is subtracted from the outer one, so the stages
+    of a turn never count the same time twice. Outside a chat turn (quick
+    responses, imports, background jobs) nothing is recorded.
+    """
+    stages = getattr(_chat_turn, 'stages', None)
+    if stages is None:
+        yield
+        return
+
+    # [time spent in nested stages]
+    frame = [0.0]
+    stages.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stages.pop()
+        if stages:
+            stages[-1][0] += elapsed
+        CHAT_STAGE_SECONDS.labels(stage=stage).observe(max(elapsed - frame[0], 0.0))
+
+CACHE_REQUESTS = metrics.counter(
+    'studyhub_cache_requests_total',
+    'Cache lookups by cache and result',
+    labelnames=('cache', 'result')
+)
+
+ERRORS = metrics.counter(
+    'studyhub_errors_total',
+    'Errors by component',
+    labelnames=('component',)
+)
+
+GEMINI_TOKENS = metrics.counter(
+    'studyhub_gemini_tokens_total',
+    'Gemini token usage by kind',
+    labelnames=('kind',)
+)
+
+MODEL_REQUESTS = metrics.counter(
+    'studyhub_model_requests_total',
+    'Gemini generations by model tier and outcome',
+    labelnames=('tier', 'outcome')
+)
+
+REQUEST_GUARD = metrics.counter(
+    'studyhub_request_guard_total',
+    'Requests rejected by the rate limiter or coalesced with an identical in-flight request',
+    labelnames=('endpoint', 'action')
+)
+
+CHAT_ANSWERS = metrics.counter(
+    'studyhub_chat_answers_total',
+    'Chat answers by source (gemini or the local knowledge base)',
+    labelnames=('source',)
+)
+
+CONVERSATION_DUPLICATES = metrics.counter(
+    'studyhub_conversation_duplicates_total',
+    'Exchanges merged into a recent near-identical conversation instead of stored'
+)
+
+EMBEDDINGS_MIGRATED = metrics.counter(
+    'studyhub_embeddings_migrated_total',
+    'Rows re-embedded with the new embedding model by collection',
+    labelnames=('collection',)
+)
+
+TENANT_REQUESTS = metrics.counter(
+    'studyhub_tenant_requests_total',
+    'Requests by resolved tenant',
+    labelnames=('tenant',)
+)
+
+JOB_RUNS = metrics.counter(
+    'studyhub_job_runs_total',
+    'Background job runs by job and outcome',
+    labelnames=('job', 'outcome')
+)
+
+JOB_SECONDS = metrics.histogram(
+    'studyhub_job_seconds',
+    'Duration of background job runs in seconds',
+    labelnames=('job',),
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+)
@@ -0,0 +1,181 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import google.generativeai as genai
+
+from app.services.metrics import MODEL_REQUESTS, chat_stage
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def generative_client(api_key: str):
+    """
+    A Gemini API client bound to one API key
+
+    genai.configure sets a single process-wide key; a client of its own gives
+    a tenant its own key and connection pool. It is the generativelanguage
+    client the SDK itself is built on, configured through its public
+    client_options.
+    """
+    from google.ai import generativelanguage as glm
+
+    return glm.GenerativeServiceClient(client_options={'api_key': api_key})
+
+class KeyedGenerativeModel:
+    """
+    The part of genai.GenerativeModel the tiers use, calling a client of its
+    own (see generative_client) instead of the process-wide one
+    """
+
+    def __init__(self, model_name: str, client):
+        from google.ai import generativelanguage as glm
+
+        self._glm = glm
+        self.model_name = model_name if model_name.startswith('models/') else f'models/{model_name}'
+        self.client = client
+
+    def generate_content(self, prompt: str, request_options: Optional[Dict] = None):
+        request = self._glm.GenerateContentRequest(
+            model=self.model_name,
+            contents=[self._glm.Content(role='user', parts=[self._glm.Part(text=prompt)])]
+        )
+        response = self.client.generate_content(request, **(request_options or {}))
+        return genai.types.GenerateContentResponse.from_response(response)
+
+class ModelUnavailableError(Exception):
+    """Raised when no tier in a request's chain could produce a response"""
+
+class ModelTier:
+    """
+    One Gemini model with its own concurrency pool and request timeout.
+
+    A call waits at most acquire_timeout seconds for a free slot, so a
+    saturated tier fails fast and the router can fall back instead of
+    queueing requests behind slow generations.
+    """
+
+    def __init__(self, name: str, model_name: str, max_concurrency: int,
+                 timeout: float, acquire_timeout: float, client=None):
+        self.name = name
+        self.model_name = model_name
+        self.timeout = timeout
+        self.acquire_timeout = acquire_timeout
+        # Without a client of its own the model uses the key set by genai.configure
+        self.model = KeyedGenerativeModel(model_name, client) if client is not None else genai.GenerativeModel(model_name)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def generate(self, prompt: str):
+        """
+        Run one generation on this tier
+
+        Raises:
+            ModelUnavailableError: if no slot frees up within acquire_timeout
+        """
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise ModelUnavailableError(f"Model tier '{self.name}' is at capacity")
+
+        try:
+            with chat_stage('gemini_call'):
+                return self.model.generate_content(prompt, request_options={'timeout': self.timeout})
+        finally:
+            self._slots.release()
+
+class ModelRouter:
+    """
+    Picks a model tier per request type and prompt size, falling back along
+    the configured chain when a tier is saturated or errors. By default only
+    the fast tier falls back (to strong); a strong request that cannot be
+    served fails instead of being quietly answered by the fast model.
+
+    Request types map to a preferred tier (e.g. quick responses to "fast",
+    free chat to "strong"); prompts longer than max_fast_prompt_chars are
+    always sent to the strong tier.
+    """
+
+    def __init__(self, tiers: Dict[str, ModelTier], routes: Dict[str, str],
+                 fallbacks: Dict[str, str], max_fast_prompt_chars: int = 2000,
+                 default_tier: str = 'strong'):
+        self.tiers = tiers
+        self.routes = routes
+        self.fallbacks = fallbacks
+        self.max_fast_prompt_chars = max_fast_prompt_chars
+        self.default_tier = default_tier
+
+    @classmethod
+    def from_config(cls, config, client=None) -> 'ModelRouter':
+        """
+        Build the fast and strong tiers from the GEMINI_* settings on a config class
+
+        Args:
+            config: Config class (or subclass with a tenant's overrides)
+            client: Gemini client shared by both tiers (see generative_client)
+        """
+        tiers = {
+            'fast': ModelTier(
+                'fast', config.GEMINI_FAST_MODEL, config.GEMINI_FAST_CONCURRENCY,
+                config.GEMINI_FAST_TIMEOUT, config.GEMINI_POOL_WAIT, client
+            ),
+            'strong': ModelTier(
+                'strong', config.GEMINI_MODEL, config.GEMINI_STRONG_CONCURRENCY,
+                config.GEMINI_STRONG_TIMEOUT, config.GEMINI_POOL_WAIT, client
+            )
+        }
+        fallbacks = {'fast': 'strong'}
+        if config.GEMINI_STRONG_FALLBACK:
+            fallbacks['strong'] = 'fast'
+        return cls(
+            tiers=tiers,
+            routes=config.GEMINI_ROUTES,
+            fallbacks=fallbacks,
+            max_fast_prompt_chars=config.GEMINI_FAST_MAX_PROMPT_CHARS
+        )
+
+    def select_tier(self, request_type: str, prompt: str) -> str:
+        """Preferred tier for a request"""
+        tier = self.routes.get(request_type, self.default_tier)
+        if tier == 'fast' and len(prompt) > self.max_fast_prompt_chars:
+            return 'strong'
+        return tier
+
+    def _chain(self, tier: str) -> List[str]:
+        chain = [tier]
+        fallback = self.fallbacks.get(tier)
+        while fallback and fallback not in chain and fallback in self.tiers:
+            chain.append(fallback)
+            fallback = self.fallbacks.get(fallback)
+        return chain
+
+    def generate(self, request_type: str, prompt: str) -> Tuple[object, str]:
+        """
+        Generate with the preferred tier, falling back on capacity or API errors
+
+        Args:
+            request_type: Kind of request, e.g. "chat" or "quick"
+            prompt: The full prompt
+
+        Returns:
+            (response, name of the tier that answered)
+
+        Raises:
+            ModelUnavailableError: if every tier in the chain failed
+        """
+        last_error: Optional[Exception] = None
+
+        for tier_name in self._chain(self.select_tier(request_type, prompt)):
+            try:
+                response = self.tiers[tier_name].generate(prompt)
+                MODEL_REQUESTS.labels(tier=tier_name, outcome='ok').inc()
+                return response, tier_name
+
+            except ModelUnavailableError as e:
+                MODEL_REQUESTS.labels(tier=tier_name, outcome='saturated').inc()
+                last_error = e
+
+            except Exception as e:
+                MODEL_REQUESTS.labels(tier=tier_name, outcome='error').inc()
+                logger.error(f"Model tier '{tier_name}' failed: {e}")
+                last_error = e
+
+        raise ModelUnavailableError(f"No model tier available for '{request_type}': {last_error}")
@@ -0,0 +1,235 @@
+import os
+import json
+import random
+import hashlib
+import threading
+from datetime import date
+from typing import List, Dict, Optional
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models import Quote, QuoteOfTheDay, FavoriteQuote
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEED_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'quotes.json')
+
+class QuoteService:
+    """
+    Quotes catalog backed by the app database.
+
+    Per-category counts are cached in memory so a random pick is a single
+    (category, category_position) index lookup, and the quote of the day is
+    computed once per day, stored, and then served from memory.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._category_counts: Optional[Dict[str, int]] = None
+        self._today: Optional[Dict] = None
+
+    def seed_if_empty(self, path: str = SEED_FILE) -> int:
+        """Load the bundled quotes when the catalog is empty; returns how many were added"""
+        if db.session.query(Quote.id).first() is not None:
+            return 0
+
+        with open(path) as f:
+            quotes = json.load(f)
+
+        self._stage_quotes(quotes)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another instance starting at the same time seeded the catalog first
+            db.session.rollback()
+            logger.info("Quotes catalog was seeded by another instance")
+            return 0
+
+        self._invalidate()
+        logger.info(f"Seeded quotes catalog with {len(quotes)} quotes")
+        return len(quotes)
+
+    def add_quotes(self, quotes: List[Dict]) -> int:
+        """
+        Append quotes to the catalog
+
+        Args:
+            quotes: List of dictionaries with 'text', 'author' and 'category'
+
+        Returns:
+            Number of quotes added
+        """
+        # A concurrent insert can take the same category positions; the retry
+        # counts again and appends after it
+        for attempt in range(3):
+            self._stage_quotes(quotes)
+            try:
+                db.session.commit()
+                break
+            except IntegrityError:
+                db.session.rollback()
+                if attempt == 2:
+                    raise
+
+        self._invalidate()
+        return len(quotes)
+
+    def _stage_quotes(self, quotes: List[Dict]) -> None:
+        """Stage quotes after the current end of their categories without committing"""
+        positions = dict(
+            db.session.query(Quote.category, func.count(Quote.id)).group_by(Quote.category).all()
+        )
+
+        for item in quotes:
+            category = item.get('category', 'motivation')
+            db.session.add(Quote(
+                text=item['text'],
+                author=item.get('author') or 'Unknown',
+                category=category,
+                category_position=positions.get(category, 0)
+            ))
+            positions[category] = positions.get(category, 0) + 1
+
+    def _invalidate(self) -> None:
+        with self._lock:
+            self._category_counts = None
+            self._today = None
+
+    def category_counts(self) -> Dict[str, int]:
+        """Number of quotes per category, cached until the catalog changes"""
+        with self._lock:
+            if self._category_counts is not None:
+                return self._category_counts
+
+        counts = dict(
+            db.session.query(Quote.category, func.count(Quote.id)).group_by(Quote.category).all()
+        )
+        with self._lock:
+            self._category_counts = counts
+        return counts
+
+    def _at_position(self, category: str, position: int) -> Optional[Quote]:
+        return Quote.query.filter_by(category=category, category_position=position).first()
+
+    def _pick(self, category: Optional[str], seed: Optional[int] = None) -> Optional[Quote]:
+        counts = self.category_counts()
+        rng = random.Random(seed) if seed is not None else random
+
+        if category:
+            total = counts.get(category, 0)
+            if not total:
+                return None
+            return self._at_position(category, rng.randrange(total))
+
+        total = sum(counts.values())
+        if not total:
+            return None
+
+        # Map one draw over the whole catalog onto (category, position)
+        index = rng.randrange(total)
+        for name in sorted(counts):
+            if index < counts[name]:
+                return self._at_position(name, index)
+            index -= counts[name]
+        return None
+
+    def random_quote(self, category: Optional[str] = None) -> Optional[Dict]:
+        """Return a random quote, optionally from one category"""
+        quote = self._pick(category)
+        return quote.to_dict() if quote else None
+
+    def quote_of_the_day(self, day: Optional[date] = None) -> Optional[Dict]:
+        """Return the day's quote, picking and storing it on the first request of the day"""
+        day = day or date.today()
+
+        with self._lock:
+            if self._today and self._today['day'] == day:
+                return self._today['quote']
+
+        entry = db.session.get(QuoteOfTheDay, day)
+        if entry is None:
+            seed = int(hashlib.sha256(day.isoformat().encode()).hexdigest(), 16)
+            quote = self._pick(None, seed=seed)
+            if quote is None:
+                return None
+            entry = QuoteOfTheDay(day=day, quote_id=quote.id)
+            db.session.add(entry)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Another worker stored today's pick first; use theirs
+                db.session.rollback()
+                entry = db.session.get(QuoteOfTheDay, day)
+
+        data = entry.quote.to_dict()
+        with self._lock:
+            self._today = {'day': day, 'quote': data}
+        return data
+
+    def list_quotes(self, category: Optional[str] = None, page: int = 1, per_page: int = 20) -> Dict:
+        """Return one page of the catalog, optionally filtered by category"""
+        offset = (page - 1) * per_page
+
+        if category:
+            # Positions are dense, so a page is a range scan on the category index
+            items = Quote.query.filter(
+                Quote.category == category,
+                Quote.category_position >= offset,
+                Quote.category_position < offset + per_page
+            ).order_by(Quote.category_position).all()
+            total = self.category_counts().get(category, 0)
+        else:
+            items = Quote.query.order_by(Quote.id).offset(offset).limit(per_page).all()
+            total = sum(self.category_counts().values())
+
+        return {
+            'quotes': [quote.to_dict() for quote in items],
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': (total + per_page - 1) // per_page
+        }
+
+    def get_favorites(self, user_id: str) -> List[Dict]:
+        """Return a user's saved quotes, oldest first"""
+        # The quotes come in the same query rather than one lazy load per favorite
+        favorites = FavoriteQuote.query.options(joinedload(FavoriteQuote.quote)).filter_by(
+            user_id=user_id
+        ).order_by(FavoriteQuote.created_at).all()
+        return [favorite.to_dict() for favorite in favorites]
+
+    def add_favorite(self, user_id: str, quote_id: int) -> bool:
+        """
+        Save a quote for a user
+
+        Returns:
+            True if it was added, False if it was already saved
+
+        Raises:
+            LookupError: if the quote does not exist
+        """
+        if db.session.get(Quote, quote_id) is None:
+            raise LookupError(f"Quote {quote_id} not found")
+
+        db.session.add(FavoriteQuote(user_id=user_id, quote_id=quote_id))
+        try:
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+    def remove_favorite(self, user_id: str, quote_id: int) -> bool:
+        """Remove a saved quote; returns False if it was not saved"""
+        removed = FavoriteQuote.query.filter_by(user_id=user_id, quote_id=quote_id).delete()
+        db.session.commit()
+        return bool(removed)
+
+# Global instance
+quote_service = QuoteService()
@@ -0,0 +1,150 @@
+import json
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import UserRecord
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RECORD_KINDS = ('todo', 'calendar_event')
+
+MAX_KEY_LENGTH = 64
+MAX_PAYLOAD_BYTES = 16 * 1024
+
+def record_key(data: Dict) -> str:
+    """
+    The key a record is stored under
+
+    Records created by the pages carry an "id" of their own; anything else
+    (e.g. a hand-written import) is keyed by a hash of its content, so
+    storing the same record twice never makes a second copy.
+    """
+    record_id = data.get('id')
+    if isinstance(record_id, (str, int)) and not isinstance(record_id, bool) and str(record_id):
+        return str(record_id)[:MAX_KEY_LENGTH]
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class RecordService:
+    """
+    Server-side storage for the to-do list and calendar pages.
+
+    Each record is the JSON object the page works with, stored under the
+    page's own id. Saving is an upsert on (user, kind, key), which is also
+    what makes importing the same export twice a no-op.
+    """
+
+    def list_records(self, user_id: str, kind: str) -> List[Dict]:
+        """
+        A user's records of one kind, oldest first
+
+        Args:
+            user_id: Unique identifier for the user
+            kind: "todo" or "calendar_event"
+
+        Returns:
+            The stored JSON objects
+        """
+        records = UserRecord.query.filter_by(
+            user_id=user_id, kind=kind
+        ).order_by(UserRecord.id)
+        return [json.loads(record.payload) for record in records]
+
+    def save_record(self, user_id: str, kind: str, key: str, data: Dict) -> Dict:
+        """
+        Create or replace one record
+
+        Args:
+            user_id: Unique identifier for the user
+            kind: "todo" or "calendar_event"
+            key: The page's id for the record
+            data: The record as a JSON object
+
+        Returns:
+            The stored record
+        """
+        payload = self._payload(data)
+
+        # Two saves of a new record can race to insert it; the retry then
+        # finds the row and updates it
+        for attempt in range(2):
+            try:
+                record = UserRecord.query.filter_by(user_id=user_id, kind=kind, record_key=key).first()
+                if record is None:
+                    record = UserRecord(user_id=user_id, kind=kind, record_key=key)
+                    db.session.add(record)
+                record.payload = payload
+                record.updated_at = datetime.utcnow()
+                db.session.commit()
+                return data
+
+            except IntegrityError:
+                db.session.rollback()
+                if attempt:
+                    raise
+
+    def delete_records(self, user_id: str, kind: str, keys: List[str]) -> int:
+        """
+        Delete records by key
+
+        Returns:
+            Number of records deleted
+        """
+        if not keys:
+            return 0
+        deleted = UserRecord.query.filter(
+            UserRecord.user_id == user_id,
+            UserRecord.kind == kind,
+            UserRecord.record_key.in_(keys)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def add_missing(self, user_id: str, kind: str, records: List[Dict]) -> int:
+        """
+        Stage records whose key the user does not have yet, without committing
+
+        Records already stored (or repeated within records) are left alone,
+        so an import can be run again safely.
+
+        Returns:
+            Number of records staged
+        """
+        keyed: Dict[str, Dict] = {}
+        for data in records:
+            keyed.setdefault(record_key(data), data)
+
+        existing = {
+            key for (key,) in db.session.query(UserRecord.record_key).filter(
+                UserRecord.user_id == user_id,
+                UserRecord.kind == kind,
+                UserRecord.record_key.in_(list(keyed))
+            )
+        }
+        new_records = [
+            UserRecord(user_id=user_id, kind=kind, record_key=key, payload=self._payload(data))
+            for key, data in keyed.items() if key not in existing
+        ]
+        db.session.add_all(new_records)
+        return len(new_records)
+
+    def validate(self, data) -> Optional[str]:
+        """Return an error message for a record that cannot be stored, or None"""
+        if not isinstance(data, dict):
+            return 'record must be a JSON object'
+        if len(self._payload(data).encode('utf-8')) > MAX_PAYLOAD_BYTES:
+            return f'record must be at most {MAX_PAYLOAD_BYTES} bytes'
+        return None
+
+    def _payload(self, data: Dict) -> str:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+# Global instance
+record_service = RecordService()
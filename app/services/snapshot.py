@@ -0,0 +1,322 @@
+import os
+import io
+import json
+import time
+import shutil
+import sqlite3
+import tarfile
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Dict, Optional
+import logging
+try:
+    import fcntl
+except ImportError:  # Not on Windows; writes are then only paused within the snapshotting process
+    fcntl = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+MANIFEST_NAME = 'manifest.json'
+DATA_PREFIX = 'data/'
+
+# SQLite side files are folded into the backup copy of their database
+SQLITE_SIDE_FILES = ('-wal', '-shm', '-journal')
+
+class SnapshotError(Exception):
+    """A snapshot could not be taken, or an archive failed verification"""
+
+def write_lock_path(persist_directory: str) -> str:
+    """The lock file every process writing to a persist directory shares (kept outside it, so restores keep it)"""
+    return os.path.abspath(persist_directory) + '.write.lock'
+
+class StoreWriteLock:
+    """
+    Lock held by writes to a persist directory, shared between processes.
+
+    `with lock:` is what writers use: a reentrant lock within the process plus
+    a shared flock on the lock file, so writers in different workers don't
+    wait for each other. `with lock.exclusive():` takes the flock exclusively,
+    which waits for writes in every process using the lock file to finish and
+    keeps new ones out; snapshots hold it while they copy.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._owner = None
+        self._file = None
+
+    def owned(self) -> bool:
+        """True when the calling thread holds the lock"""
+        return self._owner == threading.get_ident()
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            if self._depth == 0 and fcntl is not None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._file = open(self.path, 'a')
+                fcntl.flock(self._file, fcntl.LOCK_SH)
+        except Exception:
+            self._close()
+            self._lock.release()
+            raise
+        self._depth += 1
+        self._owner = threading.get_ident()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0:
+            self._owner = None
+            self._close()
+        self._lock.release()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()  # Closing the file releases the flock
+            self._file = None
+
+    @contextmanager
+    def exclusive(self):
+        """Pause writes from every process sharing the lock file"""
+        with self:
+            if self._file is None:
+                yield
+                return
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_SH)
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _is_sqlite(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(16) == b'SQLite format 3\x00'
+
+def _stat_files(directory: str, names) -> Dict[str, tuple]:
+    stats = {}
+    for name in names:
+        stat = os.stat(os.path.join(directory, name))
+        stats[name] = (stat.st_size, stat.st_mtime_ns)
+    return stats
+
+def _copy_consistent_files(source: str, destination: str, names, attempts: int = 5) -> None:
+    """
+    Copy plain files that other processes may be rewriting (Chroma's HNSW
+    segment files), retrying until sizes and mtimes are unchanged across the copy
+    """
+    for attempt in range(attempts):
+        before = _stat_files(source, names)
+        for name in names:
+            shutil.copy2(os.path.join(source, name), os.path.join(destination, name))
+        if _stat_files(source, names) == before:
+            return
+        time.sleep(0.1 * (attempt + 1))
+    raise SnapshotError(f"{source} kept changing while it was copied")
+
+def _walk_files(source_dir: str):
+    """(directory, name) of every file worth copying, in os.walk order"""
+    for directory, _, filenames in os.walk(source_dir):
+        for name in filenames:
+            if name.endswith(SQLITE_SIDE_FILES) or name.endswith(('.lock', '.partial')):
+                continue
+            yield directory, name
+
+def create_snapshot(source_dir: str, output_path: str, write_lock: Optional[StoreWriteLock] = None,
+                    metadata: Optional[Dict] = None) -> Dict:
+    """
+    Write a compressed snapshot of a Chroma persist directory
+
+    The copy is taken under write_lock.exclusive(), which waits for writers
+    holding the same lock file (the app's workers, migrations) and keeps them
+    out until it is done. The prebuilt HNSW index segments are copied first
+    and the SQLite databases last, with the online backup API, so the
+    metadata never describes vectors the copied segments lack. Writers that
+    don't take the lock (another Chroma client opened by hand) are not paused,
+    and plain files are re-copied if they change underneath. The archive is a
+    tar.gz holding a manifest with a SHA-256 for every file.
+
+    Args:
+        source_dir: Chroma persist directory
+        output_path: Path of the .tar.gz to write
+        write_lock: Lock shared with the writers of source_dir
+        metadata: Extra fields recorded in the manifest
+
+    Returns:
+        The manifest written into the archive
+    """
+    if not os.path.isdir(source_dir):
+        raise SnapshotError(f"Nothing to snapshot: {source_dir} does not exist")
+
+    staging = tempfile.mkdtemp(prefix='chroma-snapshot-')
+    try:
+        with write_lock.exclusive() if write_lock is not None else nullcontext():
+            plain: Dict[str, list] = {}
+            databases = []
+            for directory, name in _walk_files(source_dir):
+                if _is_sqlite(os.path.join(directory, name)):
+                    databases.append((directory, name))
+                else:
+                    plain.setdefault(directory, []).append(name)
+
+            for directory, names in plain.items():
+                target = os.path.join(staging, os.path.relpath(directory, source_dir))
+                os.makedirs(target, exist_ok=True)
+                _copy_consistent_files(directory, target, names)
+
+            for directory, name in databases:
+                target = os.path.join(staging, os.path.relpath(directory, source_dir))
+                os.makedirs(target, exist_ok=True)
+                source_conn = sqlite3.connect(os.path.join(directory, name), timeout=30)
+                target_conn = sqlite3.connect(os.path.join(target, name))
+                try:
+                    source_conn.backup(target_conn)
+                finally:
+                    target_conn.close()
+                    source_conn.close()
+
+        files = {}
+        for directory, _, filenames in os.walk(staging):
+            for name in filenames:
+                path = os.path.join(directory, name)
+                relative = os.path.relpath(path, staging).replace(os.sep, '/')
+                files[relative] = {'sha256': _sha256(path), 'size': os.path.getsize(path)}
+
+        manifest = {
+            'version': SNAPSHOT_FORMAT_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'files': files
+        }
+        manifest.update(metadata or {})
+
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(output_dir, exist_ok=True)
+        fd, partial = tempfile.mkstemp(dir=output_dir, suffix='.partial')
+        os.close(fd)
+        try:
+            with tarfile.open(partial, 'w:gz') as archive:
+                encoded = json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+                info = tarfile.TarInfo(MANIFEST_NAME)
+                info.size = len(encoded)
+                info.mtime = int(time.time())
+                archive.addfile(info, io.BytesIO(encoded))
+                for relative in sorted(files):
+                    archive.add(os.path.join(staging, relative), arcname=DATA_PREFIX + relative)
+            os.replace(partial, output_path)
+        except Exception:
+            os.unlink(partial)
+            raise
+
+        logger.info(f"Wrote snapshot of {source_dir} to {output_path} ({len(files)} files)")
+        return manifest
+
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+def read_manifest(archive_path: str) -> Dict:
+    """Read the manifest of a snapshot archive without extracting it"""
+    with tarfile.open(archive_path, 'r:gz') as archive:
+        try:
+            member = archive.getmember(MANIFEST_NAME)
+        except KeyError:
+            raise SnapshotError(f"{archive_path} has no {MANIFEST_NAME}")
+        manifest = json.loads(archive.extractfile(member).read())
+
+    if manifest.get('version', 0) > SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version: {manifest.get('version')}")
+    return manifest
+
+def _extract_verified(archive_path: str, destination: str) -> Dict:
+    """Extract the data files into destination, checking every SHA-256 against the manifest"""
+    manifest = read_manifest(archive_path)
+    expected = manifest['files']
+    seen = set()
+
+    with tarfile.open(archive_path, 'r:gz') as archive:
+        for member in archive:
+            if member.name == MANIFEST_NAME:
+                continue
+
+            relative = member.name[len(DATA_PREFIX):] if member.name.startswith(DATA_PREFIX) else None
+            if (not member.isfile() or relative not in expected
+                    or os.path.isabs(relative) or '..' in relative.split('/')):
+                raise SnapshotError(f"Unexpected entry in snapshot: {member.name}")
+
+            path = os.path.join(destination, *relative.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            digest = hashlib.sha256()
+            with archive.extractfile(member) as source, open(path, 'wb') as target:
+                for block in iter(lambda: source.read(1024 * 1024), b''):
+                    digest.update(block)
+                    target.write(block)
+
+            if digest.hexdigest() != expected[relative]['sha256']:
+                raise SnapshotError(f"Checksum mismatch for {relative}")
+            seen.add(relative)
+
+    missing = set(expected) - seen
+    if missing:
+        raise SnapshotError(f"Snapshot is missing {len(missing)} files, e.g. {sorted(missing)[0]}")
+    return manifest
+
+def verify_snapshot(archive_path: str) -> Dict:
+    """Check every file of a snapshot against its manifest; returns the manifest"""
+    scratch = tempfile.mkdtemp(prefix='chroma-verify-')
+    try:
+        return _extract_verified(archive_path, scratch)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def restore_snapshot(archive_path: str, target_dir: str, keep_previous: bool = True) -> Dict:
+    """
+    Replace a persist directory with the contents of a snapshot
+
+    The archive is extracted and verified next to target_dir, then swapped in
+    with a rename, so a failed or corrupt restore leaves target_dir untouched.
+    The prebuilt indexes are used as they are: nothing is re-embedded.
+
+    Args:
+        archive_path: Snapshot written by create_snapshot
+        target_dir: Persist directory to replace
+        keep_previous: Move the old directory aside instead of deleting it
+
+    Returns:
+        The snapshot's manifest
+    """
+    target_dir = os.path.abspath(target_dir)
+    parent = os.path.dirname(target_dir)
+    os.makedirs(parent, exist_ok=True)
+
+    staging = tempfile.mkdtemp(prefix='.restoring-', dir=parent)
+    try:
+        manifest = _extract_verified(archive_path, staging)
+
+        if os.path.exists(target_dir):
+            previous = f"{target_dir}.previous-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            os.rename(target_dir, previous)
+            if not keep_previous:
+                shutil.rmtree(previous, ignore_errors=True)
+        os.rename(staging, target_dir)
+
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    logger.info(f"Restored {target_dir} from snapshot {archive_path} taken {manifest.get('created_at')}")
+    return manifest
@@ -0,0 +1,205 @@
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Optional
+import logging
+
+from sqlalchemy import or_, and_
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import PomodoroSession, StudyRollup
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SESSION_KINDS = ('focus', 'break')
+
+def week_start(day: date) -> date:
+    """Monday of the week containing day"""
+    return day - timedelta(days=day.weekday())
+
+class StudyStatsService:
+    """
+    Records Pomodoro sessions and keeps per-user daily and weekly rollups.
+
+    Each insert into the append-only session log adds its duration to the
+    matching day and week rollup rows in the same transaction, so reading a
+    student's stats never scans the log.
+    """
+
+    def record_session(self, user_id: str, kind: str, duration_seconds: int,
+                       ended_at: Optional[datetime] = None) -> Dict:
+        """
+        Append a completed session and update the user's rollups
+
+        Args:
+            user_id: Unique identifier for the user
+            kind: "focus" or "break"
+            duration_seconds: Length of the session
+            ended_at: When the session finished (defaults to now)
+
+        Returns:
+            The stored session as a dictionary
+        """
+        if kind not in SESSION_KINDS:
+            raise ValueError(f"Unknown session kind: {kind}")
+
+        ended_at = ended_at or datetime.now()
+
+        # A concurrent first insert for the same period can race us to the rollup
+        # row; the retry then finds the row and increments it
+        for attempt in range(2):
+            try:
+                session = self.add_session(user_id, kind, duration_seconds, ended_at)
+                db.session.commit()
+                return session.to_dict()
+
+            except IntegrityError:
+                db.session.rollback()
+                if attempt:
+                    raise
+
+    def add_session(self, user_id: str, kind: str, duration_seconds: int, ended_at: datetime) -> PomodoroSession:
+        """Stage a session and its rollup increments in the current transaction without committing"""
+        session = PomodoroSession(
+            user_id=user_id,
+            kind=kind,
+            duration_seconds=duration_seconds,
+            started_at=ended_at - timedelta(seconds=duration_seconds),
+            ended_at=ended_at
+        )
+        db.session.add(session)
+
+        day = ended_at.date()
+        self._increment(user_id, 'day', day, kind, duration_seconds)
+        self._increment(user_id, 'week', week_start(day), kind, duration_seconds)
+        return session
+
+    def _increment(self, user_id: str, period: str, period_start: date, kind: str, seconds: int) -> None:
+        sessions_column = getattr(StudyRollup, f"{kind}_sessions")
+        seconds_column = getattr(StudyRollup, f"{kind}_seconds")
+
+        updated = StudyRollup.query.filter_by(
+            user_id=user_id, period=period, period_start=period_start
+        ).update({
+            sessions_column: sessions_column + 1,
+            seconds_column: seconds_column + seconds,
+            StudyRollup.updated_at: datetime.utcnow()
+        }, synchronize_session=False)
+
+        if not updated:
+            rollup = StudyRollup(
+                user_id=user_id,
+                period=period,
+                period_start=period_start,
+                focus_sessions=0, focus_seconds=0,
+                break_sessions=0, break_seconds=0
+            )
+            setattr(rollup, f"{kind}_sessions", 1)
+            setattr(rollup, f"{kind}_seconds", seconds)
+            db.session.add(rollup)
+            db.session.flush()
+
+    def get_stats(self, user_id: str, day: Optional[date] = None) -> Dict:
+        """Today's and this week's totals for a user, read in a single query"""
+        day = day or date.today()
+
+        rows = StudyRollup.query.filter(
+            StudyRollup.user_id == user_id,
+            or_(
+                and_(StudyRollup.period == 'day', StudyRollup.period_start == day),
+                and_(StudyRollup.period == 'week', StudyRollup.period_start == week_start(day))
+            )
+        ).all()
+        by_period = {row.period: row for row in rows}
+
+        stats = {}
+        for key, period, start in (('today', 'day', day), ('week', 'week', week_start(day))):
+            row = by_period.get(period)
+            stats[key] = row.to_dict() if row else {
+                'period_start': start.isoformat(),
+                'focus_sessions': 0,
+                'focus_minutes': 0,
+                'break_sessions': 0,
+                'break_minutes': 0
+            }
+        return stats
+
+    def get_sessions(self, user_id: str, day: Optional[date] = None) -> List[Dict]:
+        """A user's sessions that ended on the given day, oldest first"""
+        day = day or date.today()
+        start = datetime.combine(day, datetime.min.time())
+
+        sessions = PomodoroSession.query.filter(
+            PomodoroSession.user_id == user_id,
+            PomodoroSession.ended_at >= start,
+            PomodoroSession.ended_at < start + timedelta(days=1)
+        ).order_by(PomodoroSession.ended_at).all()
+        return [session.to_dict() for session in sessions]
+
+    def rebuild_rollups(self, days: int = 7, today: Optional[date] = None) -> int:
+        """
+        Recompute the rollups of recent closed periods from the session log
+
+        Incremental updates keep rollups current; this repairs any that drifted
+        (e.g. a transaction that failed after its increment). Only periods that
+        have ended are touched, days before today and weeks before this one,
+        so no concurrent increment can be overwritten.
+
+        Args:
+            days: How far back to check, rounded back to a Monday so whole weeks are covered
+            today: The current day (defaults to today)
+
+        Returns:
+            Number of rollup rows corrected
+        """
+        today = today or date.today()
+        first_day = week_start(today - timedelta(days=days))
+        open_week = week_start(today)
+
+        expected = defaultdict(lambda: {'focus_sessions': 0, 'focus_seconds': 0, 'break_sessions': 0, 'break_seconds': 0})
+        sessions = PomodoroSession.query.filter(
+            PomodoroSession.ended_at >= datetime.combine(first_day, datetime.min.time()),
+            PomodoroSession.ended_at < datetime.combine(today, datetime.min.time())
+        ).yield_per(1000)
+        for session in sessions:
+            day = session.ended_at.date()
+            for period, period_start in (('day', day), ('week', week_start(day))):
+                if period == 'week' and period_start >= open_week:
+                    continue
+                totals = expected[(session.user_id, period, period_start)]
+                totals[f"{session.kind}_sessions"] += 1
+                totals[f"{session.kind}_seconds"] += session.duration_seconds
+
+        existing = StudyRollup.query.filter(
+            StudyRollup.period_start >= first_day,
+            or_(
+                and_(StudyRollup.period == 'day', StudyRollup.period_start < today),
+                and_(StudyRollup.period == 'week', StudyRollup.period_start < open_week)
+            )
+        ).all()
+
+        corrected = 0
+        for rollup in existing:
+            totals = expected.pop((rollup.user_id, rollup.period, rollup.period_start), None)
+            if totals is None:
+                db.session.delete(rollup)
+                corrected += 1
+            elif any(getattr(rollup, column) != value for column, value in totals.items()):
+                for column, value in totals.items():
+                    setattr(rollup, column, value)
+                rollup.updated_at = datetime.utcnow()
+                corrected += 1
+
+        for (user_id, period, period_start), totals in expected.items():
+            db.session.add(StudyRollup(user_id=user_id, period=period, period_start=period_start, **totals))
+            corrected += 1
+
+        db.session.commit()
+        if corrected:
+            logger.warning(f"Corrected {corrected} study rollups since {first_day}")
+        return corrected
+
+# Global instance
+study_stats_service = StudyStatsService()
@@ -0,0 +1,57 @@
+import os
+import re
+import json
+from typing import Dict
+import logging
+
+from config import Config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Requests that match no configured tenant use the global services
+DEFAULT_TENANT = 'default'
+
+# At most 27 characters, so a tenant-prefixed user id (see scoped_user_id in
+# app/services/tenants.py) fits the 64-character user_id columns
+TENANT_ID = re.compile(r'^[a-z0-9][a-z0-9_-]{0,26}$')
+
+RATE_LIMIT_SETTINGS = ('RATE_LIMIT_CAPACITY', 'RATE_LIMIT_PER_MINUTE')
+
+def load_tenants(config_path: str) -> Dict[str, Dict]:
+    """
+    Read and check the tenants file at TENANTS_CONFIG
+
+    Kept apart from the tenant registry so command-line tools can find a
+    tenant's store without loading any services.
+
+    Raises:
+        ValueError: for an invalid tenant id or an unknown setting
+    """
+    with open(config_path) as f:
+        tenants = json.load(f)
+
+    for tenant_id, settings in tenants.items():
+        if not TENANT_ID.match(tenant_id) or tenant_id == DEFAULT_TENANT:
+            raise ValueError(f"Invalid tenant id in {config_path}: {tenant_id!r}")
+        unknown = [key for key in settings.get('gemini', {}) if not key.startswith('GEMINI_') or not hasattr(Config, key)]
+        if unknown:
+            raise ValueError(f"Unknown Gemini settings for tenant {tenant_id}: {', '.join(unknown)}")
+        unknown = [key for key in settings.get('rate_limit', {}) if key not in RATE_LIMIT_SETTINGS]
+        if unknown:
+            raise ValueError(f"Unknown rate limit settings for tenant {tenant_id}: {', '.join(unknown)}")
+
+    logger.info(f"Loaded {len(tenants)} tenants from {config_path}")
+    return tenants
+
+def persist_directory(tenant_id: str, tenants: Dict[str, Dict], data_directory: str) -> str:
+    """
+    The vector store directory of a tenant
+
+    Raises:
+        KeyError: if the tenant is not configured
+    """
+    if tenant_id == DEFAULT_TENANT:
+        return os.getenv('CHROMA_PERSIST_DIRECTORY', './chroma_db')
+    return tenants[tenant_id].get('persist_directory', os.path.join(data_directory, tenant_id, 'chroma_db'))
@@ -0,0 +1,160 @@
+import os
+import threading
+from typing import Dict, List, Optional
+import logging
+
+from flask import g, has_app_context
+
+from config import Config
+from app.services.tenant_config import DEFAULT_TENANT, load_tenants, persist_directory
+from app.services.vector_service import VectorService, vector_service
+from app.services.gemini_service import GeminiService, gemini_service
+from app.services.user_profile import UserProfileService, user_profile_service
+from app.services.answer_cache import AnswerCache, answer_cache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TenantServices:
+    """The services one tenant's requests are served by"""
+
+    def __init__(self, tenant_id: str, vector_service: VectorService, gemini_service: GeminiService,
+                 user_profile_service: UserProfileService, answer_cache: AnswerCache):
+        self.tenant_id = tenant_id
+        self.vector_service = vector_service
+        self.gemini_service = gemini_service
+        self.user_profile_service = user_profile_service
+        self.answer_cache = answer_cache
+
+class TenantRegistry:
+    """
+    Schools served by one deployment, each with services of its own.
+
+    Tenants are read from the JSON file at TENANTS_CONFIG, e.g.
+
+        {"north-high": {"hosts": ["north.example.org"],
+                        "gemini_api_key_env": "NORTH_GEMINI_API_KEY",
+                        "gemini": {"GEMINI_STRONG_CONCURRENCY": 2},
+                        "rate_limit": {"RATE_LIMIT_PER_MINUTE": 60}}}
+
+    Each tenant gets its own vector store directory (and with it its own
+    collections, history index, user context and answer cache), its own
+    Gemini client and model tiers, so concurrency pools are per tenant, its
+    own profile refresher and its own rate limits. Services are created on a
+    tenant's first request. The SQL tables are shared; rows are kept apart by
+    tenant-scoped user ids (see scoped_user_id).
+    """
+
+    def __init__(self):
+        self.config_path = os.getenv('TENANTS_CONFIG')
+        self.data_directory = os.getenv('TENANT_DATA_DIRECTORY', './tenants')
+
+        self._tenants: Dict[str, Dict] = load_tenants(self.config_path) if self.config_path else {}
+        self._hosts: Dict[str, str] = {
+            host.lower(): tenant_id
+            for tenant_id, settings in self._tenants.items()
+            for host in settings.get('hosts', [])
+        }
+        self._services: Dict[str, TenantServices] = {
+            DEFAULT_TENANT: TenantServices(
+                DEFAULT_TENANT, vector_service, gemini_service, user_profile_service, answer_cache
+            )
+        }
+        self._lock = threading.Lock()
+
+    @property
+    def tenant_ids(self) -> List[str]:
+        return [DEFAULT_TENANT] + sorted(self._tenants)
+
+    def is_tenant(self, tenant_id: str) -> bool:
+        return tenant_id == DEFAULT_TENANT or tenant_id in self._tenants
+
+    def rate_limit(self, tenant_id: str) -> Dict:
+        """A tenant's RATE_LIMIT_* overrides (empty for the default tenant)"""
+        return self._tenants.get(tenant_id, {}).get('rate_limit', {})
+
+    def tenant_for_host(self, host: str) -> Optional[str]:
+        """The tenant serving a Host header (the port is ignored), or None"""
+        return self._hosts.get(host.rsplit(':', 1)[0].lower()) if host else None
+
+    def services(self, tenant_id: str) -> TenantServices:
+        """
+        A tenant's services, created on first use
+
+        Raises:
+            KeyError: if the tenant is not configured
+        """
+        services = self._services.get(tenant_id)
+        if services is not None:
+            return services
+
+        with self._lock:
+            if tenant_id not in self._services:
+                self._services[tenant_id] = self._create(tenant_id)
+            return self._services[tenant_id]
+
+    def loaded(self) -> List[TenantServices]:
+        """Services of every tenant created so far in this process, for background jobs"""
+        with self._lock:
+            return list(self._services.values())
+
+    def _create(self, tenant_id: str) -> TenantServices:
+        settings = self._tenants[tenant_id]
+
+        tenant_vector_service = VectorService(
+            persist_directory=persist_directory(tenant_id, self._tenants, self.data_directory)
+        )
+
+        # Without a key of its own the tenant shares GEMINI_API_KEY, but still
+        # has its own model tiers and concurrency limits
+        api_key_env = settings.get('gemini_api_key_env')
+        api_key = os.getenv(api_key_env) if api_key_env else None
+        if api_key_env and not api_key:
+            logger.warning(f"{api_key_env} is not set; tenant {tenant_id} uses GEMINI_API_KEY")
+        tenant_config = type(f'{tenant_id}Config', (Config,), settings.get('gemini', {}))
+        tenant_gemini_service = GeminiService(api_key=api_key, config=tenant_config)
+
+        logger.info(f"Created services for tenant {tenant_id} at {tenant_vector_service.persist_directory}")
+        return TenantServices(
+            tenant_id,
+            tenant_vector_service,
+            tenant_gemini_service,
+            UserProfileService(tenant_vector_service),
+            AnswerCache(tenant_vector_service, tenant_gemini_service)
+        )
+
+def current_tenant() -> str:
+    """The tenant resolved for the current request (see app/tenancy.py), else the default"""
+    if has_app_context():
+        return g.get('tenant', DEFAULT_TENANT)
+    return DEFAULT_TENANT
+
+def scoped_user_id(user_id: str, tenant_id: Optional[str] = None) -> str:
+    """
+    The id a user's rows are stored under within a tenant (default: the current one)
+
+    The SQL tables are shared by every tenant, and with TENANT_HEADER one
+    browser session can reach several schools, so other tenants' ids carry
+    the tenant as a prefix. The default tenant's ids are left as they are.
+    """
+    tenant_id = tenant_id or current_tenant()
+    return user_id if tenant_id == DEFAULT_TENANT else f"{tenant_id}:{user_id}"
+
+def get_services() -> TenantServices:
+    return tenant_registry.services(current_tenant())
+
+def get_vector_service() -> VectorService:
+    return get_services().vector_service
+
+def get_gemini_service() -> GeminiService:
+    return get_services().gemini_service
+
+def get_user_profile_service() -> UserProfileService:
+    return get_services().user_profile_service
+
+def get_answer_cache() -> AnswerCache:
+    return get_services().answer_cache
+
+# Global instance
+tenant_registry = TenantRegistry()
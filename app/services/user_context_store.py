@@ -0,0 +1,430 @@
+import os
+import json
+import time
+import sqlite3
+import atexit
+import hashlib
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional, Tuple, Callable
+import logging
+from datetime import datetime
+
+import numpy as np
+try:
+    import fcntl
+except ImportError:  # Not on Windows; Chroma context writes are then only serialized within a process
+    fcntl = None
+
+from app.services.metrics import CACHE_REQUESTS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ChromaUserContextBackend:
+    """
+    Stores user context as documents in the Chroma user_context collection.
+
+    Each row carries a revision in its metadata. save_many only writes rows
+    whose stored revision is still the one the caller read, holding a file
+    lock while it checks and writes, so worker processes sharing the store
+    cannot overwrite each other's updates.
+    """
+
+    def __init__(self, get_collection: Callable, embedding_dimension: int, lock_path: Optional[str] = None,
+                 write_lock=None):
+        self._get_collection = get_collection
+        self.embedding_dimension = embedding_dimension
+        self.lock_path = lock_path
+        # The vector store's write lock, so snapshots pause context writes too
+        self.write_lock = write_lock
+        self._stored_dimension: Optional[int] = None
+
+    def _placeholder_dimension(self, collection) -> int:
+        """Vector size the collection was created with, which outlives encoder model changes"""
+        if self._stored_dimension is None:
+            sample = collection.get(limit=1, include=["embeddings"])
+            embeddings = sample.get('embeddings')
+            self._stored_dimension = (
+                len(embeddings[0]) if embeddings is not None and len(embeddings) else self.embedding_dimension
+            )
+        return self._stored_dimension
+
+    def _placeholder(self, user_id: str, dimension: int) -> List[float]:
+        """
+        Fixed unit vector for a user's row
+
+        Context is only ever looked up by user_id, never by similarity, so no
+        encoder runs over the JSON blob. Rows still need distinct vectors:
+        identical all-zero ones pile onto a single HNSW point and have no
+        direction under cosine distance.
+        """
+        seed = int.from_bytes(hashlib.blake2b(user_id.encode('utf-8'), digest_size=8).digest(), 'big')
+        vector = np.random.default_rng(seed).standard_normal(dimension)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    @contextmanager
+    def _locked(self):
+        with self.write_lock or nullcontext():
+            if self.lock_path is None or fcntl is None:
+                yield
+                return
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self, user_id: str) -> Tuple[Optional[str], Optional[Dict], int]:
+        """Return the stored (document id, context, revision) for a user"""
+        results = self._get_collection().get(
+            where={"user_id": user_id},
+            include=["documents", "metadatas"]
+        )
+
+        if results and results['ids']:
+            metadata = (results.get('metadatas') or [{}])[0] or {}
+            return results['ids'][0], json.loads(results['documents'][0]), int(metadata.get('revision', 0))
+
+        return None, None, 0
+
+    def save_many(self, entries: Dict[str, Tuple[Optional[str], Dict, int]]) -> Tuple[Dict, Dict]:
+        """
+        Write several user contexts in at most three collection calls
+
+        Args:
+            entries: user id -> (document id or None, context, revision it was read at)
+
+        Returns:
+            (stored, conflicts): stored maps each written user id to its
+            (document id, new revision); conflicts maps users whose row was
+            changed by someone else to the stored (document id, context, revision)
+        """
+        collection = self._get_collection()
+        timestamp = datetime.now().isoformat()
+        updates, additions, stored, conflicts = [], [], {}, {}
+
+        with self._locked():
+            current = {}
+            existing = collection.get(where={"user_id": {"$in": list(entries)}}, include=["documents", "metadatas"])
+            for i, existing_id in enumerate(existing.get('ids') or []):
+                metadata = existing['metadatas'][i] or {}
+                current[metadata['user_id']] = (
+                    existing_id, json.loads(existing['documents'][i]), int(metadata.get('revision', 0))
+                )
+
+            for user_id, (doc_id, context_data, revision) in entries.items():
+                if user_id in current:
+                    if current[user_id][2] != revision:
+                        conflicts[user_id] = current[user_id]
+                        continue
+                    doc_id = current[user_id][0]
+                elif revision:
+                    # Deleted since it was read: write it back as a new row
+                    doc_id = None
+
+                row = (
+                    doc_id or f"user-context-{user_id}",
+                    json.dumps(context_data, default=str),
+                    {
+                        "user_id": user_id,
+                        "timestamp": timestamp,
+                        "context_keys": ",".join(context_data.keys()),
+                        "revision": revision + 1
+                    }
+                )
+                (updates if doc_id else additions).append(row)
+                stored[user_id] = (row[0], revision + 1)
+
+            if updates:
+                collection.update(
+                    ids=[row[0] for row in updates],
+                    documents=[row[1] for row in updates],
+                    metadatas=[row[2] for row in updates]
+                )
+
+            if additions:
+                dimension = self._placeholder_dimension(collection)
+                collection.upsert(
+                    ids=[row[0] for row in additions],
+                    embeddings=[self._placeholder(row[2]['user_id'], dimension) for row in additions],
+                    documents=[row[1] for row in additions],
+                    metadatas=[row[2] for row in additions]
+                )
+
+        return stored, conflicts
+
+class SQLiteUserContextBackend:
+    """Stores user context as JSON rows in a local SQLite file, with a revision per row"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS user_context ("
+                "user_id TEXT PRIMARY KEY, context TEXT NOT NULL, updated_at TEXT NOT NULL, "
+                "revision INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(user_context)")]
+            if 'revision' not in columns:
+                conn.execute("ALTER TABLE user_context ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def load(self, user_id: str) -> Tuple[Optional[str], Optional[Dict], int]:
+        """Return the stored (row key, context, revision) for a user"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT context, revision FROM user_context WHERE user_id = ?", (user_id,)
+            ).fetchone()
+
+        if row:
+            return user_id, json.loads(row[0]), row[1]
+
+        return None, None, 0
+
+    def save_many(self, entries: Dict[str, Tuple[Optional[str], Dict, int]]) -> Tuple[Dict, Dict]:
+        """
+        Write several user contexts in one transaction, skipping rows changed since they were read
+
+        Returns:
+            (stored, conflicts) as for ChromaUserContextBackend.save_many
+        """
+        timestamp = datetime.now().isoformat()
+        stored, conflicts = {}, {}
+
+        conn = self._connect()
+        try:
+            # Take the write lock before reading the revisions we compare against
+            conn.execute("BEGIN IMMEDIATE")
+            for user_id, (_, context_data, revision) in entries.items():
+                row = conn.execute(
+                    "SELECT context, revision FROM user_context WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                if row and row[1] != revision:
+                    conflicts[user_id] = (user_id, json.loads(row[0]), row[1])
+                    continue
+
+                conn.execute(
+                    "INSERT INTO user_context (user_id, context, updated_at, revision) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET context = excluded.context, "
+                    "updated_at = excluded.updated_at, revision = excluded.revision",
+                    (user_id, json.dumps(context_data, default=str), timestamp, revision + 1)
+                )
+                stored[user_id] = (user_id, revision + 1)
+            conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return stored, conflicts
+
+_MISSING = object()
+
+def merge_context(base: Optional[Dict], ours: Dict, theirs: Optional[Dict]) -> Dict:
+    """
+    Three-way merge of a user context changed here (ours) and elsewhere (theirs)
+
+    Keys we changed since base are applied on top of theirs, unless they
+    changed the same key too: then their write, which landed first, is kept.
+    """
+    base, merged = base or {}, dict(theirs or {})
+    for key in set(base) | set(ours):
+        if ours.get(key, _MISSING) == base.get(key, _MISSING):
+            continue
+        if merged.get(key, _MISSING) != base.get(key, _MISSING):
+            continue
+        if key in ours:
+            merged[key] = ours[key]
+        else:
+            merged.pop(key, None)
+    return merged
+
+class UserContextCache:
+    """
+    Write-back cache in front of a user context backend.
+
+    Reads are served from memory until the entry's TTL expires. Writes only mark
+    the entry dirty; a background thread flushes all dirty entries together every
+    flush_interval seconds, so bursts of updates for one user cost a single write,
+    and drops expired entries. The thread starts on the first get or set.
+
+    Every worker process has its own cache, so a read can lag another worker's
+    write by up to the TTL. Writes are not lost to that: the backend only
+    stores an entry if its revision is still the one this cache read, and on a
+    conflict the entry is merged with the stored context and written again.
+    """
+
+    MAX_FLUSH_ATTEMPTS = 3
+
+    def __init__(self, backend, ttl: float = 300.0, flush_interval: float = 5.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # user_id -> {'doc_id', 'data', 'base', 'revision', 'loaded_at', 'version'};
+        # base is the stored context data was derived from (None after a blind write)
+        self._entries: Dict[str, Dict] = {}
+        # user_id -> version that still needs writing
+        self._dirty: Dict[str, int] = {}
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.hits = 0
+        self.misses = 0
+
+        atexit.register(self.close)
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        """Return a copy of the user's context, loading it on a miss or after expiry"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and (user_id in self._dirty or now - entry['loaded_at'] < self.ttl):
+                self.hits += 1
+                CACHE_REQUESTS.labels(cache='user_context', result='hit').inc()
+                return dict(entry['data']) if entry['data'] is not None else None
+            self.misses += 1
+            CACHE_REQUESTS.labels(cache='user_context', result='miss').inc()
+
+        self._ensure_flusher()
+        doc_id, data, revision = self.backend.load(user_id)
+
+        with self._lock:
+            # A write that landed while we were loading wins over the stale read
+            if user_id in self._dirty:
+                data = self._entries[user_id]['data']
+            else:
+                self._entries[user_id] = {
+                    'doc_id': doc_id,
+                    'data': data,
+                    'base': data or {},
+                    'revision': revision,
+                    'loaded_at': now,
+                    'version': 0
+                }
+
+        return dict(data) if data is not None else None
+
+    def set(self, user_id: str, context_data: Dict) -> None:
+        """Replace the user's context in memory and schedule it for the next flush"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            version = entry['version'] + 1 if entry else 1
+            self._entries[user_id] = {
+                'doc_id': entry['doc_id'] if entry else None,
+                'data': dict(context_data),
+                'base': entry['base'] if entry else None,
+                'revision': entry['revision'] if entry else 0,
+                'loaded_at': time.monotonic(),
+                'version': version
+            }
+            self._dirty[user_id] = version
+
+        self._ensure_flusher()
+
+    def flush(self) -> int:
+        """
+        Write every dirty entry to the backend in one batch
+
+        Entries another process changed in the meantime are merged with the
+        stored context (see merge_context) and retried.
+
+        Returns:
+            Number of user contexts written
+        """
+        written = 0
+        with self._flush_lock:
+            for _ in range(self.MAX_FLUSH_ATTEMPTS):
+                with self._lock:
+                    if not self._dirty:
+                        break
+                    batch = {
+                        user_id: (
+                            self._entries[user_id]['doc_id'],
+                            self._entries[user_id]['data'],
+                            self._entries[user_id]['revision']
+                        )
+                        for user_id in self._dirty
+                    }
+                    versions = dict(self._dirty)
+
+                stored, conflicts = self.backend.save_many(batch)
+                written += len(stored)
+
+                with self._lock:
+                    for user_id, (doc_id, revision) in stored.items():
+                        entry = self._entries.get(user_id)
+                        if entry is not None:
+                            entry['doc_id'], entry['revision'] = doc_id, revision
+                            entry['base'] = batch[user_id][1]
+                        # Leave entries that changed again mid-flush for the next round
+                        if self._dirty.get(user_id) == versions[user_id]:
+                            del self._dirty[user_id]
+
+                    for user_id, (doc_id, theirs, revision) in conflicts.items():
+                        entry = self._entries[user_id]
+                        # After a blind write (no base) ours replaces the stored context
+                        base = entry['base'] if entry['base'] is not None else theirs
+                        merged = merge_context(base, entry['data'], theirs)
+                        entry.update(doc_id=doc_id, data=merged, base=theirs, revision=revision,
+                                     loaded_at=time.monotonic())
+                        if merged == theirs and self._dirty.get(user_id) == versions[user_id]:
+                            del self._dirty[user_id]
+
+                if conflicts:
+                    logger.info(f"Merged {len(conflicts)} user contexts changed by another process")
+                else:
+                    break
+
+        return written
+
+    def prune(self) -> None:
+        """Drop clean entries whose TTL has expired so the cache does not grow unbounded"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                user_id for user_id, entry in self._entries.items()
+                if user_id not in self._dirty and now - entry['loaded_at'] >= self.ttl
+            ]
+            for user_id in expired:
+                del self._entries[user_id]
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name="user-context-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                self.prune()
+            except Exception as e:
+                logger.error(f"Failed to flush user context: {e}")
+
+    def close(self) -> None:
+        """Stop the background flusher and write anything still pending"""
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush user context on shutdown: {e}")
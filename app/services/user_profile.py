@@ -0,0 +1,266 @@
+import os
+import re
+import atexit
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+import logging
+
+from app.services.vector_service import VectorService, vector_service as default_vector_service
+from app.services.metrics import ERRORS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Keyword -> canonical name; matched on whole words in the student's messages
+SUBJECTS = {
+    'math': 'math', 'maths': 'math', 'algebra': 'math', 'geometry': 'math', 'calculus': 'math',
+    'trigonometry': 'math', 'statistics': 'math',
+    'biology': 'biology', 'chemistry': 'chemistry', 'physics': 'physics', 'science': 'science',
+    'history': 'history', 'geography': 'geography', 'economics': 'economics',
+    'english': 'english', 'literature': 'english', 'essay': 'english', 'essays': 'english', 'writing': 'english',
+    'spanish': 'spanish', 'french': 'french', 'german': 'german', 'vocabulary': 'languages',
+    'programming': 'computer science', 'coding': 'computer science', 'computer': 'computer science',
+    'art': 'art', 'music': 'music'
+}
+
+TECHNIQUES = {
+    'pomodoro': 'pomodoro', 'active recall': 'active recall', 'spaced repetition': 'spaced repetition',
+    'flashcards': 'flashcards', 'flashcard': 'flashcards', 'mind map': 'mind mapping', 'mind mapping': 'mind mapping',
+    'feynman': 'feynman technique', 'practice test': 'practice tests', 'practice tests': 'practice tests',
+    'study group': 'study groups', 'summarizing': 'summarizing', 'outline': 'outlining', 'cornell': 'cornell notes'
+}
+
+TECHNIQUE_WORDS = {word for keyword in TECHNIQUES for word in keyword.split()}
+
+STRUGGLE = re.compile(
+    r"\b(struggl\w*|hard|difficult|confus\w*|stuck|failing|failed|fail|bad at|"
+    r"don'?t (?:understand|get)|can'?t (?:understand|focus|remember)|worried|behind)\b"
+)
+
+WORD = re.compile(r"[a-z][a-z']{3,}")
+
+STOPWORDS = {
+    'about', 'after', 'also', 'been', 'before', 'being', 'could', 'does', 'doing', 'dont', 'every', 'from',
+    'have', 'help', 'here', 'into', 'just', 'know', 'like', 'make', 'more', 'much', 'need', 'really',
+    'should', 'some', 'that', 'their', 'them', 'then', 'there', 'these', 'they', 'thing', 'things', 'think',
+    'this', 'tips', 'very', 'want', 'what', 'when', 'where', 'which', 'will', 'with', 'would', 'your',
+    'study', 'studying', 'quick', 'request', "what's", "i'm", "don't", 'give', 'good', 'best', 'better',
+    'explain', 'question', 'questions', 'understand', 'please', 'thanks', 'thank', 'okay', 'anything'
+}
+
+SECTIONS = ('subjects', 'weak_areas', 'techniques', 'topics')
+
+class UserProfileService:
+    """
+    Rolling per-user study profile: subjects, weak areas, preferred techniques
+    and recent topics, extracted from the student's messages.
+
+    Chat turns only mark the user dirty. A background refresher folds the
+    exchanges stored since the profile's last sequence number into it (older weights
+    decay so the profile follows the student) and saves it with the user
+    context. Prompts then read one small profile instead of searching the
+    whole conversation history.
+
+    Weights decay with the age of the exchanges (PROFILE_DECAY is the weight
+    kept per day), so a profile does not depend on how often it is refreshed
+    or how many batches a refresh takes.
+    """
+
+    def __init__(self, vector_service: Optional[VectorService] = None):
+        self.vector_service = vector_service or default_vector_service
+        self.refresh_interval = float(os.getenv('PROFILE_REFRESH_INTERVAL', '30'))
+        # Weight an exchange keeps per day of age
+        self.decay = float(os.getenv('PROFILE_DECAY', '0.9'))
+        self.max_items = int(os.getenv('PROFILE_MAX_ITEMS', '8'))
+        self.batch_size = int(os.getenv('PROFILE_BATCH_SIZE', '200'))
+
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        atexit.register(self.close)
+
+    def mark_dirty(self, user_id: str) -> None:
+        """Schedule a user's profile for the next incremental refresh"""
+        with self._lock:
+            self._dirty.add(user_id)
+        self._ensure_refresher()
+
+    def reset(self, user_id: str) -> None:
+        """
+        Forget a user's profile, e.g. after their history was cleared
+
+        A refresh running meanwhile sees the clear (see refresh_user) and
+        does not save its result.
+        """
+        with self._lock:
+            self._dirty.discard(user_id)
+        context = self.vector_service.get_user_context(user_id)
+        if context and 'profile' in context:
+            context.pop('profile')
+            self.vector_service.update_user_context(user_id, context)
+
+    def get_profile(self, user_id: str) -> Optional[Dict]:
+        context = self.vector_service.get_user_context(user_id) or {}
+        return context.get('profile')
+
+    def prompt_block(self, user_id: str) -> Optional[str]:
+        """The profile as one compact line for the system prompt, or None when there is nothing yet"""
+        profile = self.get_profile(user_id)
+        if not profile:
+            return None
+
+        labels = (
+            ('subjects', 'Studies'),
+            ('weak_areas', 'Finds difficult'),
+            ('techniques', 'Uses'),
+            ('topics', 'Recent topics')
+        )
+        parts = [
+            f"{label}: {', '.join(list(profile.get(section, {}))[:5])}"
+            for section, label in labels if profile.get(section)
+        ]
+        return "Student profile. " + "; ".join(parts) + "." if parts else None
+
+    def refresh(self) -> int:
+        """
+        Fold new exchanges into the profile of every dirty user
+
+        Returns:
+            Number of profiles updated
+        """
+        with self._lock:
+            users, self._dirty = self._dirty, set()
+
+        updated = 0
+        for user_id in users:
+            try:
+                if self.refresh_user(user_id):
+                    updated += 1
+            except Exception as e:
+                logger.error(f"Failed to refresh profile for user {user_id}: {e}")
+                ERRORS.labels(component='user_profile').inc()
+                with self._lock:
+                    self._dirty.add(user_id)
+        return updated
+
+    def refresh_user(self, user_id: str) -> bool:
+        """Apply the exchanges stored since the profile's last sequence number; returns False if there were none"""
+        history_index = self.vector_service.history_index
+        cleared_at = history_index.cleared_at(user_id)
+        context = self.vector_service.get_user_context(user_id) or {}
+        profile = context.get('profile') or {section: {} for section in SECTIONS}
+        now = datetime.now()
+
+        changed = False
+        # Profiles saved before the history index numbered its entries kept a (timestamp, id) position
+        if 'position' in profile:
+            position = profile.pop('position')
+            profile['seq'] = self.vector_service.history_index.seq_at(user_id, tuple(position)) if position else 0
+            changed = True
+
+        while True:
+            exchanges = self.vector_service.get_conversations_after(
+                user_id, profile.get('seq', 0), limit=self.batch_size
+            )
+            if not exchanges:
+                break
+
+            self._apply(profile, exchanges, now)
+            profile['seq'] = exchanges[-1]['seq']
+            profile['exchanges'] = profile.get('exchanges', 0) + len(exchanges)
+            changed = True
+
+            if len(exchanges) < self.batch_size:
+                break
+
+        if not changed:
+            return False
+
+        # Clearing the history takes the same per-user lock; a profile built
+        # from history cleared meanwhile is dropped rather than saved back
+        with self.vector_service.recent_conversations.user_lock(user_id):
+            if history_index.cleared_at(user_id) != cleared_at:
+                logger.info(f"History of user {user_id} was cleared during a profile refresh; dropping it")
+                return False
+            profile['updated_at'] = datetime.now().isoformat()
+            context['profile'] = profile
+            self.vector_service.update_user_context(user_id, context)
+        return True
+
+    def _age_weight(self, timestamp: Optional[str], now: datetime) -> float:
+        """Weight left after decaying from timestamp to now (1.0 if the timestamp is unusable)"""
+        try:
+            days = (now - datetime.fromisoformat(timestamp)).total_seconds() / 86400
+        except (TypeError, ValueError):
+            return 1.0
+        return self.decay ** max(0.0, days)
+
+    def _apply(self, profile: Dict, exchanges: List[Dict], now: datetime) -> None:
+        """Fold exchanges into the profile, with all weights decayed to now"""
+        seen = {section: Counter() for section in SECTIONS}
+
+        def add(section: str, names, weight: float) -> None:
+            for name in names:
+                seen[section][name] += weight
+
+        for exchange in exchanges:
+            text = exchange['user_message'].lower()
+            if text.startswith('quick request:'):
+                # Canned quick-response labels say nothing about the student
+                continue
+            weight = self._age_weight(exchange.get('timestamp'), now)
+
+            subjects = {SUBJECTS[word] for word in re.findall(r"[a-z]+", text) if word in SUBJECTS}
+            add('subjects', subjects, weight)
+            if STRUGGLE.search(text):
+                add('weak_areas', subjects, weight)
+
+            add('techniques',
+                {name for keyword, name in TECHNIQUES.items() if re.search(rf"\b{re.escape(keyword)}\b", text)}, weight)
+            # Topics are the remaining content words; subjects, techniques and
+            # struggle cues already have their own sections
+            add('topics', {
+                word for word in WORD.findall(text)
+                if word not in STOPWORDS and word not in SUBJECTS
+                and word not in TECHNIQUE_WORDS and not STRUGGLE.fullmatch(word)
+            }, weight)
+
+        # Stored weights were decayed to the previous refresh; bring them to now
+        decayed_at = profile.get('decayed_at')
+        carried = self._age_weight(decayed_at, now) if decayed_at else 1.0
+        profile['decayed_at'] = now.isoformat()
+
+        for section in SECTIONS:
+            # Decay old weights, add the new ones, keep the strongest few
+            weights = {name: weight * carried for name, weight in profile.get(section, {}).items()}
+            for name, weight in seen[section].items():
+                weights[name] = weights.get(name, 0.0) + weight
+            strongest = sorted(weights.items(), key=lambda item: (-item[1], item[0]))[:self.max_items]
+            profile[section] = {name: round(weight, 3) for name, weight in strongest if weight >= 0.05}
+
+    def _ensure_refresher(self) -> None:
+        if self._stop.is_set() or (self._refresher and self._refresher.is_alive()):
+            return
+        with self._lock:
+            if self._stop.is_set() or (self._refresher and self._refresher.is_alive()):
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, name="user-profile-refresher", daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def close(self) -> None:
+        """Stop the background refresher"""
+        self._stop.set()
+        if self._refresher and self._refresher is not threading.current_thread():
+            self._refresher.join(timeout=5)
+
+# Global instance
+user_profile_service = UserProfileService()
@@ -1,62 +1,465 @@
 import os
 import chromadb
 from chromadb.config import Settings
+try:
+    from chromadb.api.client import SharedSystemClient
+except ImportError:  # Older chromadb releases have no client system cache
+    SharedSystemClient = None
+try:
+    import fcntl
+except ImportError:  # Not on Windows; boot restores there are not serialized between processes
+    fcntl = None
 from sentence_transformers import SentenceTransformer
+import numpy as np
 import uuid
+import time
+import threading
 from typing import List, Dict, Optional
-import json
 import logging
 from datetime import datetime
+from app.services.knowledge_index import KnowledgeTagIndex
+from app.services.encoder_pool import EncoderPool, set_torch_threads
+from app.services.lru_cache import LRUCache
+from app.services.dedup import RecentConversations
+from app.services.history_index import ConversationHistoryIndex, encode_cursor, decode_cursor, decode_version
+from app.services.snapshot import StoreWriteLock, create_snapshot, restore_snapshot, write_lock_path
+from app.services.embedding_models import DEFAULT_EMBEDDING_MODEL, EmbeddingState, collection_name
+from app.services.metrics import ERRORS, CONVERSATION_DUPLICATES, chat_stage
+from app.services.user_context_store import (
+    UserContextCache,
+    ChromaUserContextBackend,
+    SQLiteUserContextBackend
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def split_conversation_document(document: str, user_message_length: Optional[int] = None):
+    """Recover (user_message, bot_response) from a stored "User: ...\\nBot: ..." document"""
+    prefix, separator = "User: ", "\nBot: "
+    if user_message_length is not None and document.startswith(prefix):
+        end = len(prefix) + int(user_message_length)
+        if document[end:end + len(separator)] == separator:
+            return document[len(prefix):end], document[end + len(separator):]
+
+    # Older rows without the length: split on the first separator
+    user_part, _, bot_part = document.partition(separator)
+    return user_part[len(prefix):] if user_part.startswith(prefix) else user_part, bot_part
+
 class VectorService:
-    def __init__(self):
-        self.persist_directory = os.getenv('CHROMA_PERSIST_DIRECTORY', './chroma_db')
+    def __init__(self, persist_directory: Optional[str] = None):
+        """
+        Args:
+            persist_directory: Directory of a tenant's vector store; every file
+                the service keeps is placed inside it, ignoring the *_PATH
+                overrides and CHROMA_RESTORE_SNAPSHOT (defaults to
+                CHROMA_PERSIST_DIRECTORY)
+        """
+        self._env_paths = persist_directory is None
+        self.persist_directory = persist_directory or os.getenv('CHROMA_PERSIST_DIRECTORY', './chroma_db')
+
+        # ChromaDB is opened on first use (or by connect()), so a server that
+        # preloads the app can fork workers before any client exists. The lock
+        # guards opening and swapping the client between request threads.
+        # Lock order: write_lock, then _connection_lock; nothing holding
+        # _connection_lock may take write_lock.
+        self.client = None
+        self._collections: Dict = {}
+        self._connection_lock = threading.RLock()
+        self._healthcheck_interval = float(os.getenv('VECTOR_HEALTHCHECK_INTERVAL', '30'))
+        self._checked_at = 0.0
+
+        # Held by every write to the persist directory, and exclusively by
+        # snapshots to pause writes from every worker
+        self.write_lock = StoreWriteLock(write_lock_path(self.persist_directory))
+        # Snapshot to restore when the node boots without a vector store of its own
+        self.restore_snapshot_path = os.getenv('CHROMA_RESTORE_SNAPSHOT') if self._env_paths else None
+
+        # EMBEDDING_MODEL is the model new vectors should use. Reads stay on the
+        # model recorded in the embedding state (read_model) until a migration
+        # has re-embedded every collection with EMBEDDING_MODEL; meanwhile
+        # writes go to both models' collections.
+        self.embedding_model = os.getenv('EMBEDDING_MODEL', DEFAULT_EMBEDDING_MODEL)
+        self.embedding_state = EmbeddingState(self._store_path('EMBEDDING_STATE_PATH', 'embedding_state.json'))
+        self.read_model = self._recorded_read_model()
+        self._state_mtime = self.embedding_state.mtime()
+        # A read model seen in the embedding state under _connection_lock,
+        # switched to once that lock is released (see _collection)
+        self._pending_read_model: Optional[str] = None
+        self._switch_lock = threading.Lock()
+        self.auto_migrate = os.getenv('EMBEDDING_MIGRATION_AUTOSTART', 'true').lower() == 'true'
+
+        # Initialize sentence transformer for embeddings: a pool of
+        # VECTOR_ENCODER_POOL_SIZE models, each used by one thread at a time
+        encoder_threads = os.getenv('VECTOR_ENCODER_THREADS')
+        if encoder_threads:
+            set_torch_threads(int(encoder_threads))
+        self._encoder_pool_size = int(os.getenv('VECTOR_ENCODER_POOL_SIZE', '1'))
+        self.encoder = self._load_encoder(self.read_model)
+        # Encoder for the model being migrated to
+        self.migration_encoder = self._load_encoder(self.embedding_model) if self.migrating else None
 
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=self.persist_directory,
-            settings=Settings(anonymized_telemetry=False)
+        # Recent query embeddings, so one chat turn encodes the user's message once
+        self.query_embeddings = LRUCache('query_embedding', int(os.getenv('VECTOR_QUERY_CACHE_SIZE', '256')))
+
+        # Window of each user's latest exchanges for near-duplicate detection at ingest
+        self.dedup_enabled = os.getenv('DEDUP_ENABLED', 'true').lower() == 'true'
+        self.recent_conversations = RecentConversations(
+            window=int(os.getenv('DEDUP_WINDOW', '20')),
+            cosine_threshold=float(os.getenv('DEDUP_COSINE_THRESHOLD', '0.9')),
+            max_distance=int(os.getenv('DEDUP_SIMHASH_DISTANCE', '3'))
         )
 
-        # Initialize sentence transformer for embeddings
-        try:
-            self.encoder = SentenceTransformer('all-MiniLM-L6-v2')
-            logger.info("Sentence transformer loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load sentence transformer: {e}")
-            self.encoder = None
+        # Tag/category index over the knowledge collection, built on first use
+        self.knowledge_index = KnowledgeTagIndex()
 
-        # Create or get collections
-        self._init_collections()
+        # Time-ordered (user, timestamp) index for paging through conversation history
+        self.history_index = ConversationHistoryIndex(
+            self._store_path('CONVERSATION_INDEX_PATH', 'conversation_index.sqlite3')
+        )
 
-    def _init_collections(self):
-        """Initialize ChromaDB collections"""
+        # In-memory user context cache with coalesced write-back
+        self.user_context_cache = UserContextCache(
+            backend=self._create_user_context_backend(),
+            ttl=float(os.getenv('USER_CONTEXT_TTL', '300')),
+            flush_interval=float(os.getenv('USER_CONTEXT_FLUSH_INTERVAL', '5'))
+        )
+
+    def _store_path(self, env_name: str, filename: str) -> str:
+        """Path of a file kept next to the vector store, overridable by env_name for the default store"""
+        path = os.path.join(self.persist_directory, filename)
+        return os.getenv(env_name, path) if self._env_paths else path
+
+    def _load_encoder(self, model: str) -> Optional[EncoderPool]:
         try:
-            # Collection for conversation history
-            self.conversations_collection = self.client.get_or_create_collection(
-                name="conversations",
-                metadata={"description": "Student conversation history"}
+            encoder = EncoderPool(
+                lambda: SentenceTransformer(model),
+                size=self._encoder_pool_size
             )
+            logger.info(f"Sentence transformer {model} loaded successfully")
+            return encoder
+        except Exception as e:
+            logger.error(f"Failed to load sentence transformer {model}: {e}")
+            return None
+
+    def _recorded_read_model(self) -> str:
+        """The embedding model the stored vectors are served from"""
+        model = self.embedding_state.load().get('active_model')
+        if model:
+            return model
+
+        # Stores created before models were recorded were all encoded with the default model
+        if os.path.exists(os.path.join(self.persist_directory, 'chroma.sqlite3')):
+            return DEFAULT_EMBEDDING_MODEL
+        return self.embedding_model
+
+    @property
+    def migrating(self) -> bool:
+        """True while stored vectors still have to be re-embedded with EMBEDDING_MODEL"""
+        return self.embedding_model != self.read_model
+
+    def connect(self) -> None:
+        """Open the ChromaDB client and collections if they are not open yet"""
+        with self._connection_lock:
+            if self.client is None:
+                if self.restore_snapshot_path:
+                    self._restore_on_boot()
+                self.client = chromadb.PersistentClient(
+                    path=self.persist_directory,
+                    settings=Settings(anonymized_telemetry=False)
+                )
+            if set(self._collection_names()) - set(self._collections):
+                self._collections = self._init_collections()
+                self._record_read_model()
+            self._checked_at = time.monotonic()
+
+            if self.migrating and self.auto_migrate:
+                from app.services.embedding_migration import migration_for
+                migration_for(self).start()
+
+    def reconnect(self) -> None:
+        """
+        Drop the current client and open a new one
+
+        Call in each worker after a fork: Chroma caches one client system per
+        path, so the cache is cleared to avoid reusing handles from the parent.
+        """
+        with self._connection_lock:
+            self.client = None
+            self._collections = {}
+
+            if SharedSystemClient is not None:
+                SharedSystemClient.clear_system_cache()
+
+            self.connect()
+
+    def _restore_on_boot(self) -> None:
+        """
+        Restore CHROMA_RESTORE_SNAPSHOT into an empty persist directory
+
+        Workers booting together take a file lock so only the first one
+        restores; the others find the restored store and use it.
+        """
+        lock_path = os.path.abspath(self.persist_directory) + '.lock'
+        with open(lock_path, 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
 
+            if os.path.exists(os.path.join(self.persist_directory, 'chroma.sqlite3')):
+                return
+
+            started = time.monotonic()
+            restore_snapshot(self.restore_snapshot_path, self.persist_directory, keep_previous=False)
+
+            # The local SQLite stores were opened in the replaced directory
+            self.history_index = ConversationHistoryIndex(self.history_index.path)
+            self.user_context_cache.backend = self._create_user_context_backend()
+            recorded_model = self._recorded_read_model()
+            if recorded_model != self.read_model:
+                self._pending_read_model = recorded_model
+            logger.info(f"Restored vector store from {self.restore_snapshot_path} in {time.monotonic() - started:.1f}s")
+
+    def snapshot(self, output_path: str) -> Dict:
+        """
+        Write a checksummed .tar.gz snapshot of the persist directory
+
+        Pending user context updates are flushed first, then writes from every
+        process sharing write_lock wait until the copy is done (see
+        create_snapshot). Restoring the snapshot loads the prebuilt indexes as
+        they are, with no re-embedding.
+
+        Args:
+            output_path: Path of the archive to write
+
+        Returns:
+            The snapshot manifest
+        """
+        self.flush_user_context()
+        return create_snapshot(
+            self.persist_directory,
+            output_path,
+            write_lock=self.write_lock,
+            metadata={
+                'chromadb_version': getattr(chromadb, '__version__', 'unknown'),
+                'embedding_model': self.read_model
+            }
+        )
+
+    def _collection_names(self) -> List[str]:
+        names = ['user_context']
+        for model in dict.fromkeys([self.read_model, self.embedding_model]):
+            names += [collection_name('conversations', model), collection_name('study_knowledge', model)]
+        return names
+
+    def _init_collections(self) -> Dict:
+        """
+        Initialize ChromaDB collections
+
+        Conversation and knowledge collections exist once per embedding model
+        in use, so vectors from different models never share an index.
+
+        Raises:
+            RuntimeError: if any collection cannot be opened; nothing is kept,
+                so the next use retries
+        """
+        descriptions = {
+            # Collection for conversation history
+            'conversations': "Student conversation history",
             # Collection for study resources and knowledge
-            self.knowledge_collection = self.client.get_or_create_collection(
-                name="study_knowledge",
-                metadata={"description": "Study tips, resources, and educational content"}
-            )
+            'study_knowledge': "Study tips, resources, and educational content"
+        }
 
-            # Collection for user context and preferences
-            self.user_context_collection = self.client.get_or_create_collection(
-                name="user_context",
-                metadata={"description": "User preferences and learning patterns"}
-            )
+        try:
+            collections = {
+                # Collection for user context and preferences
+                'user_context': self.client.get_or_create_collection(
+                    name="user_context",
+                    metadata={"description": "User preferences and learning patterns"}
+                )
+            }
+
+            for model in dict.fromkeys([self.read_model, self.embedding_model]):
+                for base, description in descriptions.items():
+                    name = collection_name(base, model)
+                    collections[name] = self.client.get_or_create_collection(
+                        name=name,
+                        metadata={"description": description, "embedding_model": model}
+                    )
 
-            logger.info("ChromaDB collections initialized successfully")
+            return collections
         except Exception as e:
             logger.error(f"Failed to initialize collections: {e}")
+            ERRORS.labels(component='vector_service').inc()
+            raise RuntimeError(f"ChromaDB collections unavailable: {e}")
+
+    def _record_read_model(self) -> None:
+        state = self.embedding_state.load()
+        if 'active_model' not in state:
+            state['active_model'] = self.read_model
+            self.embedding_state.save(state)
+            self._state_mtime = self.embedding_state.mtime()
+
+    def _refresh_embedding_state(self) -> None:
+        """Notice a migration cutover made by another process; _collection switches to it"""
+        mtime = self.embedding_state.mtime()
+        if mtime == self._state_mtime:
+            return
+        self._state_mtime = mtime
+
+        model = self.embedding_state.load().get('active_model')
+        if model and model != self.read_model:
+            self._pending_read_model = model
+
+    def _apply_pending_read_model(self) -> None:
+        """Switch to a read model noticed by the health check, unless this thread is mid-write"""
+        if self._pending_read_model is None or self.write_lock.owned():
+            return
+        # One thread loads the encoder; the others keep reading the previous model meanwhile
+        if not self._switch_lock.acquire(blocking=False):
+            return
+        try:
+            model = self._pending_read_model
+            if model is not None:
+                self.switch_read_model(model)
+        finally:
+            self._switch_lock.release()
+
+    def switch_read_model(self, model: str) -> None:
+        """
+        Serve reads from another embedding model's collections
+
+        Called once a migration has filled the model's collections. Caches
+        holding vectors of the previous model are dropped. The encoders are
+        loaded before write_lock is taken, and writes re-check read_model
+        under write_lock, so no vector of the previous model is written after
+        the cutover. Must not be called while holding _connection_lock.
+        """
+        if model == self.embedding_model and self.migration_encoder is not None:
+            encoder = self.migration_encoder
+        else:
+            encoder = self._load_encoder(model)
+        if model == self.embedding_model:
+            migration_encoder = None
+        else:
+            migration_encoder = self.migration_encoder or self._load_encoder(self.embedding_model)
+
+        with self.write_lock:
+            if self._pending_read_model == model:
+                self._pending_read_model = None
+            if model == self.read_model:
+                return
+
+            previous = self.read_model
+            self.encoder = encoder
+            self.read_model = model
+            self.migration_encoder = migration_encoder
+
+            self.query_embeddings.clear()
+            self.knowledge_index = KnowledgeTagIndex()
+            self.recent_conversations.reset()
+
+            logger.info(f"Serving embeddings from {model} (was {previous})")
+
+    def _check_health(self) -> None:
+        """Heartbeat the client every VECTOR_HEALTHCHECK_INTERVAL seconds and reconnect if it fails"""
+        with self._connection_lock:
+            if time.monotonic() - self._checked_at < self._healthcheck_interval:
+                return
+            self._refresh_embedding_state()
+            try:
+                self.client.heartbeat()
+                self._checked_at = time.monotonic()
+            except Exception as e:
+                logger.warning(f"ChromaDB heartbeat failed, reconnecting: {e}")
+                self.reconnect()
+
+    def _collection(self, name: str):
+        if self.client is not None and time.monotonic() - self._checked_at >= self._healthcheck_interval:
+            self._check_health()
+
+        # connect() and reconnect() swap in a new dict rather than changing it,
+        # so one read of the attribute is a consistent snapshot; a miss (e.g.
+        # during a reconnect) waits for the lock and reads the reopened set
+        collection = self._collections.get(name)
+        if collection is None:
+            with self._connection_lock:
+                self.connect()
+                collection = self._collections[name]
+
+        # A cutover takes write_lock, so it happens here, outside _connection_lock
+        if self._pending_read_model is not None:
+            self._apply_pending_read_model()
+        return collection
+
+    @property
+    def conversations_collection(self):
+        return self._collection(collection_name('conversations', self.read_model))
+
+    @property
+    def knowledge_collection(self):
+        return self._collection(collection_name('study_knowledge', self.read_model))
+
+    def model_collection(self, base: str, model: str):
+        """The 'conversations' or 'study_knowledge' collection of a specific embedding model"""
+        return self._collection(collection_name(base, model))
+
+    @property
+    def user_context_collection(self):
+        return self._collection('user_context')
+
+    def _create_user_context_backend(self):
+        """Pick the user context backend from USER_CONTEXT_BACKEND (chroma or sqlite)"""
+        backend = os.getenv('USER_CONTEXT_BACKEND', 'chroma').lower()
+
+        if backend == 'sqlite':
+            path = self._store_path('USER_CONTEXT_SQLITE_PATH', 'user_context.sqlite3')
+            logger.info(f"Storing user context in SQLite at {path}")
+            return SQLiteUserContextBackend(path)
+
+        dimension = self.encoder.get_sentence_embedding_dimension() if self.encoder else 384
+        return ChromaUserContextBackend(
+            lambda: self.user_context_collection,
+            dimension,
+            lock_path=os.path.abspath(self.persist_directory) + '.user_context.lock',
+            write_lock=self.write_lock
+        )
+
+    def _encode(self, text: str) -> List[float]:
+        """Embed a single text, recording the time spent in the encoder"""
+        with chat_stage('embed'):
+            return self.encoder.encode(text).tolist()
+
+    def encode_query(self, text: str) -> List[float]:
+        """Embed a search query, reusing the embedding when the same text was embedded recently"""
+        key = (self.read_model, text)
+        embedding = self.query_embeddings.get(key)
+        if embedding is None:
+            embedding = self._encode(text)
+            self.query_embeddings.put(key, embedding)
+        return embedding
+
+    def _mirror_to_migration(self, base: str, ids: List[str], documents: List[str],
+                             metadatas: List[Dict]) -> None:
+        """
+        While migrating, write the same rows to EMBEDDING_MODEL's collection
+
+        Live writes are dual-written so the re-embedding job never has to
+        catch up with them. A failure here is logged; the job fills the gap.
+        """
+        if not self.migrating:
+            return
+
+        try:
+            self.model_collection(base, self.embedding_model).upsert(
+                ids=ids,
+                embeddings=self.migration_encoder.encode(documents).tolist(),
+                documents=documents,
+                metadatas=[dict(metadata, embedding_model=self.embedding_model) for metadata in metadatas]
+            )
+        except Exception as e:
+            logger.error(f"Failed to write {base} to {self.embedding_model}: {e}")
+            ERRORS.labels(component='embedding_migration').inc()
 
     def store_conversation(self, user_id: str, user_message: str, bot_response: str,
                          conversation_context: Optional[Dict] = None) -> bool:
@@ -79,8 +482,9 @@ class VectorService:
             # Create combined text for embedding
             combined_text = f"User: {user_message}\nBot: {bot_response}"
 
-            # Generate embedding
-            embedding = self.encoder.encode(combined_text).tolist()
+            # Generate embedding (outside the locks; checked against read_model below)
+            model = self.read_model
+            embedding = self._encode(combined_text)
 
             # Prepare metadata
             metadata = {
@@ -88,26 +492,416 @@ class VectorService:
                 "timestamp": datetime.now().isoformat(),
                 "user_message_length": len(user_message),
                 "response_length": len(bot_response),
-                "conversation_type": "chat"
+                "conversation_type": "chat",
+                "embedding_model": model
             }
 
             if conversation_context:
                 metadata.update(conversation_context)
 
-            # Store in collection
-            conversation_id = str(uuid.uuid4())
-            self.conversations_collection.add(
-                ids=[conversation_id],
-                embeddings=[embedding],
-                documents=[combined_text],
-                metadatas=[metadata]
-            )
+            # Only this user's exchanges wait for each other; write_lock is held
+            # just for the writes themselves
+            with self.recent_conversations.user_lock(user_id):
+                def find_duplicate():
+                    if not self.dedup_enabled:
+                        return None
+                    return self.recent_conversations.find_duplicate(
+                        user_id, user_message, embedding, lambda: self._latest_conversations(user_id)
+                    )
+
+                duplicate = find_duplicate()
+
+                with self.write_lock:
+                    # A cutover since the message was encoded: encode it again
+                    # with the model the collection now holds
+                    if self.read_model != model:
+                        model = metadata["embedding_model"] = self.read_model
+                        embedding = self._encode(combined_text)
+                        duplicate = find_duplicate()
+
+                    # The window is per process: another worker may have deleted the
+                    # row since (e.g. cleared the history), so reload it and add instead
+                    if duplicate is not None and not self.conversations_collection.get(ids=[duplicate['id']], include=[])['ids']:
+                        self.recent_conversations.forget(user_id)
+                        duplicate = None
+
+                    # A near-copy of a recent exchange replaces that row, keeping the
+                    # newer answer, and moves it to the top of the history
+                    if duplicate is not None:
+                        conversation_id = duplicate['id']
+                        previous = duplicate['metadata']
+                        metadata['duplicate_count'] = previous.get('duplicate_count', 0) + 1
+                        metadata['first_seen'] = previous.get('first_seen', previous.get('timestamp', metadata['timestamp']))
+                        self.conversations_collection.update(
+                            ids=[conversation_id],
+                            embeddings=[embedding],
+                            documents=[combined_text],
+                            metadatas=[metadata]
+                        )
+                        self._mirror_to_migration('conversations', [conversation_id], [combined_text], [metadata])
+                        self.history_index.move(user_id, conversation_id, metadata["timestamp"])
+                        self.recent_conversations.replace(user_id, duplicate, user_message, embedding, metadata)
+                        CONVERSATION_DUPLICATES.inc()
+                        logger.info(f"Merged duplicate conversation for user {user_id}")
+                        return True
+
+                    # Store in collection
+                    conversation_id = str(uuid.uuid4())
+                    self.conversations_collection.add(
+                        ids=[conversation_id],
+                        embeddings=[embedding],
+                        documents=[combined_text],
+                        metadatas=[metadata]
+                    )
+                    self._mirror_to_migration('conversations', [conversation_id], [combined_text], [metadata])
+                    self.history_index.add(user_id, metadata["timestamp"], conversation_id)
+                    self.recent_conversations.add(user_id, conversation_id, user_message, embedding, metadata)
 
             logger.info(f"Stored conversation for user {user_id}")
             return True
 
         except Exception as e:
             logger.error(f"Failed to store conversation: {e}")
+            ERRORS.labels(component='vector_service').inc()
+            return False
+
+    def _latest_conversations(self, user_id: str) -> List[Dict]:
+        """The user's most recently stored exchanges with embeddings, oldest first, to seed the dedup window"""
+        entries = self.history_index.page(user_id, limit=self.recent_conversations.window)
+        if not entries:
+            return []
+
+        rows = self.conversations_collection.get(
+            ids=[conversation_id for _, conversation_id in entries],
+            include=["documents", "metadatas", "embeddings"]
+        )
+        latest = []
+        for conversation_id, document, metadata, embedding in zip(
+                rows['ids'], rows['documents'], rows['metadatas'], rows['embeddings']):
+            metadata = metadata or {}
+            user_message, _ = split_conversation_document(document, metadata.get('user_message_length'))
+            latest.append({
+                'id': conversation_id,
+                'user_message': user_message,
+                'embedding': embedding,
+                'metadata': metadata,
+                'timestamp': metadata.get('timestamp', '')
+            })
+        return sorted(latest, key=lambda item: item['timestamp'])
+
+    def store_conversations_batch(self, user_id: str, exchanges: List[Dict]) -> int:
+        """
+        Store many conversation exchanges with one encoder pass and one write
+
+        Each exchange's id is derived from the user, its timestamp and its text,
+        so exchanges that are already stored (e.g. from importing the same
+        export twice) are skipped rather than added again.
+
+        Args:
+            user_id: Unique identifier for the user
+            exchanges: Dictionaries with 'user_message', 'bot_response' and
+                optionally 'timestamp' and 'metadata'
+
+        Returns:
+            Number of exchanges stored
+        """
+        if not self.encoder or not exchanges:
+            return 0
+
+        keyed = {}
+        for exchange in exchanges:
+            key = '\n'.join((user_id, exchange.get('timestamp') or '', exchange['user_message'], exchange['bot_response']))
+            keyed.setdefault(str(uuid.uuid5(uuid.NAMESPACE_URL, key)), exchange)
+        existing = set(self.conversations_collection.get(ids=list(keyed), include=[])['ids'])
+        keyed = {conversation_id: exchange for conversation_id, exchange in keyed.items() if conversation_id not in existing}
+        if not keyed:
+            return 0
+
+        model = self.read_model
+        documents, metadatas = [], []
+        for exchange in keyed.values():
+            user_message = exchange['user_message']
+            bot_response = exchange['bot_response']
+
+            # Chroma metadata values must be scalars
+            metadata = {
+                key: value for key, value in (exchange.get('metadata') or {}).items()
+                if isinstance(value, (str, int, float, bool))
+            }
+            metadata.update({
+                "user_id": user_id,
+                "timestamp": exchange.get('timestamp') or datetime.now().isoformat(),
+                "user_message_length": len(user_message),
+                "response_length": len(bot_response),
+                "embedding_model": model
+            })
+            metadata.setdefault("conversation_type", "chat")
+
+            documents.append(f"User: {user_message}\nBot: {bot_response}")
+            metadatas.append(metadata)
+
+        with chat_stage('embed'):
+            embeddings = self.encoder.encode(documents).tolist()
+
+        ids = list(keyed)
+        with self.write_lock:
+            # A cutover happened while encoding: encode again with the new model
+            if self.read_model != model:
+                model = self.read_model
+                for metadata in metadatas:
+                    metadata["embedding_model"] = model
+                with chat_stage('embed'):
+                    embeddings = self.encoder.encode(documents).tolist()
+
+            # A concurrent import of the same exchanges may have stored them meanwhile
+            existing = set(self.conversations_collection.get(ids=ids, include=[])['ids'])
+            if existing:
+                rows = [row for row in zip(ids, embeddings, documents, metadatas) if row[0] not in existing]
+                if not rows:
+                    return 0
+                ids, embeddings, documents, metadatas = (list(column) for column in zip(*rows))
+            self.conversations_collection.add(
+                ids=ids,
+                embeddings=embeddings,
+                documents=documents,
+                metadatas=metadatas
+            )
+            self._mirror_to_migration('conversations', ids, documents, metadatas)
+            self.history_index.add_many([
+                (user_id, metadata["timestamp"], conversation_id)
+                for conversation_id, metadata in zip(ids, metadatas)
+            ])
+
+        logger.info(f"Stored {len(documents)} conversations for user {user_id}")
+        return len(documents)
+
+    def iter_conversations(self, user_id: str, page_size: int = 200):
+        """
+        Yield a user's stored conversations one page at a time
+
+        Args:
+            user_id: Unique identifier for the user
+            page_size: Number of rows fetched from the collection per round trip
+
+        Yields:
+            Dictionaries with 'id', 'user_message', 'bot_response', 'timestamp' and 'metadata'
+        """
+        offset = 0
+        while True:
+            page = self.conversations_collection.get(
+                where={"user_id": user_id},
+                limit=page_size,
+                offset=offset,
+                include=["documents", "metadatas"]
+            )
+            ids = page.get('ids') or []
+            if not ids:
+                return
+
+            for conversation_id, document, metadata in zip(ids, page['documents'], page['metadatas']):
+                metadata = dict(metadata or {})
+                user_message, bot_response = split_conversation_document(
+                    document, metadata.get('user_message_length')
+                )
+                for key in ('user_id', 'user_message_length', 'response_length'):
+                    metadata.pop(key, None)
+                yield {
+                    'id': conversation_id,
+                    'user_message': user_message,
+                    'bot_response': bot_response,
+                    'timestamp': metadata.pop('timestamp', None),
+                    'metadata': metadata
+                }
+
+            if len(ids) < page_size:
+                return
+            offset += page_size
+
+    def get_conversation_history(self, user_id: str, cursor: Optional[str] = None, limit: int = 20) -> Dict:
+        """
+        Page backwards through a user's stored conversations, newest first
+
+        Args:
+            user_id: Unique identifier for the user
+            cursor: next_cursor from the previous page, or None for the newest page
+            limit: Maximum number of conversations in the page
+
+        Returns:
+            Dictionary with 'conversations', 'next_cursor' (None on the last page) and 'total'
+
+        Raises:
+            ValueError: if the cursor is malformed
+        """
+        before = decode_cursor(cursor) if cursor else None
+
+        # One extra entry tells us whether an older page exists
+        entries = self.history_index.page(user_id, before=before, limit=limit + 1)
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        conversations = []
+        if entries:
+            with chat_stage('chroma_query'):
+                rows = self.conversations_collection.get(
+                    ids=[conversation_id for _, conversation_id in entries],
+                    include=["documents", "metadatas"]
+                )
+            by_id = {
+                conversation_id: (document, metadata or {})
+                for conversation_id, document, metadata in zip(rows['ids'], rows['documents'], rows['metadatas'])
+            }
+
+            for timestamp, conversation_id in entries:
+                if conversation_id not in by_id:
+                    continue
+                document, metadata = by_id[conversation_id]
+                user_message, bot_response = split_conversation_document(
+                    document, metadata.get('user_message_length')
+                )
+                conversations.append({
+                    'id': conversation_id,
+                    'user_message': user_message,
+                    'bot_response': bot_response,
+                    'timestamp': timestamp,
+                    'type': metadata.get('type', metadata.get('conversation_type', 'chat'))
+                })
+
+        return {
+            'conversations': conversations,
+            'next_cursor': encode_cursor(*entries[-1]) if has_more else None,
+            'total': self.history_index.count(user_id)
+        }
+
+    def get_conversations_after(self, user_id: str, seq: int = 0, limit: int = 100) -> List[Dict]:
+        """
+        A user's conversations written to the history index after sequence number seq, in write order
+
+        Following the sequence rather than timestamps also returns exchanges
+        stored with an older timestamp (imports, the index backfill) and
+        merged duplicates, which are written again.
+
+        Args:
+            user_id: Unique identifier for the user
+            seq: Last sequence number already seen, or 0 to start from the beginning
+            limit: Maximum number of conversations
+
+        Returns:
+            List of dictionaries with 'id', 'seq', 'timestamp', 'user_message' and 'bot_response'
+        """
+        entries = self.history_index.after(user_id, seq, limit=limit)
+        if not entries:
+            return []
+
+        rows = self.conversations_collection.get(
+            ids=[conversation_id for _, _, conversation_id in entries],
+            include=["documents", "metadatas"]
+        )
+        by_id = {
+            conversation_id: (document, metadata or {})
+            for conversation_id, document, metadata in zip(rows['ids'], rows['documents'], rows['metadatas'])
+        }
+
+        conversations = []
+        for seq, timestamp, conversation_id in entries:
+            document, metadata = by_id.get(conversation_id, ('', {}))
+            user_message, bot_response = split_conversation_document(document, metadata.get('user_message_length'))
+            conversations.append({
+                'id': conversation_id,
+                'seq': seq,
+                'timestamp': timestamp,
+                'user_message': user_message,
+                'bot_response': bot_response,
+                'type': metadata.get('type', metadata.get('conversation_type', 'chat'))
+            })
+        return conversations
+
+    def sync_conversations(self, user_id: str, since: Optional[str] = None, limit: int = 100) -> Dict:
+        """
+        Conversations a client has not seen yet, in the order they were stored
+
+        Args:
+            user_id: Unique identifier for the user
+            since: 'version' returned by the previous sync, or None for a first
+                sync, which returns only the newest page
+            limit: Maximum number of conversations
+
+        Returns:
+            Dictionary with 'conversations', the new 'version', 'has_more' (call
+            again with the new version), 'total' and, on a first sync,
+            'history_cursor' for paging further back with get_conversation_history
+
+        Raises:
+            ValueError: if since is malformed
+        """
+        if since is None:
+            # Read before the page: anything written meanwhile comes with the next sync
+            version = self.history_index.last_seq(user_id)
+            page = self.get_conversation_history(user_id, limit=limit)
+            return {
+                'conversations': page['conversations'][::-1],
+                'version': str(version),
+                'has_more': False,
+                'history_cursor': page['next_cursor'],
+                'total': page['total']
+            }
+
+        # One extra entry tells us whether the client has to sync again
+        conversations = self.get_conversations_after(user_id, decode_version(since), limit=limit + 1)
+        has_more = len(conversations) > limit
+        conversations = conversations[:limit]
+        return {
+            'conversations': [
+                conversation for conversation in conversations
+                if conversation['user_message'] or conversation['bot_response']
+            ],
+            'version': str(conversations[-1]['seq']) if conversations else since,
+            'has_more': has_more,
+            'total': self.history_index.count(user_id)
+        }
+
+    def backfill_history_index(self) -> None:
+        """Index conversations stored before the history index existed (see ConversationHistoryIndex.ensure_backfilled)"""
+        if not self.history_index.is_backfilled():
+            self.history_index.ensure_backfilled(self.conversations_collection)
+
+    def clear_conversations(self, user_id: str) -> int:
+        """
+        Delete all of a user's stored conversations
+
+        Args:
+            user_id: Unique identifier for the user
+
+        Returns:
+            Number of conversations deleted
+        """
+        try:
+            with self.recent_conversations.user_lock(user_id), self.write_lock:
+                ids = self.conversations_collection.get(where={"user_id": user_id}, include=[])['ids']
+                if ids:
+                    self.conversations_collection.delete(ids=ids)
+                if self.migrating:
+                    self.model_collection('conversations', self.embedding_model).delete(where={"user_id": user_id})
+                self.history_index.delete_user(user_id)
+                self.recent_conversations.forget(user_id)
+
+            logger.info(f"Cleared {len(ids)} conversations for user {user_id}")
+            return len(ids)
+
+        except Exception as e:
+            logger.error(f"Failed to clear conversations: {e}")
+            ERRORS.labels(component='vector_service').inc()
+            raise
+
+    def is_available(self) -> bool:
+        """True when the encoder is loaded and the store answers a heartbeat"""
+        if not self.encoder:
+            return False
+        try:
+            self.connect()
+            self.client.heartbeat()
+            return True
+        except Exception as e:
+            logger.warning(f"Vector store unavailable: {e}")
             return False
 
     def get_relevant_conversations(self, user_id: str, query: str, limit: int = 5) -> List[Dict]:
@@ -127,15 +921,16 @@ class VectorService:
 
         try:
             # Generate embedding for the query
-            query_embedding = self.encoder.encode(query).tolist()
+            query_embedding = self.encode_query(query)
 
             # Search for relevant conversations
-            results = self.conversations_collection.query(
-                query_embeddings=[query_embedding],
-                where={"user_id": user_id},
-                n_results=limit,
-                include=["documents", "metadatas", "distances"]
-            )
+            with chat_stage('chroma_query'):
+                results = self.conversations_collection.query(
+                    query_embeddings=[query_embedding],
+                    where={"user_id": user_id},
+                    n_results=limit,
+                    include=["documents", "metadatas", "distances"]
+                )
 
             relevant_conversations = []
             if results and results['documents']:
@@ -155,6 +950,7 @@ class VectorService:
 
         except Exception as e:
             logger.error(f"Failed to retrieve relevant conversations: {e}")
+            ERRORS.labels(component='vector_service').inc()
             return []
 
     def store_study_knowledge(self, title: str, content: str, category: str,
@@ -177,14 +973,16 @@ class VectorService:
         try:
             # Generate embedding for the content
             combined_text = f"{title}\n{content}"
-            embedding = self.encoder.encode(combined_text).tolist()
+            model = self.read_model
+            embedding = self._encode(combined_text)
 
             # Prepare metadata
             metadata = {
                 "title": title,
                 "category": category,
                 "timestamp": datetime.now().isoformat(),
-                "content_length": len(content)
+                "content_length": len(content),
+                "embedding_model": model
             }
 
             if tags:
@@ -192,12 +990,20 @@ class VectorService:
 
             # Store in knowledge collection
             knowledge_id = str(uuid.uuid4())
-            self.knowledge_collection.add(
-                ids=[knowledge_id],
-                embeddings=[embedding],
-                documents=[combined_text],
-                metadatas=[metadata]
-            )
+            with self.write_lock:
+                if self.read_model != model:
+                    model = metadata["embedding_model"] = self.read_model
+                    embedding = self._encode(combined_text)
+                self.knowledge_collection.add(
+                    ids=[knowledge_id],
+                    embeddings=[embedding],
+                    documents=[combined_text],
+                    metadatas=[metadata]
+                )
+                self._mirror_to_migration('study_knowledge', [knowledge_id], [combined_text], [metadata])
+
+                if self.knowledge_index.loaded:
+                    self.knowledge_index.add(knowledge_id, combined_text, metadata, embedding)
 
             logger.info(f"Stored knowledge: {title}")
             return True
@@ -206,7 +1012,8 @@ class VectorService:
             logger.error(f"Failed to store knowledge: {e}")
             return False
 
-    def search_study_knowledge(self, query: str, category: Optional[str] = None, limit: int = 3) -> List[Dict]:
+    def search_study_knowledge(self, query: str, category: Optional[str] = None, limit: int = 3,
+                               tags: Optional[List[str]] = None, in_memory: bool = False) -> List[Dict]:
         """
         Search for relevant study knowledge
 
@@ -214,6 +1021,10 @@ class VectorService:
             query: Search query
             category: Optional category filter
             limit: Maximum number of results
+            tags: Optional list of tags every result must carry
+            in_memory: Score every item against the knowledge embeddings held
+                in memory instead of querying Chroma; meant for the small
+                knowledge base searched on every chat turn
 
         Returns:
             List of relevant knowledge items
@@ -223,20 +1034,19 @@ class VectorService:
 
         try:
             # Generate embedding for the query
-            query_embedding = self.encoder.encode(query).tolist()
+            query_embedding = self.encode_query(query)
 
-            # Prepare where clause
-            where_clause = {}
-            if category:
-                where_clause["category"] = category
+            # Filtered searches only score the candidates from the tag/category index
+            if category or tags or in_memory:
+                return self._search_candidates(query_embedding, category, tags, limit)
 
             # Search for relevant knowledge
-            results = self.knowledge_collection.query(
-                query_embeddings=[query_embedding],
-                where=where_clause if where_clause else None,
-                n_results=limit,
-                include=["documents", "metadatas", "distances"]
-            )
+            with chat_stage('chroma_query'):
+                results = self.knowledge_collection.query(
+                    query_embeddings=[query_embedding],
+                    n_results=limit,
+                    include=["documents", "metadatas", "distances"]
+                )
 
             knowledge_items = []
             if results and results['documents']:
@@ -254,12 +1064,87 @@ class VectorService:
 
         except Exception as e:
             logger.error(f"Failed to search knowledge: {e}")
+            ERRORS.labels(component='vector_service').inc()
             return []
 
+    def _search_candidates(self, query_embedding: List[float], category: Optional[str],
+                           tags: Optional[List[str]], limit: int) -> List[Dict]:
+        """Score only the knowledge items that pass the category/tag filter (all of them without one)"""
+        self.knowledge_index.load(self.knowledge_collection)
+
+        candidate_ids = self.knowledge_index.candidates(category=category, tags=tags)
+        if candidate_ids is None:
+            candidate_ids = self.knowledge_index.all_ids()
+        if not candidate_ids:
+            return []
+
+        embeddings = self.knowledge_index.embeddings_for(candidate_ids, self.knowledge_collection)
+        if not embeddings:
+            return []
+
+        ids = list(embeddings.keys())
+        matrix = np.stack([embeddings[item_id] for item_id in ids])
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+
+        # Squared L2, the same distance Chroma reports for these collections
+        distances = np.sum((matrix - query_vector) ** 2, axis=1)
+        top = np.argsort(distances)[:limit]
+
+        knowledge_items = []
+        for index in top:
+            item = self.knowledge_index.item(ids[index])
+            knowledge_items.append({
+                'content': item['content'],
+                'metadata': item['metadata'],
+                'similarity': 1 - float(distances[index])
+            })
+
+        return knowledge_items
+
+    def get_knowledge_facets(self) -> Dict[str, Dict[str, int]]:
+        """
+        Count knowledge items per category and per tag
+
+        Returns:
+            Dictionary with 'categories' and 'tags' count maps
+        """
+        try:
+            self.knowledge_index.load(self.knowledge_collection)
+            return self.knowledge_index.facets()
+
+        except Exception as e:
+            logger.error(f"Failed to get knowledge facets: {e}")
+            return {'categories': {}, 'tags': {}}
+
+    def browse_study_knowledge(self, category: Optional[str] = None, tags: Optional[List[str]] = None,
+                               limit: int = 20, offset: int = 0) -> Dict:
+        """
+        List knowledge items by category and/or tags without embedding anything
+
+        Args:
+            category: Optional category filter
+            tags: Optional list of tags every item must carry
+            limit: Maximum number of items to return
+            offset: Number of items to skip
+
+        Returns:
+            Dictionary with the page of 'items' and the 'total' number of matches
+        """
+        try:
+            self.knowledge_index.load(self.knowledge_collection)
+            return self.knowledge_index.browse(category=category, tags=tags, limit=limit, offset=offset)
+
+        except Exception as e:
+            logger.error(f"Failed to browse knowledge: {e}")
+            return {'items': [], 'total': 0}
+
     def update_user_context(self, user_id: str, context_data: Dict) -> bool:
         """
         Update or create user context information
 
+        The write lands in the in-memory cache and is flushed to the backend
+        together with other pending updates on the next flush cycle.
+
         Args:
             user_id: Unique identifier for the user
             context_data: Dictionary containing user context information
@@ -268,39 +1153,7 @@ class VectorService:
             True if updated successfully, False otherwise
         """
         try:
-            # Check if user context already exists
-            existing = self.user_context_collection.get(
-                where={"user_id": user_id},
-                include=["documents", "metadatas"]
-            )
-
-            context_text = json.dumps(context_data, default=str)
-            metadata = {
-                "user_id": user_id,
-                "timestamp": datetime.now().isoformat(),
-                "context_keys": ",".join(context_data.keys())
-            }
-
-            if existing and existing['ids']:
-                # Update existing context
-                context_id = existing['ids'][0]
-                self.user_context_collection.update(
-                    ids=[context_id],
-                    documents=[context_text],
-                    metadatas=[metadata]
-                )
-            else:
-                # Create new context
-                if self.encoder:
-                    embedding = self.encoder.encode(context_text).tolist()
-                    context_id = str(uuid.uuid4())
-                    self.user_context_collection.add(
-                        ids=[context_id],
-                        embeddings=[embedding],
-                        documents=[context_text],
-                        metadatas=[metadata]
-                    )
-
+            self.user_context_cache.set(user_id, context_data)
             return True
 
         except Exception as e:
@@ -318,21 +1171,26 @@ class VectorService:
             User context dictionary or None if not found
         """
         try:
-            results = self.user_context_collection.get(
-                where={"user_id": user_id},
-                include=["documents", "metadatas"]
-            )
-
-            if results and results['documents']:
-                context_text = results['documents'][0]
-                return json.loads(context_text)
-
-            return None
+            return self.user_context_cache.get(user_id)
 
         except Exception as e:
             logger.error(f"Failed to get user context: {e}")
             return None
 
+    def flush_user_context(self) -> int:
+        """
+        Write all pending user context updates now
+
+        Returns:
+            Number of user contexts written
+        """
+        try:
+            return self.user_context_cache.flush()
+
+        except Exception as e:
+            logger.error(f"Failed to flush user context: {e}")
+            return 0
+
     def initialize_study_knowledge(self):
         """Initialize the database with basic study knowledge"""
         study_tips = [
@@ -0,0 +1,259 @@
+let events = [];
+let currentDate = new Date();
+let currentMonth = currentDate.getMonth();
+let currentYear = currentDate.getFullYear();
+
+const monthNames = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+];
+
+const categoryColors = {
+    exam: 'bg-red-500',
+    assignment: 'bg-blue-500',
+    study: 'bg-green-500',
+    extracurricular: 'bg-purple-500',
+    personal: 'bg-yellow-500'
+};
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Navigation buttons
+    document.getElementById('prev-month').addEventListener('click', () => {
+        currentMonth--;
+        if (currentMonth < 0) {
+            currentMonth = 11;
+            currentYear--;
+        }
+        generateCalendar();
+    });
+
+    document.getElementById('next-month').addEventListener('click', () => {
+        currentMonth++;
+        if (currentMonth > 11) {
+            currentMonth = 0;
+            currentYear++;
+        }
+        generateCalendar();
+    });
+
+    document.getElementById('today-btn').addEventListener('click', () => {
+        const today = new Date();
+        currentMonth = today.getMonth();
+        currentYear = today.getFullYear();
+        generateCalendar();
+    });
+
+    // Modal controls
+    document.getElementById('add-event-btn').addEventListener('click', openEventModal);
+    document.getElementById('close-modal').addEventListener('click', closeEventModal);
+    document.getElementById('cancel-event').addEventListener('click', closeEventModal);
+
+    // Event form
+    document.getElementById('event-form').addEventListener('submit', addEvent);
+
+    // Initialize
+    generateCalendar();
+    renderUpcomingEvents();
+    updateWeekStats();
+    loadEvents();
+});
+
+// Events are stored on the server, so they follow the student across browsers
+// and show up in data exports
+async function loadEvents() {
+    try {
+        await migrateLocalEvents();
+        const response = await fetch('/api/records/calendar_event');
+        const data = await response.json();
+        if (response.ok) {
+            events = data.records;
+            generateCalendar();
+            renderUpcomingEvents();
+            updateWeekStats();
+        }
+    } catch (error) {
+        console.error('Failed to load events:', error);
+    }
+}
+
+// Events saved by earlier versions of this page lived only in localStorage;
+// upload them once, keeping the local copy until every upload succeeded
+async function migrateLocalEvents() {
+    const localEvents = JSON.parse(localStorage.getItem('calendarEvents')) || [];
+    if (localEvents.length === 0) return;
+
+    const saved = await Promise.all(localEvents.map(saveEvent));
+    if (saved.every(Boolean)) {
+        localStorage.removeItem('calendarEvents');
+    }
+}
+
+async function saveEvent(event) {
+    try {
+        const response = await fetch(`/api/records/calendar_event/${event.id}`, {
+            method: 'PUT',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(event)
+        });
+        return response.ok;
+    } catch (error) {
+        console.error('Failed to save event:', error);
+        return false;
+    }
+}
+
+function generateCalendar() {
+    const firstDay = new Date(currentYear, currentMonth, 1).getDay();
+    const daysInMonth = new Date(currentYear, currentMonth + 1, 0).getDate();
+    const today = new Date();
+
+    document.getElementById('month-year').textContent = `${monthNames[currentMonth]} ${currentYear}`;
+
+    const calendarGrid = document.getElementById('calendar-grid');
+    calendarGrid.innerHTML = '';
+
+    // Add empty cells for days before month starts
+    for (let i = 0; i < firstDay; i++) {
+        const emptyDay = document.createElement('div');
+        emptyDay.className = 'calendar-day p-2 h-24 border border-gray-200';
+        calendarGrid.appendChild(emptyDay);
+    }
+
+    // Add days of the month
+    for (let day = 1; day <= daysInMonth; day++) {
+        const dayElement = document.createElement('div');
+        dayElement.className = 'calendar-day p-2 h-24 border border-gray-200 cursor-pointer hover:bg-gray-50';
+
+        const dayNumber = document.createElement('div');
+        dayNumber.className = 'text-sm font-semibold mb-1';
+        dayNumber.textContent = day;
+
+        // Highlight today
+        if (day === today.getDate() && currentMonth === today.getMonth() && currentYear === today.getFullYear()) {
+            dayNumber.classList.add('calendar-today', 'w-6', 'h-6', 'rounded-full', 'flex', 'items-center', 'justify-center');
+        }
+
+        dayElement.appendChild(dayNumber);
+
+        // Add events for this day
+        const dayEvents = events.filter(event => {
+            const eventDate = new Date(event.date);
+            return eventDate.getDate() === day &&
+                   eventDate.getMonth() === currentMonth &&
+                   eventDate.getFullYear() === currentYear;
+        });
+
+        dayEvents.slice(0, 3).forEach(event => {
+            const eventDiv = document.createElement('div');
+            eventDiv.className = `text-xs px-1 py-0.5 rounded mb-1 text-white ${categoryColors[event.category] || 'bg-gray-500'}`;
+            eventDiv.textContent = event.title.length > 10 ? event.title.substring(0, 10) + '...' : event.title;
+            dayElement.appendChild(eventDiv);
+        });
+
+        if (dayEvents.length > 3) {
+            const moreDiv = document.createElement('div');
+            moreDiv.className = 'text-xs text-gray-500';
+            moreDiv.textContent = `+${dayEvents.length - 3} more`;
+            dayElement.appendChild(moreDiv);
+        }
+
+        calendarGrid.appendChild(dayElement);
+    }
+}
+
+function openEventModal() {
+    document.getElementById('event-modal').classList.remove('hidden');
+    // Set default date to today
+    document.getElementById('event-date').value = new Date().toISOString().split('T')[0];
+}
+
+function closeEventModal() {
+    document.getElementById('event-modal').classList.add('hidden');
+    document.getElementById('event-form').reset();
+}
+
+function addEvent(e) {
+    e.preventDefault();
+
+    const event = {
+        id: Date.now(),
+        title: document.getElementById('event-title').value,
+        date: document.getElementById('event-date').value,
+        time: document.getElementById('event-time').value,
+        category: document.getElementById('event-category').value,
+        description: document.getElementById('event-description').value
+    };
+
+    events.push(event);
+    saveEvent(event);
+
+    closeEventModal();
+    generateCalendar();
+    renderUpcomingEvents();
+    updateWeekStats();
+    showNotification('Event added successfully!');
+}
+
+function renderUpcomingEvents() {
+    const container = document.getElementById('upcoming-events');
+    const now = new Date();
+    const upcomingEvents = events
+        .filter(event => new Date(event.date) >= now)
+        .sort((a, b) => new Date(a.date) - new Date(b.date))
+        .slice(0, 10);
+
+    if (upcomingEvents.length === 0) {
+        container.innerHTML = '<div class="text-gray-500 text-center py-8">No upcoming events. Add some to get started!</div>';
+        return;
+    }
+
+    container.innerHTML = upcomingEvents.map(event => `
+        <div class="border-l-4 ${categoryColors[event.category] || 'border-gray-500'} pl-4 py-3 bg-gray-50 rounded-r">
+            <div class="flex justify-between items-start">
+                <div>
+                    <h4 class="font-semibold text-gray-800">${event.title}</h4>
+                    <p class="text-sm text-gray-600">${new Date(event.date).toLocaleDateString()}</p>
+                    ${event.time ? `<p class="text-sm text-gray-600">${event.time}</p>` : ''}
+                    ${event.description ? `<p class="text-sm text-gray-700 mt-1">${event.description}</p>` : ''}
+                </div>
+                <button onclick="deleteEvent(${event.id})" class="text-red-500 hover:text-red-700">
+                    <svg class="w-4 h-4" fill="currentColor" viewBox="0 0 20 20">
+                        <path fill-rule="evenodd" d="M4.293 4.293a1 1 0 011.414 0L10 8.586l4.293-4.293a1 1 0 111.414 1.414L11.414 10l4.293 4.293a1 1 0 01-1.414 1.414L10 11.414l-4.293 4.293a1 1 0 01-1.414-1.414L8.586 10 4.293 5.707a1 1 0 010-1.414z" clip-rule="evenodd"></path>
+                    </svg>
+                </button>
+            </div>
+        </div>
+    `).join('');
+}
+
+function updateWeekStats() {
+    const now = new Date();
+    const weekStart = new Date(now.setDate(now.getDate() - now.getDay()));
+    const weekEnd = new Date(weekStart);
+    weekEnd.setDate(weekStart.getDate() + 6);
+
+    const weekEvents = events.filter(event => {
+        const eventDate = new Date(event.date);
+        return eventDate >= weekStart && eventDate <= weekEnd;
+    });
+
+    document.getElementById('week-events').textContent = weekEvents.length;
+    document.getElementById('week-exams').textContent = weekEvents.filter(e => e.category === 'exam').length;
+    document.getElementById('week-assignments').textContent = weekEvents.filter(e => e.category === 'assignment').length;
+    document.getElementById('week-study').textContent = weekEvents.filter(e => e.category === 'study').length + 'h';
+}
+
+function deleteEvent(id) {
+    events = events.filter(event => event.id !== id);
+    fetch(`/api/records/calendar_event/${id}`, { method: 'DELETE' })
+        .catch(error => console.error('Failed to delete event:', error));
+    generateCalendar();
+    renderUpcomingEvents();
+    updateWeekStats();
+    showNotification('Event deleted successfully!');
+}
+
+// Make deleteEvent global
+window.deleteEvent = deleteEvent;
@@ -0,0 +1,397 @@
+let chatHistory = [];
+let historyLoading = false;
+let historyExhausted = false;
+let syncing = null;
+
+const HISTORY_PAGE_SIZE = 20;
+
+// Conversations are kept in IndexedDB so a reload only fetches what changed
+// since the last visit (/api/chat/sync); older pages come from the local store
+// first and from /api/chat/history once it runs out
+const chatStore = {
+    db: null,
+    memory: { conversations: new Map(), meta: {} },
+
+    open() {
+        return new Promise((resolve) => {
+            if (!window.indexedDB) {
+                resolve(null);
+                return;
+            }
+            const request = indexedDB.open('studyhub-chat', 1);
+            request.onupgradeneeded = () => {
+                const db = request.result;
+                const conversations = db.createObjectStore('conversations', { keyPath: 'id' });
+                conversations.createIndex('position', ['timestamp', 'id']);
+                db.createObjectStore('meta');
+            };
+            request.onsuccess = () => {
+                this.db = request.result;
+                resolve(this.db);
+            };
+            // Private browsing and disabled storage fall back to memory
+            request.onerror = () => resolve(null);
+        });
+    },
+
+    transaction(stores, mode, work) {
+        return new Promise((resolve, reject) => {
+            const tx = this.db.transaction(stores, mode);
+            const result = work(tx);
+            tx.oncomplete = () => resolve(result.value);
+            tx.onerror = () => reject(tx.error);
+        });
+    },
+
+    async getMeta() {
+        if (!this.db) {
+            return this.memory.meta;
+        }
+        return this.transaction(['meta'], 'readonly', (tx) => {
+            const result = {};
+            const request = tx.objectStore('meta').get('sync');
+            request.onsuccess = () => { result.value = request.result || {}; };
+            return result;
+        });
+    },
+
+    async setMeta(meta) {
+        if (!this.db) {
+            this.memory.meta = meta;
+            return;
+        }
+        await this.transaction(['meta'], 'readwrite', (tx) => {
+            tx.objectStore('meta').put(meta, 'sync');
+            return {};
+        });
+    },
+
+    async put(conversations) {
+        if (!this.db) {
+            conversations.forEach(conversation => this.memory.conversations.set(conversation.id, conversation));
+            return;
+        }
+        await this.transaction(['conversations'], 'readwrite', (tx) => {
+            const store = tx.objectStore('conversations');
+            conversations.forEach(conversation => store.put(conversation));
+            return {};
+        });
+    },
+
+    async clear() {
+        if (!this.db) {
+            this.memory = { conversations: new Map(), meta: {} };
+            return;
+        }
+        await this.transaction(['conversations', 'meta'], 'readwrite', (tx) => {
+            tx.objectStore('conversations').clear();
+            tx.objectStore('meta').clear();
+            return {};
+        });
+    },
+
+    // Newest conversations first, older than the given one if any
+    async page(before, limit) {
+        if (!this.db) {
+            return Array.from(this.memory.conversations.values())
+                .filter(conversation => !before || comparePosition(conversation, before) < 0)
+                .sort((a, b) => comparePosition(b, a))
+                .slice(0, limit);
+        }
+        return this.transaction(['conversations'], 'readonly', (tx) => {
+            const result = { value: [] };
+            const range = before ? IDBKeyRange.upperBound([before.timestamp, before.id], true) : null;
+            const request = tx.objectStore('conversations').index('position').openCursor(range, 'prev');
+            request.onsuccess = () => {
+                const cursor = request.result;
+                if (cursor && result.value.length < limit) {
+                    result.value.push(cursor.value);
+                    cursor.continue();
+                }
+            };
+            return result;
+        });
+    }
+};
+
+function comparePosition(a, b) {
+    if (a.timestamp !== b.timestamp) {
+        return a.timestamp < b.timestamp ? -1 : 1;
+    }
+    return a.id < b.id ? -1 : (a.id > b.id ? 1 : 0);
+}
+
+document.addEventListener('DOMContentLoaded', async function() {
+    // Add welcome message
+    addMessage("Hello! I'm StudyBot, your AI study assistant powered by GEMINI. I'm here to help you with studying, time management, motivation, and any academic questions you might have. How can I assist you today?", false);
+
+    // Quick question buttons
+    document.querySelectorAll('.quick-question').forEach(btn => {
+        btn.addEventListener('click', () => {
+            const question = btn.getAttribute('data-question');
+            document.getElementById('chat-input').value = question;
+            sendMessage(question);
+        });
+    });
+
+    // Show what is stored locally straight away, then fetch what changed and
+    // load older pages as the list is scrolled
+    await chatStore.open();
+    await loadChatHistory();
+    syncChat(true);
+    document.getElementById('chat-history').addEventListener('scroll', (e) => {
+        const container = e.target;
+        if (container.scrollTop + container.clientHeight >= container.scrollHeight - 40) {
+            loadChatHistory();
+        }
+    });
+});
+
+function addMessage(message, isUser = false) {
+    const messagesContainer = document.getElementById('chat-messages');
+    const messageElement = document.createElement('div');
+    messageElement.className = `chat-message mb-4 ${isUser ? 'text-right' : 'text-left'}`;
+
+    const messageContent = document.createElement('div');
+    messageContent.className = `inline-block max-w-xs lg:max-w-md px-4 py-3 rounded-lg ${
+        isUser
+            ? 'bg-primary text-white rounded-br-none'
+            : 'bg-gray-100 text-gray-800 rounded-bl-none shadow'
+    }`;
+
+    // Handle longer messages by wrapping text properly
+    messageContent.style.whiteSpace = 'pre-wrap';
+    messageContent.textContent = message;
+
+    messageElement.appendChild(messageContent);
+    messagesContainer.appendChild(messageElement);
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+
+    // Save to history if it's a user message
+    if (isUser) {
+        const conversation = {
+            id: `pending-${Date.now()}`,
+            pending: true,
+            user_message: message,
+            timestamp: new Date().toISOString(),
+            preview: message.length > 50 ? message.substring(0, 50) + '...' : message
+        };
+        chatHistory.unshift(conversation);
+        renderChatHistory();
+    }
+}
+
+async function sendMessage(message) {
+    try {
+        // Show user message immediately
+        addMessage(message, true);
+
+        // Show typing indicator
+        showTypingIndicator();
+
+        // Send request to backend
+        const response = await fetch('/api/chat', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ message: message })
+        });
+
+        const data = await response.json();
+
+        // Hide typing indicator
+        hideTypingIndicator();
+
+        if (response.ok) {
+            // Add AI response and pick up the stored exchange
+            addMessage(data.response, false);
+            syncChat();
+        } else {
+            // Handle error
+            addMessage(data.error || 'Sorry, I encountered an error. Please try again.', false);
+        }
+
+    } catch (error) {
+        hideTypingIndicator();
+        addMessage('Sorry, I\'m having trouble connecting right now. Please check your internet connection and try again.', false);
+        console.error('Chat error:', error);
+    }
+}
+
+async function loadChatHistory() {
+    if (historyLoading || historyExhausted) {
+        return;
+    }
+    historyLoading = true;
+
+    try {
+        const stored = chatHistory.filter(chat => !chat.pending);
+        const oldest = stored[stored.length - 1];
+        let page = await chatStore.page(oldest, HISTORY_PAGE_SIZE);
+
+        // Past the start of the local store: fetch older pages from the server
+        if (page.length === 0 && oldest) {
+            const meta = await chatStore.getMeta();
+            if (!meta.history_cursor) {
+                historyExhausted = true;
+                return;
+            }
+
+            const params = new URLSearchParams({ limit: HISTORY_PAGE_SIZE, cursor: meta.history_cursor });
+            const response = await fetch(`/api/chat/history?${params}`);
+            const data = await response.json();
+            if (!response.ok || !data.history) {
+                return;
+            }
+
+            await chatStore.put(data.history);
+            await chatStore.setMeta(Object.assign(meta, { history_cursor: data.next_cursor }));
+            page = data.history;
+        }
+
+        chatHistory = chatHistory.concat(page);
+        renderChatHistory();
+    } catch (error) {
+        console.error('Failed to load chat history:', error);
+    } finally {
+        historyLoading = false;
+    }
+}
+
+function syncChat(showStatus = false) {
+    // Chain syncs so two never apply the same delta
+    syncing = (syncing || Promise.resolve()).then(() => runSync(showStatus));
+    return syncing;
+}
+
+async function runSync(showStatus) {
+    try {
+        let meta = await chatStore.getMeta();
+        let added = [];
+        let data;
+
+        while (true) {
+            const params = new URLSearchParams({ limit: 100 });
+            if (meta.version) {
+                params.set('since', meta.version);
+            }
+
+            const response = await fetch(`/api/chat/sync?${params}`);
+            data = await response.json();
+            if (!response.ok && !(response.status === 400 && meta.version)) {
+                return;
+            }
+
+            // A version the server no longer understands, or another session's
+            // conversations in the store: start over
+            if (!response.ok || (meta.user_key && meta.user_key !== data.user_key)) {
+                await chatStore.clear();
+                meta = {};
+                chatHistory = [];
+                added = [];
+                continue;
+            }
+
+            await chatStore.put(data.conversations);
+            added = added.concat(data.conversations);
+            meta = Object.assign(meta, { user_key: data.user_key, version: data.version });
+            if ('history_cursor' in data) {
+                meta.history_cursor = data.history_cursor;
+            }
+            await chatStore.setMeta(meta);
+            if (!data.has_more) {
+                break;
+            }
+        }
+
+        if (showStatus && !data.status.gemini_configured) {
+            addMessage('⚠️ GEMINI AI is not configured. Please set your API key in the .env file for full functionality.', false);
+        }
+
+        if (added.length) {
+            // A sync can bring back a conversation already shown (a merged
+            // duplicate) or one older than the newest (an import): show the
+            // latest copy in its place, and leave anything older than the
+            // loaded window to paging through the local store
+            const synced = new Map(added.map(chat => [chat.id, chat]));
+            const shown = chatHistory.filter(chat => !chat.pending && !synced.has(chat.id));
+            const oldest = shown[shown.length - 1];
+            const fresh = [...synced.values()].filter(chat => !oldest || comparePosition(chat, oldest) > 0);
+            chatHistory = fresh.concat(shown).sort((a, b) => comparePosition(b, a));
+            renderChatHistory();
+        }
+        historyExhausted = false;
+    } catch (error) {
+        console.error('Failed to sync chat:', error);
+    }
+}
+
+function showTypingIndicator() {
+    const messagesContainer = document.getElementById('chat-messages');
+    const typingElement = document.createElement('div');
+    typingElement.id = 'typing-message';
+    typingElement.className = 'chat-message mb-4 text-left';
+    typingElement.innerHTML = `
+        <div class="inline-block bg-gray-100 px-4 py-3 rounded-lg rounded-bl-none shadow">
+            <div class="flex items-center space-x-1">
+                <div class="loading-spinner w-2 h-2 bg-gray-400 rounded-full"></div>
+                <div class="loading-spinner w-2 h-2 bg-gray-400 rounded-full" style="animation-delay: 0.1s"></div>
+                <div class="loading-spinner w-2 h-2 bg-gray-400 rounded-full" style="animation-delay: 0.2s"></div>
+                <span class="text-sm text-gray-500 ml-2">StudyBot is typing...</span>
+            </div>
+        </div>
+    `;
+    messagesContainer.appendChild(typingElement);
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+}
+
+function hideTypingIndicator() {
+    const typingElement = document.getElementById('typing-message');
+    if (typingElement) {
+        typingElement.remove();
+    }
+}
+
+function renderChatHistory() {
+    const container = document.getElementById('chat-history');
+
+    if (chatHistory.length === 0) {
+        container.innerHTML = '<div class="text-gray-500 text-center py-8">Start a conversation to see your chat history here.</div>';
+        return;
+    }
+
+    container.innerHTML = chatHistory.map((chat, index) => `
+        <div class="p-3 bg-gray-50 rounded-lg cursor-pointer hover:bg-gray-100 transition-colors"
+             onclick="reloadConversation(${index})">
+            <div class="font-medium text-sm text-gray-800">${escapeHtml(chat.preview)}</div>
+            <div class="text-xs text-gray-500 mt-1">${new Date(chat.timestamp).toLocaleString()}</div>
+        </div>
+    `).join('');
+}
+
+function escapeHtml(text) {
+    const element = document.createElement('div');
+    element.textContent = text;
+    return element.innerHTML;
+}
+
+function reloadConversation(index) {
+    document.getElementById('chat-input').value = chatHistory[index].user_message;
+    document.getElementById('chat-input').focus();
+}
+
+// Chat form submission
+document.getElementById('chat-form').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const chatInput = document.getElementById('chat-input');
+    if (chatInput && chatInput.value.trim()) {
+        const message = chatInput.value.trim();
+        chatInput.value = '';
+        await sendMessage(message);
+    }
+});
+
+// Make reloadConversation global
+window.reloadConversation = reloadConversation;
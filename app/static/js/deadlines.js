@@ -0,0 +1,35 @@
+// Enhanced deadline functionality
+document.addEventListener('DOMContentLoaded', function() {
+    // Filter functionality
+    const filterButtons = document.querySelectorAll('.filter-btn');
+    filterButtons.forEach(btn => {
+        btn.addEventListener('click', () => {
+            // Update active button
+            filterButtons.forEach(b => {
+                b.classList.remove('active', 'bg-primary', 'text-white');
+                b.classList.add('bg-gray-200', 'text-gray-700');
+            });
+            btn.classList.add('active', 'bg-primary', 'text-white');
+            btn.classList.remove('bg-gray-200', 'text-gray-700');
+
+            // Filter deadlines (would be implemented with your data)
+            const filter = btn.getAttribute('data-filter');
+            filterDeadlines(filter);
+        });
+    });
+
+    function filterDeadlines(filter) {
+        // This would filter the displayed deadlines based on the selected filter
+        console.log('Filtering by:', filter);
+    }
+
+    // Update overview counts
+    updateOverviewCounts();
+});
+
+function updateOverviewCounts() {
+    // These would be calculated from actual deadline data
+    document.getElementById('urgent-count').textContent = Math.floor(Math.random() * 5) + 1;
+    document.getElementById('upcoming-count').textContent = Math.floor(Math.random() * 8) + 2;
+    document.getElementById('completed-count').textContent = Math.floor(Math.random() * 12) + 5;
+}
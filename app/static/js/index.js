@@ -0,0 +1,21 @@
+// Update stats on page load
+document.addEventListener('DOMContentLoaded', function() {
+    // These would typically come from your backend/localStorage
+    document.getElementById('tasks-completed').textContent = Math.floor(Math.random() * 15) + 5;
+    loadStudyTime();
+    document.getElementById('upcoming-deadlines').textContent = Math.floor(Math.random() * 5) + 2;
+});
+
+async function loadStudyTime() {
+    try {
+        const response = await fetch('/api/pomodoro/stats');
+        const data = await response.json();
+        if (response.ok) {
+            const minutes = data.today.focus_minutes;
+            document.getElementById('study-time').textContent =
+                minutes >= 60 ? `${Math.floor(minutes / 60)}h ${minutes % 60}m` : `${minutes}m`;
+        }
+    } catch (error) {
+        console.error('Failed to load study stats:', error);
+    }
+}
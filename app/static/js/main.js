@@ -32,8 +32,6 @@ document.addEventListener('DOMContentLoaded', function() {
         initializePomodoro();
     } else if (currentPage === '/todo') {
         initializeTodo();
-    } else if (currentPage === '/quotes') {
-        initializeQuotes();
     } else if (currentPage === '/deadlines') {
         initializeDeadlines();
     } else if (currentPage === '/calendar') {
@@ -49,6 +47,7 @@ function initializePomodoro() {
     let timeLeft = 25 * 60; // 25 minutes in seconds
     let isRunning = false;
     let isBreak = false;
+    let sessionLength = timeLeft;
 
     const display = document.getElementById('timer-display');
     const startBtn = document.getElementById('start-timer');
@@ -78,6 +77,9 @@ function initializePomodoro() {
                     const audio = document.getElementById('timer-sound');
                     if (audio) audio.play();
 
+                    // Record the finished interval on the server
+                    recordPomodoroSession(isBreak ? 'break' : 'focus', sessionLength);
+
                     // Switch between work and break
                     if (isBreak) {
                         timeLeft = 25 * 60; // Back to work
@@ -88,6 +90,7 @@ function initializePomodoro() {
                         isBreak = true;
                         showNotification('Work session complete! Take a break!');
                     }
+                    sessionLength = timeLeft;
                     updateDisplay();
                 }
             }, 1000);
@@ -105,6 +108,7 @@ function initializePomodoro() {
         clearInterval(timer);
         isRunning = false;
         timeLeft = 25 * 60;
+        sessionLength = timeLeft;
         isBreak = false;
         updateDisplay();
     }
@@ -114,6 +118,42 @@ function initializePomodoro() {
     if (resetBtn) resetBtn.addEventListener('click', resetTimer);
 
     updateDisplay();
+    loadTodaySessions();
+}
+
+async function recordPomodoroSession(kind, durationSeconds) {
+    try {
+        await fetch('/api/pomodoro/sessions', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ kind: kind, duration_seconds: durationSeconds })
+        });
+        loadTodaySessions();
+    } catch (error) {
+        console.error('Failed to record session:', error);
+    }
+}
+
+async function loadTodaySessions() {
+    const container = document.getElementById('session-history');
+    if (!container) return;
+
+    try {
+        const response = await fetch('/api/pomodoro/sessions');
+        const data = await response.json();
+        if (!response.ok || data.sessions.length === 0) return;
+
+        container.innerHTML = data.sessions.map(session => `
+            <div class="flex justify-between p-3 bg-gray-50 rounded-lg">
+                <span class="font-medium">${session.kind === 'focus' ? 'Focus session' : 'Break'}</span>
+                <span class="text-gray-600">${Math.round(session.duration_seconds / 60)} min &middot; ${new Date(session.ended_at).toLocaleTimeString()}</span>
+            </div>
+        `).join('');
+    } catch (error) {
+        console.error('Failed to load sessions:', error);
+    }
 }
 
 // Todo List Functions
@@ -169,34 +209,6 @@ function initializeTodo() {
     }
 }
 
-// Quotes Functions
-function initializeQuotes() {
-    const quotes = [
-        "Success is not final, failure is not fatal: it is the courage to continue that counts. - Winston Churchill",
-        "The only way to do great work is to love what you do. - Steve Jobs",
-        "Believe you can and you're halfway there. - Theodore Roosevelt",
-        "Don't watch the clock; do what it does. Keep going. - Sam Levenson",
-        "The future belongs to those who believe in the beauty of their dreams. - Eleanor Roosevelt"
-    ];
-
-    const quoteDisplay = document.getElementById('quote-display');
-    const newQuoteBtn = document.getElementById('new-quote');
-
-    function displayRandomQuote() {
-        const randomQuote = quotes[Math.floor(Math.random() * quotes.length)];
-        if (quoteDisplay) {
-            quoteDisplay.textContent = randomQuote;
-        }
-    }
-
-    if (newQuoteBtn) {
-        newQuoteBtn.addEventListener('click', displayRandomQuote);
-    }
-
-    // Display initial quote
-    displayRandomQuote();
-}
-
 // Deadlines Functions
 function initializeDeadlines() {
     const deadlineForm = document.getElementById('deadline-form');
@@ -0,0 +1,158 @@
+let currentCategory = null;
+let currentQuote = null;
+let favoriteQuotes = [];
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Category switching
+    const categoryButtons = document.querySelectorAll('.category-quote-btn');
+    categoryButtons.forEach(btn => {
+        btn.addEventListener('click', () => {
+            // Update active button
+            categoryButtons.forEach(b => {
+                b.classList.remove('active', 'bg-primary', 'text-white');
+                b.classList.add('bg-gray-100', 'hover:bg-gray-200');
+            });
+            btn.classList.add('active', 'bg-primary', 'text-white');
+            btn.classList.remove('bg-gray-100', 'hover:bg-gray-200');
+
+            currentCategory = btn.getAttribute('data-category');
+            displayRandomQuote();
+        });
+    });
+
+    // New quote button
+    document.getElementById('new-quote').addEventListener('click', displayRandomQuote);
+
+    // Save quote button
+    document.getElementById('save-quote').addEventListener('click', saveCurrentQuote);
+
+    // Initialize with the quote of the day
+    displayQuoteOfTheDay();
+    loadFavoriteQuotes();
+});
+
+function showQuote(quote) {
+    currentQuote = quote;
+    document.getElementById('quote-display').textContent = `"${quote.text}"`;
+    document.getElementById('quote-author').textContent = `- ${quote.author}`;
+}
+
+async function displayQuoteOfTheDay() {
+    try {
+        const response = await fetch('/api/quotes/today');
+        if (response.ok) {
+            showQuote(await response.json());
+        }
+    } catch (error) {
+        console.error('Failed to load quote of the day:', error);
+    }
+}
+
+async function displayRandomQuote() {
+    try {
+        const query = currentCategory ? `?category=${encodeURIComponent(currentCategory)}` : '';
+        const response = await fetch(`/api/quotes/random${query}`);
+        if (response.ok) {
+            showQuote(await response.json());
+        }
+    } catch (error) {
+        console.error('Failed to load quote:', error);
+    }
+}
+
+async function loadFavoriteQuotes() {
+    try {
+        const response = await fetch('/api/quotes/favorites');
+        const data = await response.json();
+        if (response.ok) {
+            favoriteQuotes = data.favorites;
+            renderFavoriteQuotes();
+        }
+    } catch (error) {
+        console.error('Failed to load favorite quotes:', error);
+    }
+}
+
+async function saveCurrentQuote() {
+    if (!currentQuote) {
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/quotes/favorites', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ quote_id: currentQuote.id })
+        });
+        const data = await response.json();
+
+        if (response.ok && data.added) {
+            await loadFavoriteQuotes();
+            showNotification('Quote saved to favorites!');
+        } else if (response.ok) {
+            showNotification('Quote is already in your favorites!');
+        }
+    } catch (error) {
+        console.error('Failed to save quote:', error);
+    }
+}
+
+function renderFavoriteQuotes() {
+    const container = document.getElementById('favorite-quotes');
+
+    if (favoriteQuotes.length === 0) {
+        container.innerHTML = '<p class="text-gray-500 text-center py-8">No favorite quotes saved yet. Save quotes you love!</p>';
+        return;
+    }
+
+    container.innerHTML = favoriteQuotes.map(quote => `
+        <div class="bg-gray-50 p-4 rounded-lg border-l-4 border-yellow-400">
+            <blockquote class="text-gray-800 font-medium mb-2">"${quote.text}"</blockquote>
+            <div class="flex justify-between items-center">
+                <p class="text-gray-600 text-sm">- ${quote.author}</p>
+                <div class="flex items-center gap-2">
+                    <span class="text-xs text-gray-500">Saved ${new Date(quote.saved_at).toLocaleDateString()}</span>
+                    <button onclick="removeFavoriteQuote(${quote.id})" class="text-red-500 hover:text-red-700">
+                        <svg class="w-4 h-4" fill="currentColor" viewBox="0 0 20 20">
+                            <path fill-rule="evenodd" d="M4.293 4.293a1 1 0 011.414 0L10 8.586l4.293-4.293a1 1 0 111.414 1.414L11.414 10l4.293 4.293a1 1 0 01-1.414 1.414L10 11.414l-4.293 4.293a1 1 0 01-1.414-1.414L8.586 10 4.293 5.707a1 1 0 010-1.414z" clip-rule="evenodd"></path>
+                        </svg>
+                    </button>
+                </div>
+            </div>
+        </div>
+    `).join('');
+}
+
+async function removeFavoriteQuote(quoteId) {
+    try {
+        const response = await fetch(`/api/quotes/favorites/${quoteId}`, { method: 'DELETE' });
+        if (response.ok) {
+            favoriteQuotes = favoriteQuotes.filter(quote => quote.id !== quoteId);
+            renderFavoriteQuotes();
+            showNotification('Quote removed from favorites.');
+        }
+    } catch (error) {
+        console.error('Failed to remove quote:', error);
+    }
+}
+
+// Share functionality
+document.querySelectorAll('[class*="bg-blue-500"], [class*="bg-green-500"], [class*="bg-gray-500"]').forEach(btn => {
+    btn.addEventListener('click', function() {
+        const quoteText = document.getElementById('quote-display').textContent;
+        const quoteAuthor = document.getElementById('quote-author').textContent;
+        const fullQuote = `${quoteText} ${quoteAuthor}`;
+
+        if (this.textContent.includes('Twitter')) {
+            window.open(`https://twitter.com/intent/tweet?text=${encodeURIComponent(fullQuote)}`, '_blank');
+        } else if (this.textContent.includes('WhatsApp')) {
+            window.open(`https://wa.me/?text=${encodeURIComponent(fullQuote)}`, '_blank');
+        } else if (this.textContent.includes('Copy')) {
+            navigator.clipboard.writeText(fullQuote).then(() => {
+                showNotification('Quote copied to clipboard!');
+            });
+        }
+    });
+});
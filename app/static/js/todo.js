@@ -0,0 +1,194 @@
+document.addEventListener('DOMContentLoaded', function() {
+    let tasks = [];
+    let currentCategory = 'all';
+
+    // Category filtering
+    const categoryButtons = document.querySelectorAll('.category-btn');
+    categoryButtons.forEach(btn => {
+        btn.addEventListener('click', () => {
+            // Update active button
+            categoryButtons.forEach(b => {
+                b.classList.remove('active', 'bg-primary', 'text-white');
+                b.classList.add('bg-gray-200', 'text-gray-700');
+            });
+            btn.classList.add('active', 'bg-primary', 'text-white');
+            btn.classList.remove('bg-gray-200', 'text-gray-700');
+
+            currentCategory = btn.getAttribute('data-category');
+            renderTasks();
+        });
+    });
+
+    // Tasks are stored on the server, so they survive reloads and show up in data exports
+    async function loadTasks() {
+        try {
+            const response = await fetch('/api/records/todo');
+            const data = await response.json();
+            if (response.ok) {
+                tasks = data.records;
+                renderTasks();
+                updateStats();
+            }
+        } catch (error) {
+            console.error('Failed to load tasks:', error);
+        }
+    }
+
+    async function saveTask(task) {
+        try {
+            await fetch(`/api/records/todo/${task.id}`, {
+                method: 'PUT',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify(task)
+            });
+        } catch (error) {
+            console.error('Failed to save task:', error);
+        }
+    }
+
+    async function removeTasks(ids) {
+        if (ids.length === 0) return;
+        try {
+            await fetch('/api/records/todo/delete', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ ids: ids })
+            });
+        } catch (error) {
+            console.error('Failed to delete tasks:', error);
+        }
+    }
+
+    // Enhanced todo functionality
+    function addTodoEnhanced(text) {
+        const task = {
+            id: Date.now(),
+            text: text,
+            completed: false,
+            category: 'homework', // Default category
+            priority: 'medium',
+            createdAt: new Date(),
+            completedAt: null
+        };
+
+        tasks.push(task);
+        saveTask(task);
+        renderTasks();
+        updateStats();
+    }
+
+    function renderTasks() {
+        const todoList = document.getElementById('todo-list');
+        const filteredTasks = currentCategory === 'all'
+            ? tasks
+            : tasks.filter(task => task.category === currentCategory);
+
+        if (filteredTasks.length === 0) {
+            todoList.innerHTML = `
+                <div class="text-center py-12 text-gray-500">
+                    <svg class="w-16 h-16 mx-auto mb-4 text-gray-300" fill="currentColor" viewBox="0 0 20 20">
+                        <path fill-rule="evenodd" d="M3 4a1 1 0 011-1h12a1 1 0 110 2H4a1 1 0 01-1-1zm0 4a1 1 0 011-1h12a1 1 0 110 2H4a1 1 0 01-1-1zm0 4a1 1 0 011-1h12a1 1 0 110 2H4a1 1 0 01-1-1z" clip-rule="evenodd"></path>
+                    </svg>
+                    <p>No tasks in this category. Add your first task!</p>
+                </div>
+            `;
+            return;
+        }
+
+        todoList.innerHTML = filteredTasks.map(task => `
+            <div class="todo-item p-4 rounded-lg shadow mb-3 flex items-center justify-between ${task.completed ? 'bg-green-50' : 'bg-white'}">
+                <div class="flex items-center flex-1">
+                    <input type="checkbox" ${task.completed ? 'checked' : ''}
+                           onchange="toggleTask(${task.id})"
+                           class="mr-3 w-4 h-4 text-primary">
+                    <span class="todo-text flex-1 ${task.completed ? 'line-through text-gray-500' : ''}">${task.text}</span>
+                    <span class="text-xs px-2 py-1 rounded ml-2 ${
+                        task.priority === 'high' ? 'bg-red-100 text-red-800' :
+                        task.priority === 'medium' ? 'bg-yellow-100 text-yellow-800' :
+                        'bg-green-100 text-green-800'
+                    }">${task.priority}</span>
+                </div>
+                <button onclick="deleteTask(${task.id})" class="delete-todo text-red-500 hover:text-red-700 ml-3">
+                    <svg class="w-5 h-5" fill="currentColor" viewBox="0 0 20 20">
+                        <path fill-rule="evenodd" d="M4.293 4.293a1 1 0 011.414 0L10 8.586l4.293-4.293a1 1 0 111.414 1.414L11.414 10l4.293 4.293a1 1 0 01-1.414 1.414L10 11.414l-4.293 4.293a1 1 0 01-1.414-1.414L8.586 10 4.293 5.707a1 1 0 010-1.414z" clip-rule="evenodd"></path>
+                    </svg>
+                </button>
+            </div>
+        `).join('');
+    }
+
+    function updateStats() {
+        const totalTasks = tasks.length;
+        const completedTasks = tasks.filter(task => task.completed).length;
+        const pendingTasks = totalTasks - completedTasks;
+        const completionPercentage = totalTasks > 0 ? Math.round((completedTasks / totalTasks) * 100) : 0;
+
+        document.getElementById('total-tasks').textContent = totalTasks;
+        document.getElementById('pending-count').textContent = pendingTasks;
+        document.getElementById('completed-today').textContent = completedTasks;
+        document.getElementById('completion-percentage').textContent = completionPercentage + '%';
+        document.getElementById('progress-text').textContent = `${completedTasks}/${totalTasks}`;
+        document.getElementById('progress-bar').style.width = completionPercentage + '%';
+        document.getElementById('productivity-score').textContent = Math.min(100, completionPercentage + Math.floor(Math.random() * 20)) + '%';
+    }
+
+    // Global functions for task management
+    window.toggleTask = function(id) {
+        const task = tasks.find(t => t.id === id);
+        if (task) {
+            task.completed = !task.completed;
+            task.completedAt = task.completed ? new Date() : null;
+            saveTask(task);
+            renderTasks();
+            updateStats();
+        }
+    };
+
+    window.deleteTask = function(id) {
+        tasks = tasks.filter(t => t.id !== id);
+        removeTasks([id]);
+        renderTasks();
+        updateStats();
+    };
+
+    // Clear completed tasks
+    document.getElementById('clear-completed').addEventListener('click', () => {
+        removeTasks(tasks.filter(task => task.completed).map(task => task.id));
+        tasks = tasks.filter(task => !task.completed);
+        renderTasks();
+        updateStats();
+    });
+
+    // Sort tasks
+    document.getElementById('sort-tasks').addEventListener('click', () => {
+        const priorityOrder = { 'high': 3, 'medium': 2, 'low': 1 };
+        tasks.sort((a, b) => {
+            if (a.completed !== b.completed) {
+                return a.completed - b.completed;
+            }
+            return priorityOrder[b.priority] - priorityOrder[a.priority];
+        });
+        renderTasks();
+    });
+
+    // Enhanced form submission
+    const todoForm = document.getElementById('todo-form');
+    if (todoForm) {
+        todoForm.addEventListener('submit', (e) => {
+            e.preventDefault();
+            const input = todoForm.querySelector('input[type="text"]');
+            if (input && input.value.trim()) {
+                addTodoEnhanced(input.value.trim());
+                input.value = '';
+            }
+        });
+    }
+
+    // Initialize
+    updateStats();
+    loadTasks();
+});
@@ -0,0 +1,56 @@
+import logging
+
+from flask import g, request, jsonify
+
+from app.services.metrics import TENANT_REQUESTS
+from app.services.tenants import DEFAULT_TENANT, tenant_registry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TenantResolver:
+    """
+    Works out which school a request belongs to before any view runs.
+
+    The tenant comes from TENANT_HEADER when it is set (only enable this behind
+    a proxy that sets the header itself, since clients could otherwise choose
+    another school's services), else from the Host the request was sent to.
+    Requests for no configured host use the default tenant, or get 404 when
+    TENANT_REQUIRED is set. Services read the result through
+    app.services.tenants (get_vector_service(), get_gemini_service(), ...).
+    """
+
+    def __init__(self, app=None):
+        self.header = None
+        self.required = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.header = app.config.get('TENANT_HEADER') or None
+        self.required = app.config.get('TENANT_REQUIRED', False)
+        app.before_request(self._resolve)
+        app.extensions['tenant_resolver'] = self
+
+    def _resolve(self):
+        tenant = None
+        if self.header and request.headers.get(self.header):
+            tenant = request.headers[self.header].strip().lower()
+            if not tenant_registry.is_tenant(tenant):
+                return jsonify({'error': f"Unknown tenant: {tenant}"}), 404
+        else:
+            tenant = tenant_registry.tenant_for_host(request.host)
+
+        if tenant is None:
+            if self.required and request.endpoint != 'static':
+                return jsonify({'error': 'Unknown host'}), 404
+            tenant = DEFAULT_TENANT
+
+        g.tenant = tenant
+        # Read by request_guard, so each school has limits of its own
+        g.rate_limit = tenant_registry.rate_limit(tenant)
+        TENANT_REQUESTS.labels(tenant=tenant).inc()
+
+# Global instance
+tenant_resolver = TenantResolver()
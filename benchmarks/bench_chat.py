@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark for POST /api/chat
+
+By default the app runs in-process through the Flask test client with Gemini
+replaced by a local fake LLM server. Pass --url to drive a running server over
+HTTP instead (each simulated student keeps its own cookie session).
+
+Examples:
+    python benchmarks/bench_chat.py --requests 500 --concurrency 16 --stub-chroma --stub-encoder
+    python benchmarks/bench_chat.py --url http://localhost:5000 --requests 2000 --concurrency 64
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import (
+    summarize, write_report, FakeLLMServer, use_fake_llm, HashingEncoder, stub_vector_collections
+)
+
+MESSAGES = [
+    "How do I make a study plan for finals?",
+    "What's the Pomodoro technique?",
+    "I keep forgetting vocabulary words, any tips?",
+    "How can I stay focused when studying at home?",
+]
+
+class InProcessClient:
+    """One Flask test client per worker thread, so every thread is its own student"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def post(self, message: str) -> int:
+        if not hasattr(self._local, 'client'):
+            self._local.client = self.app.test_client()
+        return self._local.client.post('/api/chat', json={'message': message}).status_code
+
+class HTTPClient:
+    """One requests.Session per worker thread against a running server"""
+
+    def __init__(self, base_url: str):
+        self.url = base_url.rstrip('/') + '/api/chat'
+        self._local = threading.local()
+
+    def post(self, message: str) -> int:
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session.post(self.url, json={'message': message}, timeout=120).status_code
+
+def build_in_process_app(args):
+    os.environ.setdefault('CHROMA_PERSIST_DIRECTORY', tempfile.mkdtemp(prefix='bench_chroma_'))
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+    from app import create_app
+    from app.services.vector_service import vector_service
+
+    if args.stub_encoder or vector_service.encoder is None:
+        vector_service.encoder = HashingEncoder()
+    if args.stub_chroma:
+        stub_vector_collections(vector_service)
+
+    return create_app(args.config)
+
+def run_load(client, requests_count: int, concurrency: int) -> dict:
+    errors = []
+
+    def call(i):
+        start = time.perf_counter()
+        status = client.post(MESSAGES[i % len(MESSAGES)])
+        elapsed = time.perf_counter() - start
+        if status != 200:
+            errors.append(status)
+        return elapsed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(call, range(requests_count)))
+    wall = time.perf_counter() - start
+
+    summary = summarize(samples, wall)
+    summary['errors'] = len(errors)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Base URL of a running server; omit to run in-process')
+    parser.add_argument('--config', default='development', help='Config name for the in-process app')
+    parser.add_argument('--requests', type=int, default=200, help='Total chat requests to send')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent simulated students')
+    parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests sent first')
+    parser.add_argument('--latency-ms', type=float, default=200.0, help='Fake LLM latency (in-process only)')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Fake LLM latency jitter (in-process only)')
+    parser.add_argument('--stub-encoder', action='store_true', help='Use a hashing encoder (in-process only)')
+    parser.add_argument('--stub-chroma', action='store_true', help='Use in-memory collections (in-process only)')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    args = parser.parse_args()
+
+    if args.url:
+        client = HTTPClient(args.url)
+        run_load(client, args.warmup, args.concurrency)
+        results = {'chat': run_load(client, args.requests, args.concurrency)}
+    else:
+        with FakeLLMServer(args.latency_ms, args.jitter_ms) as server:
+            app = build_in_process_app(args)
+
+            from app.services.gemini_service import gemini_service
+            use_fake_llm(gemini_service, server.url)
+
+            client = InProcessClient(app)
+            run_load(client, args.warmup, args.concurrency)
+            results = {'chat': run_load(client, args.requests, args.concurrency)}
+
+    write_report('chat_api', vars(args), results, args.output)
+
+if __name__ == "__main__":
+    main()
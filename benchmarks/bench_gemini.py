@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark GeminiService.generate_response against a local fake LLM server
+
+The fake server sleeps for --latency-ms (+/- --jitter-ms) per request, so the
+numbers show how much time our prompt building, client and thread handling add
+on top of a known upstream latency.
+
+Example:
+    python benchmarks/bench_gemini.py --latency-ms 300 --concurrency 1,8,32
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import summarize, timed, write_report, FakeLLMServer, use_fake_llm
+
+CONTEXT = [
+    {'role': 'user', 'content': 'I have a biology test on Friday.'},
+    {'role': 'assistant', 'content': 'Start with active recall on the chapters you find hardest.'},
+    {'role': 'user', 'content': 'How many hours should I study each day?'},
+    {'role': 'assistant', 'content': 'Two focused hours with breaks is plenty for most students.'},
+]
+
+def run_concurrency(service, concurrency: int, requests_count: int) -> dict:
+    def call(_):
+        return timed(
+            service.generate_response,
+            user_message='What is a good way to review for my biology test?',
+            conversation_context=CONTEXT
+        )
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(call, range(requests_count)))
+    wall = time.perf_counter() - start
+
+    return summarize(samples, wall)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency-ms', type=float, default=200.0, help='Fake LLM response latency')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Uniform +/- jitter on the latency')
+    parser.add_argument('--concurrency', default='1,8', help='Comma-separated client concurrency levels')
+    parser.add_argument('--requests', type=int, default=100, help='Requests per concurrency level')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    args = parser.parse_args()
+
+    from app.services.gemini_service import GeminiService
+
+    results = {}
+    with FakeLLMServer(args.latency_ms, args.jitter_ms) as server:
+        service = GeminiService()
+        use_fake_llm(service, server.url)
+
+        for level in [int(value) for value in args.concurrency.split(',') if value.strip()]:
+            summary = run_concurrency(service, level, args.requests)
+            summary['overhead_p50_ms'] = round(summary['p50_ms'] - args.latency_ms, 3)
+            results[f"concurrency_{level}"] = summary
+
+    write_report('gemini_service', vars(args), results, args.output)
+
+if __name__ == "__main__":
+    main()
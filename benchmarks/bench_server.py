@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Throughput of the production server (gunicorn -c gunicorn.conf.py wsgi:app)
+
+Starts gunicorn once per --workers/--threads combination, waits until it
+answers, drives it with concurrent HTTP clients and reports latency and
+throughput for each combination. Rate limiting is disabled for the run.
+
+Examples:
+    python benchmarks/bench_server.py --workers 1,2,4 --threads 4,8 --requests 2000 --concurrency 32
+    python benchmarks/bench_server.py --path /api/chat --message "How do I study for finals?" --requests 200
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import summarize, write_report, PROJECT_ROOT
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(workers: int, threads: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        'WEB_CONCURRENCY': str(workers),
+        'GUNICORN_THREADS': str(threads),
+        'GUNICORN_BIND': f'127.0.0.1:{port}',
+        'GUNICORN_ACCESS_LOG': '/dev/null',
+        'RATE_LIMIT_ENABLED': 'false',
+    })
+    env.setdefault('SECRET_KEY', 'benchmark')
+    env.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='bench_db_'), 'bench.db'))
+
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=PROJECT_ROOT, env=env
+    )
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {process.returncode}")
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.25)
+    raise RuntimeError(f"Server did not answer within {timeout}s")
+
+def run_load(url: str, args, requests_count: int) -> dict:
+    local = threading.local()
+    errors = []
+
+    def call(_):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        if args.message:
+            response = local.session.post(url, json={'message': args.message}, timeout=120)
+        else:
+            response = local.session.get(url, timeout=120)
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            errors.append(response.status_code)
+        return elapsed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        samples = list(pool.map(call, range(requests_count)))
+    wall = time.perf_counter() - start
+
+    summary = summarize(samples, wall)
+    summary['errors'] = len(errors)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,2', help='Comma-separated worker process counts')
+    parser.add_argument('--threads', default='8', help='Comma-separated threads per worker')
+    parser.add_argument('--path', default='/api/chat/status', help='Endpoint to load')
+    parser.add_argument('--message', help='POST this chat message instead of sending GET requests')
+    parser.add_argument('--requests', type=int, default=1000, help='Measured requests per combination')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent HTTP clients')
+    parser.add_argument('--warmup', type=int, default=50, help='Unmeasured requests sent first')
+    parser.add_argument('--startup-timeout', type=float, default=120.0, help='Seconds to wait for gunicorn')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    args = parser.parse_args()
+
+    results = {}
+    for workers in [int(value) for value in args.workers.split(',') if value.strip()]:
+        for threads in [int(value) for value in args.threads.split(',') if value.strip()]:
+            port = free_port()
+            url = f'http://127.0.0.1:{port}{args.path}'
+            process = start_server(workers, threads, port)
+            try:
+                started = time.perf_counter()
+                wait_until_ready(url, process, args.startup_timeout)
+                startup_seconds = time.perf_counter() - started
+
+                run_load(url, args, args.warmup)
+                summary = run_load(url, args, args.requests)
+                summary['startup_seconds'] = round(startup_seconds, 2)
+                results[f'{workers}w x {threads}t'] = summary
+            finally:
+                process.terminate()
+                process.wait(timeout=60)
+
+    write_report('server', vars(args), results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark VectorService encode, store and query latency at increasing collection sizes
+
+Examples:
+    python benchmarks/bench_vector.py --sizes 1000,100000
+    python benchmarks/bench_vector.py --sizes 1000000 --stub-encoder --output vector.json
+"""
+
+import os
+import sys
+import uuid
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import (
+    summarize, timed, write_report, HashingEncoder, stub_vector_collections
+)
+
+SAMPLE_MESSAGES = [
+    "How can I stop procrastinating on my history essay?",
+    "What is the best way to memorize chemistry formulas?",
+    "I have three tests next week, how should I plan my time?",
+    "Can you explain spaced repetition?",
+    "I get anxious before math exams, what can I do?",
+    "How long should my study sessions be?",
+]
+
+BULK_BATCH_SIZE = 5000
+
+def bulk_fill(service, size: int, users: int, dimension: int) -> float:
+    """Fill the conversations collection with random vectors; returns seconds taken"""
+    rng = np.random.default_rng(42)
+    collection = service.conversations_collection
+    total = 0.0
+
+    for start in range(0, size, BULK_BATCH_SIZE):
+        count = min(BULK_BATCH_SIZE, size - start)
+        vectors = rng.standard_normal((count, dimension)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        total += timed(
+            collection.add,
+            ids=[str(uuid.uuid4()) for _ in range(count)],
+            embeddings=vectors.tolist(),
+            documents=[f"User: message {start + i}\nBot: reply" for i in range(count)],
+            metadatas=[{"user_id": f"user-{(start + i) % users}", "conversation_type": "chat"}
+                       for i in range(count)]
+        )
+
+    return total
+
+def run_size(size: int, args) -> dict:
+    from app.services.vector_service import VectorService
+
+    persist_directory = tempfile.mkdtemp(prefix='bench_chroma_')
+    os.environ['CHROMA_PERSIST_DIRECTORY'] = persist_directory
+
+    try:
+        service = VectorService()
+        if args.stub_encoder or service.encoder is None:
+            service.encoder = HashingEncoder()
+        if args.stub_chroma:
+            stub_vector_collections(service)
+
+        dimension = service.encoder.get_sentence_embedding_dimension()
+        fill_seconds = bulk_fill(service, size, args.users, dimension)
+
+        messages = [SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)] for i in range(args.ops)]
+
+        encode = [timed(service.encoder.encode, message) for message in messages]
+        store = [
+            timed(service.store_conversation, f"user-{i % args.users}", message, "Benchmark reply.")
+            for i, message in enumerate(messages)
+        ]
+        query = [
+            timed(service.get_relevant_conversations, f"user-{i % args.users}", message, 3)
+            for i, message in enumerate(messages)
+        ]
+
+        return {
+            'records': size,
+            'bulk_fill_records_per_s': round(size / fill_seconds, 2) if fill_seconds else 0.0,
+            'encode': summarize(encode),
+            'store': summarize(store),
+            'query': summarize(query)
+        }
+
+    finally:
+        shutil.rmtree(persist_directory, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000', help='Comma-separated collection sizes (e.g. 1000,100000,1000000)')
+    parser.add_argument('--ops', type=int, default=200, help='Measured operations per stage and size')
+    parser.add_argument('--users', type=int, default=100, help='Distinct user ids spread across the records')
+    parser.add_argument('--stub-encoder', action='store_true', help='Use a hashing encoder instead of SentenceTransformer')
+    parser.add_argument('--stub-chroma', action='store_true', help='Use an in-memory collection instead of Chroma')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    args = parser.parse_args()
+
+    # The module-level vector_service must not touch the real persist directory
+    os.environ.setdefault('CHROMA_PERSIST_DIRECTORY', tempfile.mkdtemp(prefix='bench_chroma_'))
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    results = {str(size): run_size(size, args) for size in sizes}
+
+    write_report('vector_service', vars(args), results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Shared helpers for the StudyHub benchmark scripts: latency statistics, JSON
+reports, and the stand-ins used to isolate our own code from Gemini and Chroma.
+"""
+
+import os
+import json
+import time
+import math
+import hashlib
+import platform
+import subprocess
+import threading
+import random
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Optional, Callable
+
+import numpy as np
+import requests
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(int(math.ceil(pct / 100.0 * len(sorted_samples))) - 1, 0)
+    return sorted_samples[rank]
+
+def summarize(samples: List[float], wall_seconds: Optional[float] = None) -> Dict:
+    """
+    Summarize latency samples (in seconds) as milliseconds plus throughput
+
+    Args:
+        samples: Per-operation latencies in seconds
+        wall_seconds: Total wall time; defaults to the sum of samples (serial runs)
+
+    Returns:
+        Dictionary with count, p50/p95/p99/mean/min/max in ms and ops per second
+    """
+    ordered = sorted(samples)
+    wall = wall_seconds if wall_seconds is not None else sum(ordered)
+    to_ms = lambda value: round(value * 1000.0, 3)
+
+    return {
+        'count': len(ordered),
+        'p50_ms': to_ms(percentile(ordered, 50)),
+        'p95_ms': to_ms(percentile(ordered, 95)),
+        'p99_ms': to_ms(percentile(ordered, 99)),
+        'mean_ms': to_ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+        'min_ms': to_ms(ordered[0]) if ordered else 0.0,
+        'max_ms': to_ms(ordered[-1]) if ordered else 0.0,
+        'throughput_per_s': round(len(ordered) / wall, 2) if wall > 0 else 0.0
+    }
+
+def timed(fn: Callable, *args, **kwargs) -> float:
+    """Run fn once and return its wall time in seconds"""
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return 'unknown'
+
+def write_report(name: str, params: Dict, results: Dict, output: Optional[str] = None) -> Dict:
+    """Print the benchmark report as JSON and optionally write it to a file"""
+    report = {
+        'benchmark': name,
+        'commit': git_revision(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'params': params,
+        'results': results
+    }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + "\n")
+    return report
+
+class HashingEncoder:
+    """
+    Deterministic stand-in for SentenceTransformer that hashes words into a
+    normalized vector, so Chroma and our own code can be measured without the
+    model's CPU cost dominating
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in text.lower().split():
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            vector[int.from_bytes(digest, 'little') % self.dimension] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts, **kwargs):
+        if isinstance(texts, str):
+            return self._encode_one(texts)
+        return np.stack([self._encode_one(text) for text in texts])
+
+class InMemoryCollection:
+    """
+    Brute-force stand-in for a Chroma collection supporting the calls
+    VectorService makes (add/upsert/update/get/query/count) with equality filters
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._rows: Dict[str, Dict] = {}
+        self._matrix: Optional[np.ndarray] = None
+
+    @staticmethod
+    def _matches(metadata: Dict, where: Optional[Dict]) -> bool:
+        if not where:
+            return True
+        for key, expected in where.items():
+            if isinstance(expected, dict):
+                if '$in' in expected and metadata.get(key) not in expected['$in']:
+                    return False
+                continue
+            if metadata.get(key) != expected:
+                return False
+        return True
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def add(self, ids, embeddings=None, documents=None, metadatas=None):
+        with self._lock:
+            for i, item_id in enumerate(ids):
+                if item_id in self._rows:
+                    continue
+                self._ids.append(item_id)
+                self._rows[item_id] = {
+                    'embedding': np.asarray(embeddings[i], dtype=np.float32),
+                    'document': documents[i] if documents else None,
+                    'metadata': dict(metadatas[i]) if metadatas else {}
+                }
+            self._matrix = None
+
+    def upsert(self, ids, embeddings=None, documents=None, metadatas=None):
+        with self._lock:
+            for item_id in ids:
+                if item_id in self._rows:
+                    self._ids.remove(item_id)
+                    del self._rows[item_id]
+        self.add(ids, embeddings, documents, metadatas)
+
+    def update(self, ids, embeddings=None, documents=None, metadatas=None):
+        with self._lock:
+            for i, item_id in enumerate(ids):
+                row = self._rows[item_id]
+                if embeddings is not None:
+                    row['embedding'] = np.asarray(embeddings[i], dtype=np.float32)
+                if documents:
+                    row['document'] = documents[i]
+                if metadatas:
+                    row['metadata'].update(metadatas[i])
+            self._matrix = None
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("documents", "metadatas")):
+        with self._lock:
+            keys = [item_id for item_id in (ids if ids is not None else self._ids)
+                    if item_id in self._rows and self._matches(self._rows[item_id]['metadata'], where)]
+            keys = keys[offset or 0:]
+            if limit is not None:
+                keys = keys[:limit]
+            return {
+                'ids': keys,
+                'documents': [self._rows[k]['document'] for k in keys] if 'documents' in include else None,
+                'metadatas': [self._rows[k]['metadata'] for k in keys] if 'metadatas' in include else None,
+                'embeddings': np.stack([self._rows[k]['embedding'] for k in keys])
+                if 'embeddings' in include and keys else None
+            }
+
+    def query(self, query_embeddings, where=None, n_results=10, include=("documents", "metadatas", "distances")):
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.stack([self._rows[k]['embedding'] for k in self._ids]) if self._ids else None
+            if self._matrix is None:
+                return {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+
+            query = np.asarray(query_embeddings[0], dtype=np.float32)
+            distances = np.sum((self._matrix - query) ** 2, axis=1)
+            order = np.argsort(distances)
+
+            hits = []
+            for index in order:
+                item_id = self._ids[index]
+                if self._matches(self._rows[item_id]['metadata'], where):
+                    hits.append((item_id, float(distances[index])))
+                    if len(hits) >= n_results:
+                        break
+
+            return {
+                'ids': [[item_id for item_id, _ in hits]],
+                'documents': [[self._rows[item_id]['document'] for item_id, _ in hits]],
+                'metadatas': [[self._rows[item_id]['metadata'] for item_id, _ in hits]],
+                'distances': [[distance for _, distance in hits]]
+            }
+
+def stub_vector_collections(service) -> None:
+    """Swap a VectorService's Chroma collections for in-memory stand-ins"""
+    service._collections = {name: InMemoryCollection(name) for name in service._collection_names()}
+
+class FakeLLMServer:
+    """
+    Local HTTP server that answers POSTed prompts after a configurable delay,
+    standing in for the Gemini API
+    """
+
+    def __init__(self, latency_ms: float = 200.0, jitter_ms: float = 0.0, port: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                prompt = json.loads(self.rfile.read(length) or b'{}').get('prompt', '')
+
+                delay = server.latency_ms + random.uniform(-server.jitter_ms, server.jitter_ms)
+                time.sleep(max(delay, 0.0) / 1000.0)
+
+                body = json.dumps({
+                    'text': 'Try breaking the material into short focused sessions and test yourself often.',
+                    'prompt_tokens': len(prompt.split()),
+                    'completion_tokens': 14
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/generate"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class _FakeUsage:
+    def __init__(self, prompt_tokens: int, completion_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = completion_tokens
+
+class _FakeResponse:
+    def __init__(self, payload: Dict):
+        self.text = payload['text']
+        self.usage_metadata = _FakeUsage(payload['prompt_tokens'], payload['completion_tokens'])
+
+class FakeGenerativeModel:
+    """Drop-in for genai.GenerativeModel that sends prompts to a FakeLLMServer"""
+
+    def __init__(self, url: str, model_name: str = 'fake-llm'):
+        self.url = url
+        self.model_name = model_name
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def generate_content(self, prompt, **kwargs):
+        response = self._session().post(self.url, json={'prompt': prompt}, timeout=60)
+        response.raise_for_status()
+        return _FakeResponse(response.json())
+
+def use_fake_llm(service, url: str) -> None:
+    """Point a GeminiService at the fake LLM server"""
+    service.api_key = service.api_key or 'benchmark'
+    service.model = FakeGenerativeModel(url)
+    if getattr(service, 'router', None) is None:
+        from app.services.model_router import ModelRouter
+        from config import Config
+        service.router = ModelRouter.from_config(Config)
+    for tier in service.router.tiers.values():
+        tier.model = FakeGenerativeModel(url, tier.model_name)
+    if not hasattr(service, 'system_prompt'):
+        service.system_prompt = "You are StudyBot."
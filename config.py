@@ -7,9 +7,80 @@ class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Request profiling (opt-in): sample a fraction of requests, or any request
+    # carrying PROFILING_HEADER set to PROFILING_TOKEN
+    PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "0.01"))
+    PROFILING_HEADER = os.environ.get("PROFILING_HEADER", "X-Profile")
+    PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN")
+    PROFILING_INTERVAL = float(os.environ.get("PROFILING_INTERVAL", "0.005"))
+    PROFILING_DIR = os.environ.get("PROFILING_DIR", "profiles")
+    PROFILING_MAX_FILES = int(os.environ.get("PROFILING_MAX_FILES", "50"))
+
+    # Static asset pipeline: minified, content-hashed copies served from /assets/
+    ASSETS_BUILD_DIR = os.environ.get("ASSETS_BUILD_DIR")
+    ASSETS_MINIFY = os.environ.get("ASSETS_MINIFY", "true").lower() == "true"
+
+    # Rendered-page cache for the static pages in app/routes/main.py
+    PAGE_CACHE_ENABLED = os.environ.get("PAGE_CACHE_ENABLED", "true").lower() == "true"
+    PAGE_CACHE_COMPRESS = True
+    PAGE_CACHE_CHECK_INTERVAL = float(os.environ.get("PAGE_CACHE_CHECK_INTERVAL", "2"))
+
+    # Gemini model routing: quick responses go to the fast tier, free chat to the
+    # strong tier. Each tier has its own concurrency pool and request timeout;
+    # GEMINI_POOL_WAIT is how long a request waits for a free slot before
+    # falling back. Fast requests fall back to the strong tier; strong requests
+    # only fall back to the fast model when GEMINI_STRONG_FALLBACK is set,
+    # since its answers to free chat are noticeably weaker.
+    GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-pro")
+    GEMINI_FAST_MODEL = os.environ.get("GEMINI_FAST_MODEL", "gemini-1.5-flash")
+    GEMINI_STRONG_CONCURRENCY = int(os.environ.get("GEMINI_STRONG_CONCURRENCY", "4"))
+    GEMINI_FAST_CONCURRENCY = int(os.environ.get("GEMINI_FAST_CONCURRENCY", "8"))
+    GEMINI_STRONG_TIMEOUT = float(os.environ.get("GEMINI_STRONG_TIMEOUT", "30"))
+    GEMINI_FAST_TIMEOUT = float(os.environ.get("GEMINI_FAST_TIMEOUT", "10"))
+    GEMINI_POOL_WAIT = float(os.environ.get("GEMINI_POOL_WAIT", "2"))
+    GEMINI_FAST_MAX_PROMPT_CHARS = int(os.environ.get("GEMINI_FAST_MAX_PROMPT_CHARS", "2000"))
+    GEMINI_STRONG_FALLBACK = os.environ.get("GEMINI_STRONG_FALLBACK", "false").lower() == "true"
+    GEMINI_ROUTES = {
+        "chat": "strong",
+        "quick": "fast"
+    }
+
+    # Per-user token bucket on the chat endpoints: RATE_LIMIT_CAPACITY requests
+    # of burst, refilled at RATE_LIMIT_PER_MINUTE. The sqlite backend shares
+    # buckets between worker processes on one host.
+    RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_SQLITE_PATH = os.environ.get("RATE_LIMIT_SQLITE_PATH")
+    RATE_LIMIT_CAPACITY = int(os.environ.get("RATE_LIMIT_CAPACITY", "10"))
+    RATE_LIMIT_PER_MINUTE = float(os.environ.get("RATE_LIMIT_PER_MINUTE", "30"))
+    COALESCE_REQUESTS = os.environ.get("COALESCE_REQUESTS", "true").lower() == "true"
+
+    # Multi-school deployments: tenants (TENANTS_CONFIG) are picked by Host, or
+    # by TENANT_HEADER when a trusted proxy sets it. With TENANT_REQUIRED,
+    # hosts that match no tenant get 404 instead of the default services.
+    TENANT_HEADER = os.environ.get("TENANT_HEADER", "")
+    TENANT_REQUIRED = os.environ.get("TENANT_REQUIRED", "false").lower() == "true"
+
+    # Background jobs run by every worker's scheduler; a lease in the database
+    # makes sure only one worker (per host, for host jobs) runs each job
+    SCHEDULER_ENABLED = os.environ.get("SCHEDULER_ENABLED", "true").lower() == "true"
+    SCHEDULER_WORKERS = int(os.environ.get("SCHEDULER_WORKERS", "2"))
+    SCHEDULER_POLL_INTERVAL = float(os.environ.get("SCHEDULER_POLL_INTERVAL", "5"))
+    SCHEDULER_JOB_TIMEOUT = float(os.environ.get("SCHEDULER_JOB_TIMEOUT", "1800"))
+    SCHEDULER_RUN_RETENTION_DAYS = float(os.environ.get("SCHEDULER_RUN_RETENTION_DAYS", "7"))
+    JOB_COMPACT_INTERVAL = float(os.environ.get("JOB_COMPACT_INTERVAL", "86400"))
+    JOB_BACKFILL_INTERVAL = float(os.environ.get("JOB_BACKFILL_INTERVAL", "3600"))
+    JOB_ANSWER_CACHE_INTERVAL = float(os.environ.get("JOB_ANSWER_CACHE_INTERVAL", "300"))
+    JOB_ROLLUP_INTERVAL = float(os.environ.get("JOB_ROLLUP_INTERVAL", "86400"))
+
+    # Token for the /admin endpoints, sent in the X-Admin-Token header
+    ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
 class DevelopmentConfig(Config):
     DEBUG = True
-    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
+    # Without DATABASE_URL, development uses a SQLite file in the instance folder
+    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///high_school.db")
 
 class ProductionConfig(Config):
     DEBUG = False
@@ -0,0 +1,71 @@
+"""
+Gunicorn settings for production: gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is imported once in the master (preload_app), so the SentenceTransformer
+weights are loaded a single time and shared copy-on-write by every worker.
+Anything holding file handles or sockets (Chroma, the SQLAlchemy pool) is
+opened again in each worker after the fork.
+
+Send HUP to replace workers gracefully with the current configuration; since
+the app is preloaded, deploying new code needs USR2 (start a new master)
+followed by WINCH/TERM to the old one, or a full restart.
+"""
+
+import gc
+import os
+import multiprocessing
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Worker processes x threads per worker. Requests mostly wait on Gemini and
+# Chroma, so threads are cheap; each extra process costs one copy of mutable state.
+workers = int(os.environ.get("WEB_CONCURRENCY", min(4, multiprocessing.cpu_count())))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+
+preload_app = True
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+
+# Recycle workers now and then to bound slow memory growth
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+
+def on_starting(server):
+    from app.services.metrics import metrics
+
+    # Totals of a previous run must not be added to this one's
+    metrics.clear_multiprocess_dir()
+
+def when_ready(server):
+    from app.services.metrics import metrics
+
+    # Whatever was counted while preloading is reported once, from the master
+    metrics.write_snapshot()
+
+    # Move everything allocated during preload out of the collector's reach, so
+    # garbage collection in the workers does not touch (and copy) shared pages
+    gc.freeze()
+
+def post_fork(server, worker):
+    import wsgi
+    from app import db
+    from app.services.tenants import tenant_registry
+    from app.services.metrics import metrics
+
+    # Connections inherited from the master must not be shared between processes.
+    # close=False drops them from this worker's pool without closing them, which
+    # would end the master's (and its other children's) sessions on the server.
+    with wsgi.app.app_context():
+        db.engine.dispose(close=False)
+    # Every store opened in the master: the default one and any tenant's
+    # services created while preloading (the rest open in the worker)
+    for services in tenant_registry.loaded():
+        services.vector_service.reconnect()
+        server.log.info(f"Worker {worker.pid} connected to ChromaDB at {services.vector_service.persist_directory}")
+    metrics.start_process()
@@ -2,10 +2,12 @@
 """
 Initialize the knowledge base with study-related content
 Run this script after setting up the environment to populate the vector database
+(pass --tenant <id> to populate one school's store in a multi-tenant deployment)
 """
 
 import os
 import sys
+import argparse
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -14,12 +16,13 @@ load_dotenv()
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app.services.vector_service import vector_service
+from app.services.tenants import DEFAULT_TENANT, tenant_registry
 
-def initialize_knowledge_base():
+def initialize_knowledge_base(tenant=DEFAULT_TENANT):
     """Initialize the vector database with comprehensive study knowledge"""
 
-    print("🚀 Initializing StudyHub Knowledge Base...")
+    print(f"🚀 Initializing StudyHub Knowledge Base{'' if tenant == DEFAULT_TENANT else f' for {tenant}'}...")
+    vector_service = tenant_registry.services(tenant).vector_service
 
     # Study Techniques
     study_techniques = [
@@ -188,8 +191,16 @@ def initialize_knowledge_base():
     return success_count == len(all_knowledge)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Populate the study knowledge base")
+    parser.add_argument('--tenant', default=DEFAULT_TENANT, help='tenant id from TENANTS_CONFIG')
+    args = parser.parse_args()
+
+    if not tenant_registry.is_tenant(args.tenant):
+        print(f"❌ Unknown tenant: {args.tenant}")
+        sys.exit(1)
+
     try:
-        success = initialize_knowledge_base()
+        success = initialize_knowledge_base(args.tenant)
         if success:
             print("\n✨ Your StudyHub AI assistant is now ready with comprehensive study knowledge!")
             print("💡 Don't forget to set your GEMINI_API_KEY in the .env file for full AI capabilities.")
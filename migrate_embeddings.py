@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Re-embed the vector database with EMBEDDING_MODEL
+
+    python migrate_embeddings.py status
+    EMBEDDING_MODEL=<new model> python migrate_embeddings.py run [--rate 200] [--batch-size 128]
+
+Pass --tenant <id> to migrate one school's store in a multi-tenant deployment.
+
+The app migrates in the background by itself once EMBEDDING_MODEL changes
+(unless EMBEDDING_MIGRATION_AUTOSTART=false); this script runs or inspects the
+same migration in the foreground. Ctrl-C stops after the current batch and the
+next run resumes from there.
+"""
+
+import os
+import sys
+import json
+import argparse
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.tenants import DEFAULT_TENANT, tenant_registry
+from app.services.embedding_migration import migration_for
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed the vector database with EMBEDDING_MODEL")
+    parser.add_argument('--tenant', default=DEFAULT_TENANT, help='tenant id from TENANTS_CONFIG')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help='show the serving model and migration progress')
+    run = commands.add_parser('run', help='migrate in the foreground until done')
+    run.add_argument('--rate', type=float, help='rows re-embedded per second (0 for no limit)')
+    run.add_argument('--batch-size', type=int, help='rows per batch')
+    args = parser.parse_args()
+
+    if not tenant_registry.is_tenant(args.tenant):
+        print(f"❌ Unknown tenant: {args.tenant}")
+        return False
+    vector_service = tenant_registry.services(args.tenant).vector_service
+    embedding_migration = migration_for(vector_service)
+
+    # This process migrates in the foreground only
+    vector_service.auto_migrate = False
+
+    if args.command == 'status':
+        print(json.dumps(embedding_migration.status(), indent=2))
+        return True
+
+    if args.rate is not None:
+        embedding_migration.rate = args.rate
+    if args.batch_size:
+        embedding_migration.batch_size = args.batch_size
+
+    if not vector_service.migrating:
+        print(f"✅ Already serving {vector_service.read_model}; nothing to migrate")
+        return True
+
+    print(f"🔄 Re-embedding from {vector_service.read_model} to {vector_service.embedding_model}...")
+    try:
+        done = embedding_migration.run()
+    except KeyboardInterrupt:
+        done = False
+
+    if done:
+        print(f"✅ Now serving {vector_service.read_model}")
+    else:
+        print("⏸️  Migration not finished (stopped, or running in another process); run again to resume")
+    return done
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -1,6 +1,9 @@
+import os
+
 from app import create_app
 
-app = create_app("development")
+# Development server; use wsgi.py with gunicorn.conf.py in production
+app = create_app(os.environ.get("FLASK_CONFIG", "development"))
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=app.debug, threaded=True)
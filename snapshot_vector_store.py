@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Snapshot and restore the vector database (CHROMA_PERSIST_DIRECTORY)
+
+    python snapshot_vector_store.py create [snapshots/chroma.tar.gz]
+    python snapshot_vector_store.py verify snapshots/chroma.tar.gz
+    python snapshot_vector_store.py restore snapshots/chroma.tar.gz
+
+Pass --tenant <id> to work on one school's store in a multi-tenant deployment.
+
+Snapshots can be taken while the app is running: the copy holds the store's
+write lock file, which the app's workers take for every write, so their writes
+wait until it is done. Nothing else should write to the directory meanwhile.
+Restore replaces the persist directory, so stop the app first, or point new
+nodes at a snapshot with CHROMA_RESTORE_SNAPSHOT and they restore it
+themselves on first boot.
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.snapshot import (
+    StoreWriteLock, create_snapshot, restore_snapshot, verify_snapshot, write_lock_path, SnapshotError
+)
+from app.services.embedding_models import DEFAULT_EMBEDDING_MODEL, EmbeddingState
+from app.services.tenant_config import DEFAULT_TENANT, load_tenants, persist_directory as tenant_persist_directory
+
+def store_directory(tenant: str) -> str:
+    """A tenant's persist directory, read from TENANTS_CONFIG without creating its services"""
+    if tenant == DEFAULT_TENANT:
+        return tenant_persist_directory(tenant, {}, '')
+
+    config_path = os.getenv('TENANTS_CONFIG')
+    tenants = load_tenants(config_path) if config_path else {}
+    if tenant not in tenants:
+        raise SnapshotError(f"Unknown tenant: {tenant}")
+    return tenant_persist_directory(tenant, tenants, os.getenv('TENANT_DATA_DIRECTORY', './tenants'))
+
+def snapshot_metadata(persist_directory: str, tenant: str) -> dict:
+    """Manifest fields describing the store, read from disk without opening ChromaDB"""
+    try:
+        import chromadb
+        chromadb_version = getattr(chromadb, '__version__', 'unknown')
+    except ImportError:
+        chromadb_version = 'unknown'
+
+    state_path = os.path.join(persist_directory, 'embedding_state.json')
+    if tenant == DEFAULT_TENANT:
+        state_path = os.getenv('EMBEDDING_STATE_PATH', state_path)
+    return {
+        'chromadb_version': chromadb_version,
+        'embedding_model': EmbeddingState(state_path).load().get('active_model', DEFAULT_EMBEDDING_MODEL)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot and restore the vector database")
+    parser.add_argument('--tenant', default=DEFAULT_TENANT, help='tenant id from TENANTS_CONFIG')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    create = commands.add_parser('create', help='write a snapshot of the persist directory')
+    create.add_argument('output', nargs='?',
+                        default=os.path.join('snapshots', f"chroma-{datetime.now().strftime('%Y%m%d-%H%M%S')}.tar.gz"))
+
+    verify = commands.add_parser('verify', help='check a snapshot against its checksums')
+    verify.add_argument('archive')
+
+    restore = commands.add_parser('restore', help='replace the persist directory with a snapshot')
+    restore.add_argument('archive')
+    restore.add_argument('--discard-previous', action='store_true',
+                         help='delete the current directory instead of keeping it as <dir>.previous-<time>')
+
+    args = parser.parse_args()
+    persist_directory = store_directory(args.tenant)
+
+    if args.command == 'create':
+        print(f"📸 Snapshotting {persist_directory}...")
+        manifest = create_snapshot(
+            persist_directory,
+            args.output,
+            write_lock=StoreWriteLock(write_lock_path(persist_directory)),
+            metadata=snapshot_metadata(persist_directory, args.tenant)
+        )
+        size = os.path.getsize(args.output) / (1024 * 1024)
+        print(f"✅ Wrote {args.output} ({len(manifest['files'])} files, {size:.1f} MB)")
+
+    elif args.command == 'verify':
+        manifest = verify_snapshot(args.archive)
+        print(f"✅ {args.archive} is intact ({len(manifest['files'])} files, taken {manifest['created_at']})")
+
+    else:
+        print(f"♻️  Restoring {args.archive} into {persist_directory}...")
+        manifest = restore_snapshot(args.archive, persist_directory, keep_previous=not args.discard_previous)
+        print(f"✅ Restored snapshot taken {manifest['created_at']}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except SnapshotError as e:
+        print(f"\n❌ Snapshot error: {str(e)}")
+        sys.exit(1)
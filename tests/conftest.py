@@ -0,0 +1,97 @@
+import os
+import re
+import hashlib
+import tempfile
+
+import numpy as np
+import pytest
+
+# The services create their stores when their modules are imported; keep
+# everything the tests touch out of the working tree
+DATA_DIRECTORY = tempfile.mkdtemp(prefix='studyhub-tests-')
+os.environ.setdefault('CHROMA_PERSIST_DIRECTORY', os.path.join(DATA_DIRECTORY, 'chroma_db'))
+os.environ.setdefault('TENANT_DATA_DIRECTORY', os.path.join(DATA_DIRECTORY, 'tenants'))
+os.environ.setdefault('ANSWER_CACHE_ENABLED', 'false')
+os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+os.environ.setdefault('EMBEDDING_MIGRATION_AUTOSTART', 'false')
+
+class HashingEncoder:
+    """
+    Stand-in for a SentenceTransformer: a normalized bag-of-words vector.
+
+    Texts sharing most words land close together, and each model name hashes
+    words differently, so vectors of two models are told apart.
+    """
+
+    DIMENSION = 64
+
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', **kwargs):
+        self.model_name = model_name
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.DIMENSION
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.DIMENSION, dtype=np.float32)
+        for word in re.findall(r"[a-z0-9']+", text.lower()):
+            digest = hashlib.blake2b(f'{self.model_name}:{word}'.encode('utf-8'), digest_size=4).digest()
+            vector[int.from_bytes(digest, 'big') % self.DIMENSION] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences, **kwargs):
+        if isinstance(sentences, str):
+            return self._vector(sentences)
+        return np.stack([self._vector(sentence) for sentence in sentences])
+
+@pytest.fixture
+def vector_modules(monkeypatch):
+    """
+    The vector_service module with HashingEncoder in place of the model
+
+    Skipped when chromadb or sentence-transformers is not installed.
+    """
+    pytest.importorskip('chromadb')
+    sentence_transformers = pytest.importorskip('sentence_transformers')
+    monkeypatch.setattr(sentence_transformers, 'SentenceTransformer', HashingEncoder, raising=False)
+
+    from app.services import vector_service
+    monkeypatch.setattr(vector_service, 'SentenceTransformer', HashingEncoder)
+    return vector_service
+
+@pytest.fixture
+def make_vector_service(vector_modules, tmp_path, monkeypatch):
+    """Factory for VectorService instances, each on a store of its own"""
+    monkeypatch.setenv('VECTOR_HEALTHCHECK_INTERVAL', '0')
+    created = []
+
+    def make(name: str = 'store', **env):
+        for key, value in env.items():
+            monkeypatch.setenv(key, str(value))
+        service = vector_modules.VectorService(persist_directory=str(tmp_path / name))
+        created.append(service)
+        return service
+
+    yield make
+    for service in created:
+        service.user_context_cache.close()
+
+@pytest.fixture
+def db_app(tmp_path):
+    """A Flask app with the app's models on a SQLite database of its own"""
+    from flask import Flask
+    from app import db
+    import app.models  # noqa: F401 (registers the tables)
+
+    flask_app = Flask('studyhub-tests')
+    flask_app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'app.db'}",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        SECRET_KEY='tests'
+    )
+    db.init_app(flask_app)
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.engine.dispose()
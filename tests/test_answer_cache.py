@@ -0,0 +1,99 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+class StubGemini:
+    def is_configured(self):
+        return True
+
+    def generate_response(self, question, raise_errors=False):
+        return f'Answer to {question}'
+
+@pytest.fixture
+def answer_cache_module(vector_modules):
+    pytest.importorskip('google.generativeai')
+    from app.services import answer_cache
+    return answer_cache
+
+@pytest.fixture
+def cache(answer_cache_module, make_vector_service, monkeypatch):
+    monkeypatch.setenv('ANSWER_CACHE_ENABLED', 'true')
+    monkeypatch.setenv('ANSWER_CACHE_MIN_CLUSTER_SIZE', '2')
+    monkeypatch.setenv('ANSWER_CACHE_MIN_USERS', '2')
+    return answer_cache_module.AnswerCache(make_vector_service(), StubGemini())
+
+def test_follow_ups_are_not_answered_from_the_cache(cache, monkeypatch):
+    monkeypatch.setattr(cache, 'in_peak', lambda at=None: True)
+    question = 'how do i balance chemical equations'
+    embedding = np.asarray(cache.vector_service.encode_query(question), dtype=np.float32)
+    conn = cache._connect()
+    conn.execute("INSERT INTO cached_answers VALUES (?, ?, ?, ?, ?, ?)",
+                 (question, 'Count atoms on both sides.', embedding.tobytes(), cache.vector_service.read_model, 5, 0))
+    conn.execute("INSERT INTO cache_state VALUES ('version', '1')")
+    conn.close()
+
+    assert cache.lookup('How do I balance chemical equations?')['response'] == 'Count atoms on both sides.'
+    assert cache.lookup('How do I balance chemical equations?', [
+        {'role': 'user', 'content': 'What is a mole?'},
+        {'role': 'assistant', 'content': '6.02e23 particles.'}
+    ]) is None
+
+def test_follow_ups_are_not_mined(cache):
+    service = cache.vector_service
+    for user in ('ana', 'ben', 'cy'):
+        service.store_conversation(user, 'What does photosynthesis produce?', 'Glucose and oxygen.')
+        service.store_conversation(user, 'What about the second step of it?', 'The Calvin cycle.',
+                                   conversation_context={'follow_up': True})
+
+    questions = [cluster['question'] for cluster in cache.mine_clusters()]
+
+    assert questions == ['what does photosynthesis produce']
+
+def test_refresh_runs_ahead_of_a_peak_but_not_during_one(cache, monkeypatch):
+    refreshes = []
+    monkeypatch.setattr(cache, 'refresh', lambda force=False: refreshes.append(force) or 1)
+
+    # A peak starts within the prewarm window
+    monkeypatch.setattr(cache, 'in_peak', lambda at=None: at is not None)
+    assert cache.refresh_if_peak_ahead() == 1
+
+    # Already in a peak
+    monkeypatch.setattr(cache, 'in_peak', lambda at=None: True)
+    assert cache.refresh_if_peak_ahead() == 0
+
+    # No peak soon
+    monkeypatch.setattr(cache, 'in_peak', lambda at=None: False)
+    assert cache.refresh_if_peak_ahead() == 0
+
+    assert refreshes == [False]
+
+def test_a_busy_cache_file_raises_the_lock_error(cache, answer_cache_module, monkeypatch):
+    connect = sqlite3.connect
+    monkeypatch.setattr(answer_cache_module.sqlite3, 'connect',
+                        lambda *args, **kwargs: connect(*args, **dict(kwargs, timeout=0.1)))
+    holder = cache._connect()
+    holder.execute('BEGIN IMMEDIATE')
+    try:
+        with pytest.raises(sqlite3.OperationalError, match='locked'):
+            cache._claim_refresh(force=True)
+    finally:
+        holder.execute('ROLLBACK')
+        holder.close()
+
+def test_merged_duplicates_stay_in_the_mining_sample(cache):
+    service = cache.vector_service
+    students = ('ana', 'ben', 'cy')
+    for user in students:
+        service.store_conversation(user, 'What does photosynthesis produce?', 'Glucose and oxygen.')
+    for i in range(12):
+        service.store_conversation('dev', f'Summarize chapter {i} of the {i}th novel', f'Summary {i}.')
+    # Asked again: merged into the first rows, which keep their place in the store
+    for user in students:
+        service.store_conversation(user, 'what does photosynthesis produce', 'Glucose and oxygen.')
+    cache.sample_size = 10
+
+    clusters = {cluster['question']: cluster for cluster in cache.mine_clusters()}
+
+    assert clusters['what does photosynthesis produce']['size'] == 6
+    assert clusters['what does photosynthesis produce']['users'] == 3
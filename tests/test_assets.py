@@ -0,0 +1,33 @@
+from app.assets import minify_js, minify_css
+
+def test_minify_js_drops_indentation_and_comment_lines():
+    source = "function f() {\n    // explain\n\n    return 1;\n}\n"
+    assert minify_js(source) == "function f() {\nreturn 1;\n}\n"
+
+def test_minify_js_keeps_multiline_template_literals_verbatim():
+    source = (
+        "    const html = `\n"
+        "        <p>\n"
+        "        // not a comment\n"
+        "\n"
+        "        ${items.map(item => `<li>${item}</li>`).join('')}\n"
+        "        </p>`;   \n"
+        "    // a comment\n"
+        "    render(html);\n"
+    )
+    assert minify_js(source) == (
+        "const html = `\n"
+        "        <p>\n"
+        "        // not a comment\n"
+        "\n"
+        "        ${items.map(item => `<li>${item}</li>`).join('')}\n"
+        "        </p>`;   \n"
+        "render(html);\n"
+    )
+
+def test_minify_js_ignores_backticks_in_strings_and_comments():
+    source = "const a = '`';\n/* ` */\n    // `\n    const b = 2;\n"
+    assert minify_js(source) == "const a = '`';\n/* ` */\nconst b = 2;\n"
+
+def test_minify_css_strips_comments_and_whitespace():
+    assert minify_css("a {\n  color: red; /* x */\n}\n") == "a{color:red}"
@@ -0,0 +1,112 @@
+import sqlite3
+
+import pytest
+
+from app.services.history_index import ConversationHistoryIndex
+
+def store(service, user_id, *messages):
+    return service.store_conversations_batch(user_id, [
+        {'user_message': message, 'bot_response': f'Answer to {message}', 'timestamp': f'2026-05-01T10:0{i}:00'}
+        for i, message in enumerate(messages)
+    ])
+
+def test_clear_conversations_removes_the_users_rows_and_index(make_vector_service):
+    service = make_vector_service()
+    store(service, 'student', 'What is osmosis?', 'Explain mitosis')
+    store(service, 'classmate', 'What is osmosis?')
+
+    assert service.history_index.cleared_at('student') is None
+    assert service.clear_conversations('student') == 2
+
+    assert service.get_conversation_history('student')['conversations'] == []
+    assert service.history_index.count('student') == 0
+    assert service.history_index.cleared_at('student') is not None
+    assert service.conversations_collection.get(where={'user_id': 'student'}, include=[])['ids'] == []
+    assert service.history_index.count('classmate') == 1
+
+def test_history_requests_do_not_backfill_the_index(make_vector_service):
+    service = make_vector_service()
+    store(service, 'student', 'What is osmosis?')
+
+    # A row written before the index existed
+    service.conversations_collection.add(
+        ids=['legacy'], embeddings=[[0.0] * 63 + [1.0]], documents=['User: Old\nBot: Older'],
+        metadatas=[{'user_id': 'student', 'timestamp': '2025-01-01T00:00:00'}]
+    )
+    assert service.get_conversation_history('student')['total'] == 1
+
+    service.backfill_history_index()
+    page = service.get_conversation_history('student')
+    assert page['total'] == 2
+    assert [conversation['id'] for conversation in page['conversations']][-1] == 'legacy'
+
+def test_is_available_needs_the_encoder(make_vector_service):
+    service = make_vector_service()
+    assert service.is_available()
+    service.encoder = None
+    assert not service.is_available()
+
+def synced_ids(delta):
+    return [conversation['id'] for conversation in delta['conversations']]
+
+def test_sync_delivers_backdated_exchanges(make_vector_service):
+    service = make_vector_service()
+    store(service, 'student', 'What is osmosis?', 'Explain mitosis')
+    version = service.sync_conversations('student')['version']
+
+    # An import of exchanges older than everything the client has seen
+    service.store_conversations_batch('student', [
+        {'user_message': 'Define entropy', 'bot_response': 'Disorder.', 'timestamp': '2025-09-01T08:00:00'}
+    ])
+    delta = service.sync_conversations('student', since=version)
+
+    assert [conversation['user_message'] for conversation in delta['conversations']] == ['Define entropy']
+    assert service.sync_conversations('student', since=delta['version'])['conversations'] == []
+
+def test_sync_delivers_backfilled_exchanges(make_vector_service):
+    service = make_vector_service()
+    store(service, 'student', 'What is osmosis?')
+    version = service.sync_conversations('student')['version']
+
+    service.conversations_collection.add(
+        ids=['legacy'], embeddings=[[0.0] * 63 + [1.0]], documents=['User: Old\nBot: Older'],
+        metadatas=[{'user_id': 'student', 'timestamp': '2025-01-01T00:00:00', 'user_message_length': 3}]
+    )
+    service.backfill_history_index()
+
+    assert synced_ids(service.sync_conversations('student', since=version)) == ['legacy']
+
+def test_moved_entries_are_synced_again(make_vector_service):
+    service = make_vector_service()
+    store(service, 'student', 'What is osmosis?', 'Explain mitosis')
+    first, _ = synced_ids(service.sync_conversations('student', since='0'))
+    version = service.sync_conversations('student')['version']
+
+    service.history_index.move('student', first, '2026-05-02T09:00:00')
+
+    assert synced_ids(service.sync_conversations('student', since=version)) == [first]
+
+def test_malformed_versions_are_rejected(make_vector_service):
+    service = make_vector_service()
+    with pytest.raises(ValueError):
+        service.sync_conversations('student', since='WyIyMDI2LTA1LTAxIiwiYSJd')
+
+def test_indexes_created_before_sequence_numbers_are_numbered_by_timestamp(tmp_path):
+    path = str(tmp_path / 'conversation_index.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE conversation_index (user_id TEXT NOT NULL, timestamp TEXT NOT NULL, "
+        "conversation_id TEXT NOT NULL, PRIMARY KEY (user_id, timestamp, conversation_id)) WITHOUT ROWID"
+    )
+    conn.executemany("INSERT INTO conversation_index VALUES (?, ?, ?)", [
+        ('student', '2026-05-02', 'b'), ('student', '2026-05-01', 'a'), ('student', '2026-05-03', 'c')
+    ])
+    conn.commit()
+    conn.close()
+
+    index = ConversationHistoryIndex(path)
+
+    assert [conversation_id for _, _, conversation_id in index.after('student')] == ['a', 'b', 'c']
+    assert index.seq_at('student', ('2026-05-02', 'b')) == 2
+    index.add('student', '2026-04-01', 'd')
+    assert index.after('student', 3) == [(4, '2026-04-01', 'd')]
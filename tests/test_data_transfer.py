@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+@pytest.fixture
+def transfer(db_app, make_vector_service, monkeypatch):
+    from app.services import data_transfer_service
+
+    store = make_vector_service()
+    monkeypatch.setattr(data_transfer_service, 'get_vector_service', lambda: store)
+    return data_transfer_service.DataTransferService()
+
+def lines(*documents):
+    return [json.dumps(document) for document in documents]
+
+EXPORT = lines(
+    {'type': 'export', 'version': 1},
+    {'type': 'todo', 'data': {'id': 1, 'text': 'Revise'}},
+    {'type': 'calendar_event', 'data': {'title': 'Exam', 'date': '2026-06-01'}},
+    {'type': 'pomodoro_session', 'data': {'kind': 'focus', 'duration_seconds': 1500,
+                                          'ended_at': '2026-05-01T10:25:00'}},
+    {'type': 'conversation', 'data': {'user_message': 'What is osmosis?', 'bot_response': 'Diffusion of water.',
+                                      'timestamp': '2026-05-01T10:00:00'}}
+)
+
+def test_importing_the_same_export_twice_adds_nothing_the_second_time(transfer):
+    first = transfer.import_user_data('student', EXPORT)
+    assert first['imported'] == {
+        'todo': 1, 'calendar_event': 1, 'favorite_quote': 0, 'pomodoro_session': 1, 'conversation': 1
+    }
+
+    second = transfer.import_user_data('student', EXPORT)
+    assert second['imported'] == {line_type: 0 for line_type in first['imported']}
+
+    exported = [json.loads(line) for line in transfer.export_user_data('student')]
+    assert [line['type'] for line in exported] == [
+        'export', 'calendar_event', 'todo', 'pomodoro_session', 'conversation'
+    ]
+
+def test_export_includes_records_saved_by_the_pages(transfer):
+    from app.services.record_service import record_service
+
+    record_service.save_record('student', 'todo', '42', {'id': 42, 'text': 'Flashcards'})
+    exported = [json.loads(line) for line in transfer.export_user_data('student')]
+    assert {'type': 'todo', 'data': {'id': 42, 'text': 'Flashcards'}} in exported
+
+    # Re-importing the export on top of the live data keeps one copy
+    assert transfer.import_user_data('student', [json.dumps(line) for line in exported])['imported']['todo'] == 0
+    assert record_service.list_records('student', 'todo') == [{'id': 42, 'text': 'Flashcards'}]
+
+def test_boolean_numbers_are_rejected(transfer):
+    session = {'kind': 'focus', 'duration_seconds': True, 'ended_at': '2026-05-01T10:25:00'}
+
+    assert transfer._validate('pomodoro_session', session) == 'pomodoro_session needs a positive duration_seconds'
+    assert transfer._validate('favorite_quote', {'quote_id': True}) == 'favorite_quote needs an integer quote_id'
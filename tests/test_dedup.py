@@ -0,0 +1,70 @@
+import threading
+
+from app.services.dedup import RecentConversations, simhash, hamming_distance
+
+def test_simhash_is_close_for_near_identical_messages():
+    assert hamming_distance(simhash('What is osmosis?'), simhash('what is osmosis')) <= 3
+    assert hamming_distance(simhash('What is osmosis?'), simhash('Plan my week of revision')) > 3
+
+def test_near_duplicate_keeps_the_newer_answer_and_moves_to_the_top(make_vector_service):
+    service = make_vector_service()
+    service.store_conversation('student', 'What is osmosis?', 'Osmosis is the movement of water across a membrane.')
+    service.store_conversation('student', 'Explain mitosis', 'Cell division')
+    service.store_conversation(
+        'student', 'what is osmosis', 'Osmosis is the movement of water across a semipermeable membrane.'
+    )
+
+    page = service.get_conversation_history('student')
+    assert page['total'] == 2
+    newest = page['conversations'][0]
+    assert newest['user_message'] == 'what is osmosis'
+    assert newest['bot_response'] == 'Osmosis is the movement of water across a semipermeable membrane.'
+
+    metadata = service.conversations_collection.get(ids=[newest['id']])['metadatas'][0]
+    assert metadata['duplicate_count'] == 1
+    assert metadata['first_seen'] < metadata['timestamp'] == newest['timestamp']
+
+def test_a_users_dedup_lock_does_not_block_other_users(make_vector_service):
+    service = make_vector_service()
+    recent = service.recent_conversations
+    busy = 'student-0'
+    other = next(f'student-{i}' for i in range(1, 100) if recent.user_lock(f'student-{i}') is not recent.user_lock(busy))
+
+    stored = threading.Event()
+    with recent.user_lock(busy):
+        thread = threading.Thread(
+            target=lambda: service.store_conversation(other, 'What is osmosis?', 'Water moves') and stored.set()
+        )
+        thread.start()
+        assert stored.wait(5)
+    thread.join()
+
+def test_windows_are_loaded_once_per_user():
+    recent = RecentConversations(window=2)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return [{'id': 'a', 'user_message': 'What is osmosis?', 'embedding': [1.0, 0.0], 'metadata': {}}]
+
+    assert recent.find_duplicate('student', 'what is osmosis', [1.0, 0.0], load)['id'] == 'a'
+    assert recent.find_duplicate('student', 'Plan my week', [0.0, 1.0], load) is None
+    assert loads == [1]
+
+    recent.reset()
+    recent.find_duplicate('student', 'what is osmosis', [1.0, 0.0], load)
+    assert loads == [1, 1]
+
+def test_a_duplicate_of_an_exchange_cleared_by_another_worker_is_stored_again(make_vector_service):
+    service = make_vector_service('shared')
+    other_worker = make_vector_service('shared')
+    service.store_conversation('student', 'What is osmosis?', 'Water moving across a membrane.')
+
+    assert other_worker.clear_conversations('student') == 1
+    # This process still has the cleared exchange in its dedup window
+    assert service.store_conversation('student', 'what is osmosis', 'Water moving across a membrane.')
+
+    page = service.get_conversation_history('student')
+    assert [item['user_message'] for item in page['conversations']] == ['what is osmosis']
+    rows = service.conversations_collection.get(where={'user_id': 'student'})
+    assert rows['ids'] == [page['conversations'][0]['id']]
@@ -0,0 +1,106 @@
+import os
+import time
+import threading
+
+import numpy as np
+
+from conftest import HashingEncoder
+
+class SwitchingEncoder:
+    """Encoder whose first encode is followed by a cutover, as if another thread switched models meanwhile"""
+
+    def __init__(self, encoder, switch):
+        self.encoder = encoder
+        self.switch = switch
+
+    def __getattr__(self, name):
+        return getattr(self.encoder, name)
+
+    def encode(self, *args, **kwargs):
+        embedding = self.encoder.encode(*args, **kwargs)
+        switch, self.switch = self.switch, None
+        if switch:
+            switch()
+        return embedding
+
+def stored_rows(service, base, model):
+    return service.model_collection(base, model).get(include=['documents', 'metadatas', 'embeddings'])
+
+def assert_encoded_with(rows, model):
+    assert rows['ids']
+    for document, metadata, embedding in zip(rows['documents'], rows['metadatas'], rows['embeddings']):
+        assert metadata['embedding_model'] == model
+        assert np.allclose(embedding, HashingEncoder(model).encode(document), atol=1e-5)
+
+def test_conversation_encoded_before_a_cutover_is_encoded_again(make_vector_service):
+    service = make_vector_service(EMBEDDING_MODEL='model-a')
+    service.encoder = SwitchingEncoder(service.encoder, lambda: service.switch_read_model('model-b'))
+
+    assert service.store_conversation('student', 'What is osmosis?', 'Water moving across a membrane.')
+
+    assert service.read_model == 'model-b'
+    assert_encoded_with(stored_rows(service, 'conversations', 'model-b'), 'model-b')
+
+def test_batch_encoded_before_a_cutover_is_encoded_again(make_vector_service):
+    service = make_vector_service(EMBEDDING_MODEL='model-a')
+    service.encoder = SwitchingEncoder(service.encoder, lambda: service.switch_read_model('model-b'))
+
+    stored = service.store_conversations_batch('student', [
+        {'user_message': 'Define entropy', 'bot_response': 'A measure of disorder.'},
+        {'user_message': 'Define enthalpy', 'bot_response': 'Heat content at constant pressure.'}
+    ])
+
+    assert stored == 2
+    assert_encoded_with(stored_rows(service, 'conversations', 'model-b'), 'model-b')
+
+def test_knowledge_encoded_before_a_cutover_is_encoded_again(make_vector_service):
+    service = make_vector_service(EMBEDDING_MODEL='model-a')
+    service.encoder = SwitchingEncoder(service.encoder, lambda: service.switch_read_model('model-b'))
+
+    assert service.store_study_knowledge('Spaced repetition', 'Review at growing intervals.', 'study_tips')
+
+    assert_encoded_with(stored_rows(service, 'study_knowledge', 'model-b'), 'model-b')
+
+def test_cutovers_from_other_processes_do_not_deadlock_writers(make_vector_service):
+    service = make_vector_service(EMBEDDING_MODEL='model-a')
+    service.connect()
+    state = service.embedding_state.load()
+    stop = threading.Event()
+    errors = []
+
+    def write(worker):
+        count = 0
+        while not stop.is_set():
+            count += 1
+            if not service.store_conversation(f'student-{worker}', f'Question {count}', f'Answer {count}'):
+                errors.append(f'write {worker}/{count} failed')
+
+    def read():
+        while not stop.is_set():
+            service.search_study_knowledge('revision')
+
+    def cut_over():
+        # Another process finishing (or rolling back) a migration, as seen through the state file
+        for i in range(20):
+            state['active_model'] = 'model-b' if i % 2 == 0 else 'model-a'
+            service.embedding_state.save(state)
+            mtime = time.time() + i
+            os.utime(service.embedding_state.path, (mtime, mtime))
+            time.sleep(0.05)
+        stop.set()
+
+    threads = [threading.Thread(target=write, args=(i,), daemon=True) for i in range(3)]
+    threads += [threading.Thread(target=read, daemon=True), threading.Thread(target=cut_over, daemon=True)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert not any(thread.is_alive() for thread in threads), 'writers and cutovers deadlocked'
+    assert errors == []
+
+    # Every stored vector matches the model of the collection it is in
+    for model in ('model-a', 'model-b'):
+        rows = stored_rows(service, 'conversations', model)
+        if rows['ids']:
+            assert_encoded_with(rows, model)
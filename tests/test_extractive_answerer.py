@@ -0,0 +1,36 @@
+import pytest
+
+@pytest.fixture
+def answerer(make_vector_service, monkeypatch):
+    from app.services import extractive_answerer
+
+    store = make_vector_service()
+    store.store_study_knowledge(
+        'Active recall',
+        'Active recall means testing yourself instead of rereading. Close the book and write down what you remember.',
+        'study_techniques'
+    )
+    store.store_study_knowledge(
+        'Pomodoro technique',
+        'The Pomodoro technique splits work into 25 minute focus sessions. Take a short break after each session.',
+        'time_management'
+    )
+    monkeypatch.setattr(extractive_answerer, 'get_vector_service', lambda: store)
+    return extractive_answerer.ExtractiveAnswerer(), store
+
+def test_answers_are_scored_in_memory_without_querying_chroma(answerer, monkeypatch):
+    extractive, store = answerer
+    queries = []
+    collection = store.knowledge_collection
+    monkeypatch.setattr(collection, 'query', lambda *args, **kwargs: queries.append(1))
+
+    for _ in range(3):
+        answer = extractive.answer('What is the Pomodoro technique?')
+        assert answer['sources'][0] == 'Pomodoro technique'
+        assert '25 minute focus sessions' in answer['response']
+    assert queries == []
+
+def test_unrelated_questions_get_no_answer_by_default(answerer):
+    extractive, _ = answerer
+    assert extractive.min_passage_similarity > 0
+    assert extractive.answer('Who won the football cup final yesterday?') is None
@@ -0,0 +1,58 @@
+from app.services.knowledge_index import KnowledgeTagIndex, split_tags
+
+class FakeCollection:
+    """Pages through a list of knowledge rows like Collection.get"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def get(self, limit=None, offset=0, include=None, ids=None):
+        self.calls += 1
+        page = self.rows[offset:offset + limit]
+        return {
+            'ids': [row[0] for row in page],
+            'documents': [row[1] for row in page],
+            'metadatas': [row[2] for row in page]
+        }
+
+def build_index(rows, page_size=2):
+    index = KnowledgeTagIndex()
+    index.PAGE_SIZE = page_size
+    collection = FakeCollection(rows)
+    index.load(collection)
+    return index, collection
+
+ROWS = [
+    ('a', 'Active recall', {'title': 'Active recall', 'category': 'study_techniques', 'tags': 'memory,testing'}),
+    ('b', 'Spacing', {'title': 'Spacing', 'category': 'study_techniques', 'tags': 'memory, scheduling'}),
+    ('c', 'Pomodoro', {'title': 'Pomodoro', 'category': 'time_management', 'tags': 'focus'}),
+]
+
+def test_split_tags_trims_and_skips_empty():
+    assert split_tags(' memory, ,testing ') == ['memory', 'testing']
+    assert split_tags(None) == []
+
+def test_load_pages_through_collection_once():
+    index, collection = build_index(ROWS)
+    index.load(collection)
+
+    assert index.loaded
+    # Two full pages, then an empty one; the second load() is a no-op
+    assert collection.calls == 2
+
+def test_candidates_intersect_category_and_tags():
+    index, _ = build_index(ROWS)
+
+    assert index.candidates() is None
+    assert index.candidates(category='study_techniques') == {'a', 'b'}
+    assert index.candidates(category='study_techniques', tags=['memory', 'testing']) == {'a'}
+    assert index.candidates(tags=['memory', 'focus']) == set()
+
+def test_browse_orders_by_title_and_counts_facets():
+    index, _ = build_index(ROWS)
+
+    page = index.browse(tags=['memory'], limit=1)
+    assert page['total'] == 2
+    assert [item['id'] for item in page['items']] == ['a']
+    assert index.facets()['tags'] == {'focus': 1, 'memory': 2, 'scheduling': 1, 'testing': 1}
@@ -0,0 +1,51 @@
+import time
+
+from app.services.metrics import MetricsRegistry, CHAT_STAGE_SECONDS, chat_turn, chat_stage
+
+def stage_sum(stage):
+    child = CHAT_STAGE_SECONDS.labels(stage=stage)
+    return child.snapshot()['sum'], sum(child.snapshot()['counts'])
+
+def test_nested_stage_time_is_not_counted_twice():
+    store_before, embed_before = stage_sum('store'), stage_sum('embed')
+
+    with chat_turn():
+        with chat_stage('store'):
+            with chat_stage('embed'):
+                time.sleep(0.05)
+
+    store_sum = stage_sum('store')[0] - store_before[0]
+    embed_sum = stage_sum('embed')[0] - embed_before[0]
+    assert embed_sum >= 0.05
+    assert store_sum < 0.02
+
+def test_stages_outside_a_chat_turn_are_not_recorded():
+    before = stage_sum('gemini_call')
+    with chat_stage('gemini_call'):
+        pass
+    assert stage_sum('gemini_call') == before
+
+def test_multiprocess_render_adds_up_every_process(tmp_path):
+    workers = [MetricsRegistry(multiprocess_dir=str(tmp_path)) for _ in range(2)]
+    for amount, registry in zip((2, 3), workers):
+        counter = registry.counter('requests_total', 'Requests', labelnames=('route',))
+        histogram = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+        counter.labels(route='chat').inc(amount)
+        histogram.observe(0.5)
+        registry.write_snapshot()
+
+    text = workers[0].render()
+    assert 'requests_total{route="chat"} 5' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_count 2' in text
+
+def test_clearing_the_directory_drops_previous_runs(tmp_path):
+    old = MetricsRegistry(multiprocess_dir=str(tmp_path))
+    old.counter('requests_total', 'Requests').inc(7)
+    old.write_snapshot()
+
+    current = MetricsRegistry(multiprocess_dir=str(tmp_path))
+    current.counter('requests_total', 'Requests').inc(1)
+    current.clear_multiprocess_dir()
+
+    assert 'requests_total 1' in current.render()
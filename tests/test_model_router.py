@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip('google.generativeai')
+
+from config import Config
+from app.services.model_router import ModelRouter, ModelUnavailableError
+
+class BusyTier:
+    def generate(self, prompt):
+        raise ModelUnavailableError('busy')
+
+class AnsweringTier:
+    def generate(self, prompt):
+        return 'answer'
+
+def router(config, **tiers):
+    router = ModelRouter.from_config(config)
+    router.tiers.update(tiers)
+    return router
+
+def test_strong_requests_do_not_fall_back_by_default():
+    chat = router(Config, strong=BusyTier(), fast=AnsweringTier())
+    with pytest.raises(ModelUnavailableError):
+        chat.generate('chat', 'Explain photosynthesis')
+
+    assert chat.generate('quick', 'Tip?') == ('answer', 'fast')
+
+def test_strong_fallback_is_opt_in():
+    config = type('FallbackConfig', (Config,), {'GEMINI_STRONG_FALLBACK': True})
+    chat = router(config, strong=BusyTier(), fast=AnsweringTier())
+    assert chat.generate('chat', 'Explain photosynthesis') == ('answer', 'fast')
+
+def test_fast_requests_fall_back_to_strong():
+    chat = router(Config, strong=AnsweringTier(), fast=BusyTier())
+    assert chat.generate('quick', 'Tip?') == ('answer', 'strong')
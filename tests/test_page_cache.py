@@ -0,0 +1,53 @@
+import gzip
+
+import pytest
+from flask import Flask
+
+from app.page_cache import PageCache
+
+def make_app(debug=False):
+    app = Flask(__name__)
+    app.debug = debug
+    cache = PageCache(app)
+    renders = []
+
+    @app.route('/page')
+    @cache.cached
+    def page():
+        renders.append(1)
+        return '<html>' + 'study ' * 200 + '</html>'
+
+    return app, cache, renders
+
+@pytest.mark.parametrize('header, compressed', [
+    ('gzip, deflate', True),
+    ('*', True),
+    ('gzip;q=0, deflate', False),
+    ('*;q=0.5, gzip;q=0', False),
+    ('br', False),
+])
+def test_gzip_follows_accept_encoding_qualities(header, compressed):
+    app, _, _ = make_app()
+    response = app.test_client().get('/page', headers={'Accept-Encoding': header})
+
+    assert (response.headers.get('Content-Encoding') == 'gzip') is compressed
+    body = gzip.decompress(response.data) if compressed else response.data
+    assert body.startswith(b'<html>')
+
+def test_repeat_requests_use_the_cache_and_etag():
+    app, _, renders = make_app()
+    client = app.test_client()
+
+    etag = client.get('/page').headers['ETag']
+    response = client.get('/page', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert len(renders) == 1
+
+def test_files_are_only_watched_in_debug(monkeypatch):
+    app, cache, _ = make_app(debug=False)
+    monkeypatch.setattr(cache, '_current_signature', lambda: pytest.fail('walked the template folders'))
+    assert app.test_client().get('/page').status_code == 200
+
+    debug_app, debug_cache, _ = make_app(debug=True)
+    assert debug_cache.watch
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from app.profiling import RequestProfiler
+
+def write_profiles(tmp_path, max_files, count):
+    profiler = RequestProfiler()
+    profiler.directory = str(tmp_path)
+    profiler.max_files = max_files
+    for i in range(count):
+        profiler._write('chat.chat_api', float(i), f'main;handler {i}\n')
+    return sorted(os.listdir(profiler._endpoint_dir('chat.chat_api')))
+
+def test_rotation_keeps_the_newest_profiles(tmp_path):
+    kept = write_profiles(tmp_path, max_files=2, count=4)
+    assert len(kept) == 2
+    assert kept[-1].endswith('-3ms.folded')
+
+@pytest.mark.parametrize('max_files', [0, -1])
+def test_no_limit_keeps_every_profile(tmp_path, max_files):
+    assert len(write_profiles(tmp_path, max_files=max_files, count=3)) == 3
+
+@pytest.fixture
+def profiled_app(tmp_path):
+    from flask import Flask
+    from app.routes.debug_routes import debug_bp
+
+    flask_app = Flask('studyhub-tests')
+    flask_app.config.update(PROFILING_TOKEN='s3cret', PROFILING_DIR=str(tmp_path / 'profiles'))
+    RequestProfiler(flask_app)
+    flask_app.register_blueprint(debug_bp)
+    flask_app.extensions['request_profiler']._write('chat.chat_api', 12.0, 'main;handler 1\n')
+    (tmp_path / '.env').write_text('GEMINI_API_KEY=secret\n')
+    return flask_app
+
+def test_profiles_outside_the_profile_directory_are_refused(profiled_app):
+    client = profiled_app.test_client()
+    headers = {'X-Profile': 's3cret'}
+    stored = profiled_app.extensions['request_profiler'].list_profiles()['chat.chat_api'][0]['file']
+
+    assert client.get(f'/debug/profiles/chat.chat_api/{stored}', headers=headers).status_code == 200
+    assert client.get('/debug/profiles/%2E%2E/.env', headers=headers).status_code == 404
+    assert client.get('/debug/profiles/./.env', headers=headers).status_code == 404
+
+def test_profiles_need_the_exact_token(profiled_app):
+    client = profiled_app.test_client()
+
+    assert client.get('/debug/profiles', headers={'X-Profile': 's3cret'}).status_code == 200
+    assert client.get('/debug/profiles', headers={'X-Profile': 's3cre'}).status_code == 404
+    assert client.get('/debug/profiles').status_code == 404
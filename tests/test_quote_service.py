@@ -0,0 +1,66 @@
+import json
+
+from sqlalchemy import event
+
+from app import db
+from app.models import Quote
+from app.services.quote_service import QuoteService
+
+def test_favorites_load_their_quotes_in_one_query(db_app):
+    service = QuoteService()
+    service.add_quotes([
+        {'text': f'Quote {i}', 'author': 'Author', 'category': 'motivation'} for i in range(5)
+    ])
+    for quote_id in range(1, 6):
+        assert service.add_favorite('student', quote_id)
+    db.session.expire_all()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        favorites = service.get_favorites('student')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert [favorite['text'] for favorite in favorites] == [f'Quote {i}' for i in range(5)]
+    assert len(statements) == 1
+
+def insert_from_another_instance(category, position):
+    with db.engine.begin() as conn:
+        conn.execute(Quote.__table__.insert().values(
+            text='Theirs', author='Other', category=category, category_position=position
+        ))
+
+def test_a_catalog_seeded_meanwhile_by_another_instance_is_kept(db_app, tmp_path, monkeypatch):
+    service = QuoteService()
+    seed = tmp_path / 'quotes.json'
+    seed.write_text(json.dumps([{'text': 'Ours', 'author': 'Us', 'category': 'motivation'}]))
+    stage = service._stage_quotes
+
+    def seeded_meanwhile(quotes):
+        stage(quotes)
+        insert_from_another_instance('motivation', 0)
+
+    monkeypatch.setattr(service, '_stage_quotes', seeded_meanwhile)
+
+    assert service.seed_if_empty(str(seed)) == 0
+    assert [quote.text for quote in Quote.query.all()] == ['Theirs']
+
+def test_added_quotes_go_after_a_concurrent_insert(db_app, monkeypatch):
+    service = QuoteService()
+    stage = service._stage_quotes
+    calls = []
+
+    def inserted_meanwhile(quotes):
+        stage(quotes)
+        if not calls:
+            insert_from_another_instance('focus', 0)
+        calls.append(1)
+
+    monkeypatch.setattr(service, '_stage_quotes', inserted_meanwhile)
+
+    assert service.add_quotes([{'text': 'Ours', 'category': 'focus'}]) == 1
+    rows = Quote.query.filter_by(category='focus').order_by(Quote.category_position).all()
+    assert [(quote.text, quote.category_position) for quote in rows] == [('Theirs', 0), ('Ours', 1)]
+    assert service.category_counts() == {'focus': 2}
@@ -0,0 +1,74 @@
+import time
+import sqlite3
+import threading
+
+import pytest
+from flask import Flask, session, jsonify
+
+from app.rate_limit import RequestGuard, SQLiteRateLimitBackend
+
+@pytest.fixture
+def guarded_app():
+    flask_app = Flask('studyhub-tests')
+    flask_app.config.update(SECRET_KEY='tests', RATE_LIMIT_CAPACITY=2, RATE_LIMIT_PER_MINUTE=1)
+    guard = RequestGuard(flask_app)
+    release = threading.Event()
+    calls = []
+
+    @flask_app.route('/ask', methods=['POST'])
+    @guard.coalesce(key=lambda: 'student')
+    def ask():
+        calls.append(1)
+        release.wait(5)
+        session['history'] = session.get('history', []) + ['asked']
+        return jsonify({'answer': len(calls)})
+
+    @flask_app.route('/limited')
+    @guard.limit(key=lambda: 'student')
+    def limited():
+        return 'ok'
+
+    flask_app.release = release
+    flask_app.calls = calls
+    return flask_app
+
+def test_coalesced_requests_share_the_response_and_the_session_update(guarded_app):
+    results = {}
+
+    def send(name):
+        with guarded_app.test_request_context('/ask', method='POST', data='same question'):
+            response = guarded_app.full_dispatch_request()
+            results[name] = (response.get_json(), session.get('history'))
+
+    leader = threading.Thread(target=send, args=('leader',))
+    leader.start()
+    time.sleep(0.1)
+    follower = threading.Thread(target=send, args=('follower',))
+    follower.start()
+    time.sleep(0.1)
+    guarded_app.release.set()
+    leader.join()
+    follower.join()
+
+    assert len(guarded_app.calls) == 1
+    assert results['leader'] == results['follower'] == ({'answer': 1}, ['asked'])
+
+def test_limit_answers_429_once_the_bucket_is_empty(guarded_app):
+    client = guarded_app.test_client()
+    assert [client.get('/limited').status_code for _ in range(3)] == [200, 200, 429]
+    assert int(client.get('/limited').headers['Retry-After']) >= 1
+
+def test_sqlite_backend_reports_a_lock_timeout_rather_than_a_rollback_error(tmp_path, monkeypatch):
+    path = str(tmp_path / 'limits.sqlite3')
+    backend = SQLiteRateLimitBackend(path)
+    assert backend.take('student', capacity=1, refill_per_second=1)[0]
+
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute('BEGIN IMMEDIATE')
+    monkeypatch.setattr(backend, '_connect', lambda: sqlite3.connect(path, timeout=0, isolation_level=None))
+    try:
+        with pytest.raises(sqlite3.OperationalError, match='locked'):
+            backend.take('student', capacity=1, refill_per_second=1)
+    finally:
+        holder.execute('ROLLBACK')
+        holder.close()
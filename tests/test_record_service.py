@@ -0,0 +1,45 @@
+from app.models import UserRecord
+from app.services.record_service import RecordService, record_key
+
+def test_saving_a_record_again_replaces_it(db_app):
+    service = RecordService()
+    service.save_record('student', 'todo', '1', {'id': 1, 'text': 'Revise', 'completed': False})
+    service.save_record('student', 'todo', '1', {'id': 1, 'text': 'Revise', 'completed': True})
+    service.save_record('student', 'todo', '2', {'id': 2, 'text': 'Read'})
+
+    assert service.list_records('student', 'todo') == [
+        {'id': 1, 'text': 'Revise', 'completed': True},
+        {'id': 2, 'text': 'Read'}
+    ]
+    assert service.list_records('student', 'calendar_event') == []
+    assert service.list_records('someone-else', 'todo') == []
+
+def test_delete_records_only_touches_the_users_own(db_app):
+    service = RecordService()
+    service.save_record('student', 'todo', '1', {'id': 1})
+    service.save_record('someone-else', 'todo', '1', {'id': 1})
+
+    assert service.delete_records('student', 'todo', ['1', '7']) == 1
+    assert service.list_records('student', 'todo') == []
+    assert service.list_records('someone-else', 'todo') == [{'id': 1}]
+
+def test_add_missing_skips_records_already_stored(db_app):
+    service = RecordService()
+    service.save_record('student', 'calendar_event', '5', {'id': 5, 'title': 'Exam'})
+
+    added = service.add_missing('student', 'calendar_event', [
+        {'id': 5, 'title': 'Exam'},
+        {'id': 6, 'title': 'Essay'},
+        {'id': 6, 'title': 'Essay'},
+        {'title': 'No id'},
+        {'title': 'No id'}
+    ])
+    assert added == 2
+    assert service.add_missing('student', 'calendar_event', [{'id': 6}, {'title': 'No id'}]) == 0
+    assert UserRecord.query.filter_by(user_id='student').count() == 3
+
+def test_record_key_prefers_the_page_id_and_hashes_the_rest():
+    assert record_key({'id': 1718000000000, 'text': 'a'}) == '1718000000000'
+    assert record_key({'text': 'a', 'done': False}) == record_key({'done': False, 'text': 'a'})
+    assert record_key({'text': 'a'}) != record_key({'text': 'b'})
+    assert record_key({'id': True, 'text': 'a'}) != 'True'
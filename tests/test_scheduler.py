@@ -0,0 +1,140 @@
+import time
+import threading
+
+import pytest
+
+from app import db
+from app.models import JobRun
+from app.scheduler import JobScheduler
+
+@pytest.fixture
+def make_scheduler(db_app):
+    schedulers = []
+
+    def make(owner, **config):
+        db_app.config.update(SCHEDULER_ENABLED=False, SCHEDULER_POLL_INTERVAL=0.1, **config)
+        scheduler = JobScheduler(db_app)
+        scheduler.owner = owner
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.stop()
+        if scheduler._thread:
+            scheduler._thread.join(10)
+
+def test_a_job_running_past_its_timeout_keeps_its_lease(make_scheduler):
+    calls = []
+    release = threading.Event()
+
+    def slow_job():
+        calls.append(1)
+        release.wait(10)
+
+    running = make_scheduler('host-a:1')
+    running.register('slow', slow_job, interval=3600, timeout=0.5)
+    running.start()
+
+    other = make_scheduler('host-b:1')
+    other.register('slow', slow_job, interval=3600, timeout=0.5)
+    job = other.jobs['slow']
+
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert calls == [1]
+
+    # Well past the timeout, the other worker still cannot take the job over
+    for _ in range(15):
+        assert not other._take_lease(job, 'slow', due_only=False)
+        time.sleep(0.1)
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        db.session.remove()
+        runs = JobRun.query.filter_by(name='slow').all()
+        if runs and runs[0].status != 'running':
+            break
+        time.sleep(0.05)
+
+    assert [run.status for run in runs] == ['succeeded']
+    assert calls == [1]
+
+def test_a_lease_that_is_not_renewed_is_taken_over(make_scheduler):
+    dead = make_scheduler('host-a:1')
+    job = dead.register('slow', lambda: None, interval=3600, timeout=0.2)
+    dead.sync_jobs()
+    assert dead._take_lease(job, 'slow', due_only=False)
+    run = dead._record_run(job, 'slow')
+
+    other = make_scheduler('host-b:1')
+    other.register('slow', lambda: None, interval=3600, timeout=0.2)
+    assert not other._take_lease(job, 'slow', due_only=False)
+    time.sleep(0.3)
+    assert other._take_lease(job, 'slow', due_only=False)
+
+    assert db.session.get(JobRun, run.id).status == 'failed'
+
+def test_queued_arguments_are_checked_against_the_job(make_scheduler):
+    scheduler = make_scheduler('host-a:1')
+
+    def rebuild(days: int = 7, ratio: float = 1.0):
+        pass
+
+    scheduler.register('rebuild', rebuild)
+
+    assert scheduler.enqueue('rebuild', days=30, ratio=2)
+    with pytest.raises(ValueError, match='unexpected keyword'):
+        scheduler.enqueue('rebuild', weeks=4)
+    with pytest.raises(ValueError, match='days must be int'):
+        scheduler.enqueue('rebuild', days='30')
+    with pytest.raises(ValueError, match='days must be int'):
+        scheduler.enqueue('rebuild', days=True)
+    assert JobRun.query.count() == 1
+
+def test_admin_run_endpoint_checks_the_token_and_the_arguments(make_scheduler, db_app, monkeypatch):
+    from app.routes import admin_routes
+
+    scheduler = make_scheduler('host-a:1', ADMIN_TOKEN='s3cret')
+    scheduler.register('rebuild', lambda days=7: None)
+    monkeypatch.setattr(admin_routes, 'scheduler', scheduler)
+    db_app.register_blueprint(admin_routes.admin_bp)
+    client = db_app.test_client()
+
+    assert client.post('/admin/jobs/rebuild/run', json={}).status_code == 404
+    assert client.post('/admin/jobs/rebuild/run', json={}, headers={'X-Admin-Token': 'wrong'}).status_code == 404
+
+    headers = {'X-Admin-Token': 's3cret'}
+    assert client.post('/admin/jobs/rebuild/run', json={'days': 30}, headers=headers).status_code == 202
+    response = client.post('/admin/jobs/rebuild/run', json={'weeks': 4}, headers=headers)
+    assert response.status_code == 400
+    assert 'weeks' in response.get_json()['error']
+
+def test_tenant_jobs_run_for_loaded_tenants_only(vector_modules, monkeypatch):
+    pytest.importorskip('google.generativeai')
+    from types import SimpleNamespace
+    from app import jobs
+
+    calls = []
+    record = lambda name: (lambda *args, **kwargs: calls.append(name) or 0)
+    loaded = SimpleNamespace(
+        tenant_id='north-high',
+        vector_service=SimpleNamespace(history_index=SimpleNamespace(compact=record('history_index.compact')),
+                                       backfill_history_index=record('backfill')),
+        answer_cache=SimpleNamespace(compact=record('answer_cache.compact'),
+                                     refresh_if_peak_ahead=record('prewarm'))
+    )
+
+    def load(tenant_id):
+        raise AssertionError(f"loaded services for {tenant_id}")
+
+    monkeypatch.setattr(jobs, 'tenant_registry', SimpleNamespace(
+        loaded=lambda: [loaded], tenant_ids=['default', 'north-high', 'south-high'], services=load
+    ))
+    jobs.compact_indexes()
+    jobs.backfill_history_indexes()
+    jobs.prewarm_answer_cache()
+
+    assert calls == ['history_index.compact', 'answer_cache.compact', 'backfill', 'prewarm']
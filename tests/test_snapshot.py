@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import sqlite3
+import subprocess
+
+import pytest
+
+from app.services import snapshot
+from app.services.snapshot import (
+    StoreWriteLock, create_snapshot, restore_snapshot, verify_snapshot, write_lock_path
+)
+
+pytestmark = pytest.mark.skipif(snapshot.fcntl is None, reason='file locks need fcntl')
+
+WRITER = '''
+import sys, time
+from app.services.snapshot import StoreWriteLock
+with StoreWriteLock(sys.argv[1]):
+    with open(sys.argv[2], 'w') as f:
+        f.write(str(time.monotonic()))
+'''
+
+@pytest.fixture
+def store(tmp_path):
+    persist = tmp_path / 'chroma_db'
+    segment = persist / 'segment-1'
+    segment.mkdir(parents=True)
+    (segment / 'data_level0.bin').write_bytes(b'\x01' * 64)
+    conn = sqlite3.connect(persist / 'chroma.sqlite3')
+    conn.execute('CREATE TABLE embeddings (id TEXT)')
+    conn.execute("INSERT INTO embeddings VALUES ('a')")
+    conn.commit()
+    conn.close()
+    return str(persist)
+
+def test_segments_are_copied_before_the_databases(store, tmp_path, monkeypatch):
+    order = []
+    copy_files = snapshot._copy_consistent_files
+    connect = snapshot.sqlite3.connect
+
+    def record_copy(source, destination, names, attempts=5):
+        order.extend(names)
+        return copy_files(source, destination, names, attempts)
+
+    def record_connect(path, *args, **kwargs):
+        if str(path).startswith(store):
+            order.append(os.path.basename(path))
+        return connect(path, *args, **kwargs)
+
+    monkeypatch.setattr(snapshot, '_copy_consistent_files', record_copy)
+    monkeypatch.setattr(snapshot.sqlite3, 'connect', record_connect)
+    create_snapshot(store, str(tmp_path / 'out.tar.gz'))
+
+    assert order == ['data_level0.bin', 'chroma.sqlite3']
+
+def test_exclusive_lock_holds_back_writers_in_other_processes(store, tmp_path):
+    lock = StoreWriteLock(write_lock_path(store))
+    marker = tmp_path / 'written'
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+
+    with lock.exclusive():
+        writer = subprocess.Popen([sys.executable, '-c', WRITER, lock.path, str(marker)], env=env)
+        time.sleep(1)
+        assert not marker.exists()
+        released = time.monotonic()
+
+    assert writer.wait(30) == 0
+    assert float(marker.read_text()) >= released
+
+def test_exclusive_lock_waits_for_a_writer_in_another_process(store, tmp_path):
+    path = write_lock_path(store)
+    holder = subprocess.Popen(
+        [sys.executable, '-c', 'import sys, time, fcntl\n'
+         'f = open(sys.argv[1], "a"); fcntl.flock(f, fcntl.LOCK_SH)\n'
+         'print("held", flush=True); time.sleep(1)', path],
+        stdout=subprocess.PIPE, text=True
+    )
+    assert holder.stdout.readline().strip() == 'held'
+    started = time.monotonic()
+
+    with StoreWriteLock(path).exclusive():
+        assert time.monotonic() - started > 0.5
+    holder.wait(30)
+
+def test_exclusive_lock_can_be_taken_inside_a_write(store):
+    lock = StoreWriteLock(write_lock_path(store))
+    with lock:
+        with lock.exclusive():
+            pass
+        with lock:
+            pass
+    assert lock._file is None
+
+def test_snapshot_round_trip(store, tmp_path):
+    archive = str(tmp_path / 'snapshots' / 'chroma.tar.gz')
+    manifest = create_snapshot(store, archive, write_lock=StoreWriteLock(write_lock_path(store)),
+                               metadata={'embedding_model': 'test-model'})
+
+    assert set(manifest['files']) == {'chroma.sqlite3', 'segment-1/data_level0.bin'}
+    assert verify_snapshot(archive)['embedding_model'] == 'test-model'
+
+    target = str(tmp_path / 'restored')
+    restore_snapshot(archive, target)
+    conn = sqlite3.connect(os.path.join(target, 'chroma.sqlite3'))
+    assert conn.execute('SELECT id FROM embeddings').fetchall() == [('a',)]
+    conn.close()
+    with open(os.path.join(target, 'segment-1', 'data_level0.bin'), 'rb') as f:
+        assert f.read() == b'\x01' * 64
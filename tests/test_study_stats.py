@@ -0,0 +1,107 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import PomodoroSession, StudyRollup
+from app.services.study_stats_service import StudyStatsService
+
+# A Wednesday; its week starts on Monday 2026-05-11
+TODAY = date(2026, 5, 13)
+
+def rollup(user_id, period, period_start):
+    return db.session.get(StudyRollup, (user_id, period, period_start))
+
+def test_sessions_increment_the_day_and_week_rollups(db_app):
+    service = StudyStatsService()
+    service.record_session('student', 'focus', 1500, ended_at=datetime(2026, 5, 11, 9, 0))
+    service.record_session('student', 'focus', 1200, ended_at=datetime(2026, 5, 13, 9, 0))
+    service.record_session('student', 'break', 300, ended_at=datetime(2026, 5, 13, 9, 30))
+
+    wednesday = rollup('student', 'day', TODAY)
+    assert (wednesday.focus_sessions, wednesday.focus_seconds) == (1, 1200)
+    assert (wednesday.break_sessions, wednesday.break_seconds) == (1, 300)
+
+    week = rollup('student', 'week', date(2026, 5, 11))
+    assert (week.focus_sessions, week.focus_seconds) == (2, 2700)
+    assert (week.break_sessions, week.break_seconds) == (1, 300)
+
+def test_a_racing_first_insert_of_a_rollup_is_retried(db_app, monkeypatch):
+    service = StudyStatsService()
+    increment = service._increment
+    raced = []
+
+    def racing_increment(user_id, period, period_start, kind, seconds):
+        increment(user_id, period, period_start, kind, seconds)
+        if not raced:
+            # Another worker's first session of the day landed at the same time
+            raced.append(period)
+            db.session.execute(StudyRollup.__table__.insert().values(
+                user_id=user_id, period=period, period_start=period_start,
+                focus_sessions=1, focus_seconds=60, break_sessions=0, break_seconds=0,
+                updated_at=datetime.utcnow()
+            ))
+
+    monkeypatch.setattr(service, '_increment', racing_increment)
+    service.record_session('student', 'focus', 1500, ended_at=datetime(2026, 5, 13, 9, 0))
+
+    assert raced == ['day']
+    assert PomodoroSession.query.count() == 1
+    assert (rollup('student', 'day', TODAY).focus_sessions, rollup('student', 'week', date(2026, 5, 11)).focus_sessions) == (1, 1)
+
+def test_a_second_integrity_error_is_raised(db_app, monkeypatch):
+    service = StudyStatsService()
+
+    def always_racing(*args, **kwargs):
+        raise IntegrityError('INSERT', {}, Exception('duplicate rollup'))
+
+    monkeypatch.setattr(service, 'add_session', always_racing)
+    with pytest.raises(IntegrityError):
+        service.record_session('student', 'focus', 1500)
+
+def test_stats_read_today_and_this_week(db_app):
+    service = StudyStatsService()
+    service.record_session('student', 'focus', 1500, ended_at=datetime(2026, 5, 11, 9, 0))
+    service.record_session('student', 'focus', 1200, ended_at=datetime(2026, 5, 13, 9, 0))
+    service.record_session('student', 'focus', 600, ended_at=datetime(2026, 5, 8, 9, 0))
+
+    stats = service.get_stats('student', day=TODAY)
+
+    assert (stats['today']['period_start'], stats['today']['focus_sessions'], stats['today']['focus_minutes']) == ('2026-05-13', 1, 20)
+    assert (stats['week']['period_start'], stats['week']['focus_sessions'], stats['week']['focus_minutes']) == ('2026-05-11', 2, 45)
+    assert service.get_stats('nobody', day=TODAY)['week']['focus_sessions'] == 0
+
+def test_rebuild_only_corrects_closed_periods(db_app):
+    service = StudyStatsService()
+    for ended_at in (datetime(2026, 5, 7, 9, 0), datetime(2026, 5, 12, 9, 0), datetime(2026, 5, 13, 9, 0)):
+        service.record_session('student', 'focus', 1500, ended_at=ended_at)
+
+    # Drift in every period, plus a closed rollup with no sessions behind it
+    for key in (('day', date(2026, 5, 7)), ('week', date(2026, 5, 4)), ('day', date(2026, 5, 12)),
+                ('day', TODAY), ('week', date(2026, 5, 11))):
+        rollup('student', *key).focus_sessions = 9
+    db.session.add(StudyRollup(user_id='student', period='day', period_start=date(2026, 5, 5),
+                               focus_sessions=1, focus_seconds=60, break_sessions=0, break_seconds=0))
+    db.session.commit()
+
+    assert service.rebuild_rollups(days=7, today=TODAY) == 4
+
+    assert rollup('student', 'day', date(2026, 5, 7)).focus_sessions == 1
+    assert rollup('student', 'week', date(2026, 5, 4)).focus_sessions == 1
+    assert rollup('student', 'day', date(2026, 5, 12)).focus_sessions == 1
+    assert rollup('student', 'day', date(2026, 5, 5)) is None
+    # Today and this week are still open; concurrent increments own them
+    assert rollup('student', 'day', TODAY).focus_sessions == 9
+    assert rollup('student', 'week', date(2026, 5, 11)).focus_sessions == 9
+
+@pytest.mark.parametrize('duration', [True, False, 1.5, '1500', 0, 14401])
+def test_the_session_route_rejects_durations_that_are_not_whole_seconds(db_app, vector_modules, duration):
+    pytest.importorskip('google.generativeai')
+    from app.routes.pomodoro_routes import pomodoro_bp
+
+    db_app.register_blueprint(pomodoro_bp)
+    response = db_app.test_client().post('/api/pomodoro/sessions', json={'kind': 'focus', 'duration_seconds': duration})
+
+    assert response.status_code == 400
+    assert PomodoroSession.query.count() == 0
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+from flask import Flask, g, session, jsonify
+
+from app.rate_limit import RequestGuard
+from app.services.snapshot import SnapshotError
+from app.services.tenant_config import load_tenants, persist_directory
+
+def write_tenants(tmp_path, tenants):
+    path = tmp_path / 'tenants.json'
+    path.write_text(json.dumps(tenants))
+    return str(path)
+
+def test_tenant_ids_must_leave_room_for_scoped_user_ids(tmp_path):
+    assert 'north-high' in load_tenants(write_tenants(tmp_path, {'north-high': {}}))
+    with pytest.raises(ValueError, match='Invalid tenant id'):
+        load_tenants(write_tenants(tmp_path, {'a' * 28: {}}))
+
+def test_unknown_rate_limit_settings_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match='rate limit'):
+        load_tenants(write_tenants(tmp_path, {'north-high': {'rate_limit': {'RATE_LIMIT_BURST': 5}}}))
+
+def test_rate_limits_are_per_tenant():
+    flask_app = Flask('studyhub-tests')
+    flask_app.config.update(SECRET_KEY='tests', RATE_LIMIT_CAPACITY=1, RATE_LIMIT_PER_MINUTE=1)
+    guard = RequestGuard(flask_app)
+    limits = {'north-high': {'RATE_LIMIT_CAPACITY': 3}}
+
+    @flask_app.before_request
+    def resolve():
+        g.tenant = flask_app.current_tenant
+        g.rate_limit = limits.get(g.tenant, {})
+
+    @flask_app.route('/ask')
+    @guard.limit(key=lambda: f"{g.tenant}:student")
+    def ask():
+        return jsonify({'ok': True})
+
+    client = flask_app.test_client()
+    flask_app.current_tenant = 'default'
+    assert [client.get('/ask').status_code for _ in range(2)] == [200, 429]
+    flask_app.current_tenant = 'north-high'
+    assert [client.get('/ask').status_code for _ in range(4)] == [200, 200, 200, 429]
+
+def test_snapshot_cli_finds_a_tenants_store_without_creating_services(tmp_path, monkeypatch):
+    import snapshot_vector_store
+
+    monkeypatch.setenv('TENANTS_CONFIG', write_tenants(tmp_path, {
+        'north-high': {},
+        'south-high': {'persist_directory': str(tmp_path / 'south')}
+    }))
+    monkeypatch.setenv('TENANT_DATA_DIRECTORY', str(tmp_path / 'tenants'))
+
+    assert snapshot_vector_store.store_directory('north-high') == str(tmp_path / 'tenants' / 'north-high' / 'chroma_db')
+    assert snapshot_vector_store.store_directory('south-high') == str(tmp_path / 'south')
+    with pytest.raises(SnapshotError):
+        snapshot_vector_store.store_directory('east-high')
+
+def test_default_tenant_uses_the_persist_directory_setting(monkeypatch):
+    monkeypatch.setenv('CHROMA_PERSIST_DIRECTORY', '/data/chroma')
+    assert persist_directory('default', {}, './tenants') == '/data/chroma'
+
+def test_one_session_is_a_different_user_at_each_tenant(vector_modules):
+    pytest.importorskip('google.generativeai')
+    from app.routes.chat_routes import get_or_create_user_id
+
+    flask_app = Flask('studyhub-tests')
+    flask_app.config.update(SECRET_KEY='tests')
+    session_user = 'c0ffee00-0000-4000-8000-000000000000'
+    with flask_app.test_request_context('/'):
+        session['user_id'] = session_user
+
+        assert get_or_create_user_id() == session_user
+        g.tenant = 'a' * 27
+        user_id = get_or_create_user_id()
+
+    assert user_id == f"{'a' * 27}:{session_user}"
+    assert len(user_id) <= 64
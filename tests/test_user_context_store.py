@@ -0,0 +1,132 @@
+import sqlite3
+
+import numpy as np
+
+from app.services.user_context_store import (
+    ChromaUserContextBackend,
+    SQLiteUserContextBackend,
+    UserContextCache,
+    merge_context
+)
+
+def make_cache(path, ttl=300.0):
+    # A long flush interval: the tests flush explicitly
+    return UserContextCache(SQLiteUserContextBackend(str(path)), ttl=ttl, flush_interval=3600)
+
+def test_first_get_starts_the_prune_loop(tmp_path):
+    cache = make_cache(tmp_path / 'context.sqlite3')
+    try:
+        assert cache.get('reader') is None
+        assert cache._flusher is not None and cache._flusher.is_alive()
+    finally:
+        cache.close()
+
+def test_prune_drops_expired_clean_entries_only(tmp_path):
+    cache = make_cache(tmp_path / 'context.sqlite3', ttl=0)
+    try:
+        cache.get('reader')
+        cache.set('writer', {'grade': 10})
+        cache.prune()
+        assert set(cache._entries) == {'writer'}
+    finally:
+        cache.close()
+
+def test_workers_keep_each_others_keys(tmp_path):
+    path = tmp_path / 'context.sqlite3'
+    first, second = make_cache(path), make_cache(path)
+    try:
+        first.get('student')
+        second.get('student')
+
+        first.set('student', {'profile': {'topics': ['math']}})
+        assert first.flush() == 1
+        # second still holds the context it read before first's write
+        second.set('student', {'goal': 'finals'})
+        assert second.flush() == 1
+
+        stored = make_cache(path).get('student')
+        assert stored == {'profile': {'topics': ['math']}, 'goal': 'finals'}
+    finally:
+        first.close()
+        second.close()
+
+def test_same_key_conflict_keeps_the_first_write(tmp_path):
+    path = tmp_path / 'context.sqlite3'
+    first, second = make_cache(path), make_cache(path)
+    try:
+        first.set('student', {'goal': 'start'})
+        first.flush()
+        first.get('student')
+        second.get('student')
+
+        first.set('student', {'goal': 'finals'})
+        first.flush()
+        second.set('student', {'goal': 'midterms'})
+        second.flush()
+
+        assert make_cache(path).get('student') == {'goal': 'finals'}
+        # The losing cache now serves the stored context
+        assert second.get('student') == {'goal': 'finals'}
+    finally:
+        first.close()
+        second.close()
+
+def test_blind_write_replaces_the_stored_context(tmp_path):
+    path = tmp_path / 'context.sqlite3'
+    first = make_cache(path)
+    first.set('student', {'goal': 'finals', 'grade': 11})
+    first.flush()
+    first.close()
+
+    second = make_cache(path)
+    second.set('student', {'grade': 12})
+    second.flush()
+    second.close()
+
+    assert make_cache(path).get('student') == {'grade': 12}
+
+def test_sqlite_backend_adds_revision_to_old_tables(tmp_path):
+    path = tmp_path / 'context.sqlite3'
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE user_context (user_id TEXT PRIMARY KEY, context TEXT NOT NULL, updated_at TEXT NOT NULL)")
+        conn.execute("INSERT INTO user_context VALUES ('student', '{\"grade\": 9}', '2024-01-01')")
+
+    backend = SQLiteUserContextBackend(str(path))
+    assert backend.load('student') == ('student', {'grade': 9}, 0)
+
+def test_merge_context_applies_only_our_changes():
+    base = {'a': 1, 'b': 1, 'c': 1}
+    ours = {'a': 2, 'b': 1}
+    theirs = {'a': 1, 'b': 3, 'c': 1, 'd': 4}
+    assert merge_context(base, ours, theirs) == {'a': 2, 'b': 3, 'd': 4}
+
+def test_chroma_placeholders_are_distinct_unit_vectors():
+    backend = ChromaUserContextBackend(lambda: None, 16)
+    first, second = backend._placeholder('a', 16), backend._placeholder('b', 16)
+
+    assert first == backend._placeholder('a', 16)
+    assert first != second
+    assert np.isclose(np.linalg.norm(first), 1.0)
+
+def test_chroma_backend_merges_concurrent_writers(tmp_path):
+    from benchmarks.common import InMemoryCollection
+
+    collection = InMemoryCollection('user_context')
+    lock_path = str(tmp_path / 'user_context.lock')
+    first = UserContextCache(ChromaUserContextBackend(lambda: collection, 16, lock_path), flush_interval=3600)
+    second = UserContextCache(ChromaUserContextBackend(lambda: collection, 16, lock_path), flush_interval=3600)
+    try:
+        first.get('student')
+        second.get('student')
+        first.set('student', {'profile': {'exchanges': 3}})
+        second.set('student', {'goal': 'finals'})
+        first.flush()
+        second.flush()
+
+        doc_id, context, revision = ChromaUserContextBackend(lambda: collection, 16).load('student')
+        assert context == {'profile': {'exchanges': 3}, 'goal': 'finals'}
+        assert revision == 2
+        assert collection.count() == 1
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.dedup import RecentConversations
+
+class FakeHistoryIndex:
+    def __init__(self):
+        self.cleared = {}
+
+    def cleared_at(self, user_id):
+        return self.cleared.get(user_id)
+
+class FakeVectorService:
+    """The conversation and user context calls UserProfileService makes"""
+
+    def __init__(self, exchanges):
+        self.exchanges = [dict(exchange, seq=i + 1) for i, exchange in enumerate(exchanges)]
+        self.contexts = {}
+        self.history_index = FakeHistoryIndex()
+        self.recent_conversations = RecentConversations()
+
+    def clear_conversations(self, user_id):
+        with self.recent_conversations.user_lock(user_id):
+            self.exchanges = []
+            self.history_index.cleared[user_id] = datetime.now().isoformat()
+
+    def get_user_context(self, user_id):
+        return dict(self.contexts.get(user_id) or {}) or None
+
+    def update_user_context(self, user_id, context):
+        self.contexts[user_id] = context
+        return True
+
+    def get_conversations_after(self, user_id, seq=0, limit=100):
+        return [exchange for exchange in self.exchanges if exchange['seq'] > seq][:limit]
+
+def exchanges(*messages, days_ago=0):
+    timestamp = (datetime.now() - timedelta(days=days_ago)).isoformat()
+    return [
+        {'id': f'{days_ago}-{i}', 'timestamp': timestamp, 'user_message': message, 'bot_response': ''}
+        for i, message in enumerate(messages)
+    ]
+
+@pytest.fixture
+def profiles(vector_modules, monkeypatch):
+    from app.services.user_profile import UserProfileService
+
+    created = []
+
+    def make(history, **env):
+        for key, value in env.items():
+            monkeypatch.setenv(key, str(value))
+        service = UserProfileService(FakeVectorService(history))
+        created.append(service)
+        return service
+
+    yield make
+    for service in created:
+        service.close()
+
+HISTORY = (
+    exchanges('I struggle with algebra homework', 'Flashcards for biology?', days_ago=20)
+    + exchanges('Chemistry stoichiometry is confusing', 'More algebra practice please', days_ago=1)
+)
+
+def test_profile_does_not_depend_on_batch_size(profiles):
+    weights = []
+    for batch_size in (1, 2, 100):
+        service = profiles(HISTORY, PROFILE_BATCH_SIZE=batch_size)
+        assert service.refresh_user('student')
+        profile = service.get_profile('student')
+        weights.append({section: profile[section] for section in ('subjects', 'weak_areas', 'techniques')})
+
+    assert weights[0] == weights[1] == weights[2]
+
+def test_older_exchanges_weigh_less(profiles):
+    service = profiles(HISTORY, PROFILE_DECAY=0.9)
+    service.refresh_user('student')
+    subjects = service.get_profile('student')['subjects']
+
+    assert subjects['chemistry'] == pytest.approx(0.9, abs=0.01)
+    assert subjects['biology'] == pytest.approx(0.9 ** 20, abs=0.01)
+    assert subjects['math'] == pytest.approx(0.9 + 0.9 ** 20, abs=0.01)
+
+def test_close_stops_the_refresher(profiles):
+    service = profiles(HISTORY, PROFILE_REFRESH_INTERVAL=60)
+    service.mark_dirty('student')
+    refresher = service._refresher
+    assert refresher.is_alive()
+
+    service.close()
+    assert not refresher.is_alive()
+    service.mark_dirty('student')
+    assert service._refresher is refresher
+
+def test_a_refresh_does_not_bring_back_a_cleared_profile(profiles):
+    service = profiles(HISTORY)
+    vector_service = service.vector_service
+    read = vector_service.get_conversations_after
+
+    def cleared_while_reading(user_id, seq=0, limit=100):
+        exchanges = read(user_id, seq, limit)
+        # The student clears their history while the refresher folds it in
+        vector_service.clear_conversations(user_id)
+        service.reset(user_id)
+        return exchanges
+
+    vector_service.get_conversations_after = cleared_while_reading
+
+    assert not service.refresh_user('student')
+    assert service.get_profile('student') is None
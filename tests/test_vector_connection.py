@@ -0,0 +1,41 @@
+import sys
+import time
+import threading
+
+def test_reconnecting_while_requests_read_collections(make_vector_service, monkeypatch):
+    service = make_vector_service()
+    service.connect()
+
+    # Widen the window in which a reconnect has dropped the old collections
+    init_collections = service._init_collections
+    monkeypatch.setattr(service, '_init_collections', lambda: time.sleep(0.002) or init_collections())
+
+    # Switch threads as often as possible, so readers get preempted mid-lookup
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            try:
+                assert service.conversations_collection is not None
+                assert service.user_context_collection is not None
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for _ in range(50):
+            service.reconnect()
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+        sys.setswitchinterval(switch_interval)
+
+    assert errors == []
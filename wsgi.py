@@ -0,0 +1,6 @@
+import os
+
+from app import create_app
+
+# Entry point for production servers, e.g.: gunicorn -c gunicorn.conf.py wsgi:app
+app = create_app(os.environ.get("FLASK_CONFIG", "production"))